@@ -0,0 +1,52 @@
+import os
+
+# يمرره Procfile صراحة (gunicorn -c gunicorn.conf.py)
+
+###############################################
+# العمال: عدة خيوط في كل عامل (gthread)
+###############################################
+# العامل المتزامن (sync) يخدم طلباً واحداً في كل مرة، فتسجيل دخول ينتظر bcrypt يحجز العامل كله ولا أثر لمجمع
+# التجزئة المحدود. مع الخيوط تنتظر طلبات الدخول في المجمع (BCRYPT_MAX_PENDING أقل من threads) وتُخدم الصفحات
+# الأخرى في الخيوط الباقية، ويجمع WriteCoalescer مسحات الحضور المتزامنة في دفعة واحدة. عدد العمال كالقيمة
+# الافتراضية في gunicorn (WEB_CONCURRENCY أو عامل واحد)
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+###############################################
+# مقاييس Prometheus من كل العمال
+###############################################
+# يُضبط قبل تحميل التطبيق (--preload) لأن prometheus_client يقرأ المتغير عند الاستيراد: كل عامل يكتب قيمه في
+# ملفات داخل المجلد و /metrics يجمعها. المجلد ثابت (instance/metrics) فلا تتراكم مجلدات التشغيلات السابقة، ويُفرَّغ
+# عند بدء العملية الرئيسية حتى لا تُضاف عداداتها. عند إعادة تحميل الإعدادات (HUP) يبقى كما هو لأن المتغير مضبوط مسبقاً
+if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+    metrics_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'metrics')
+    os.makedirs(metrics_dir, exist_ok=True)
+    for name in os.listdir(metrics_dir):
+        os.remove(os.path.join(metrics_dir, name))
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = metrics_dir
+
+###############################################
+# ذاكرة الصفحات المشتركة بين العمال
+###############################################
+# ذاكرة memory تُبطَل داخل العامل الذي كتب فقط، فمع أكثر من عامل تُستخدم ذاكرة SQLite المشتركة ما لم يُحدَّد
+# CACHE_BACKEND صراحة
+if workers > 1:
+    os.environ.setdefault('CACHE_BACKEND', 'sqlite')
+
+###############################################
+# بناء static/dist قبل تشغيل العمال
+###############################################
+def on_starting(server):
+    # الحزم ومشتقات الصور لا تُحفظ في المستودع؛ تُبنى مرة واحدة في العملية الرئيسية حتى لا يبنيها كل عامل
+    from app import app
+    from schoolms.assets import build_asset_bundles, build_image_derivatives
+
+    with app.app_context():
+        build_asset_bundles()
+        build_image_derivatives()
+
+def child_exit(server, worker):
+    # ملفات العامل المنتهي تبقى (عداداته جزء من المجموع) وتُعلَّم فقط ليتجاهل جامع المقاييس قيمه الحية
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,227 @@
+"""Schema added while tables were created by db.create_all()
+
+Revision ID: 166cfa117c16
+Revises: 50ee0dd7e885
+Create Date: 2026-10-17 04:43:27.116859
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '166cfa117c16'
+down_revision = '50ee0dd7e885'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _indexes(table):
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _unique_constraints(table):
+    return {constraint['name'] for constraint in sa.inspect(op.get_bind()).get_unique_constraints(table)}
+
+
+def upgrade():
+    if not _has_table('attendance_archive'):
+        op.create_table('attendance_archive',
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('table_name', sa.String(length=50), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('year')
+        )
+    if not _has_table('attendance_cube'):
+        op.create_table('attendance_cube',
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('stage', sa.String(length=50), nullable=False),
+        sa.Column('section', sa.String(length=10), nullable=False),
+        sa.Column('period', sa.String(length=50), nullable=False),
+        sa.Column('weekday', sa.Integer(), nullable=False),
+        sa.Column('week', sa.String(length=10), nullable=False),
+        sa.Column('month', sa.String(length=7), nullable=False),
+        sa.Column('present', sa.Integer(), nullable=False),
+        sa.Column('absent', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('date', 'stage', 'section', 'period')
+        )
+    existing = _indexes('attendance_cube')
+    with op.batch_alter_table('attendance_cube', schema=None) as batch_op:
+        if 'ix_attendance_cube_class_date' not in existing:
+            batch_op.create_index('ix_attendance_cube_class_date', ['stage', 'section', 'date'], unique=False)
+        if 'ix_attendance_cube_period_date' not in existing:
+            batch_op.create_index('ix_attendance_cube_period_date', ['period', 'date'], unique=False)
+
+    if not _has_table('class_daily_attendance'):
+        op.create_table('class_daily_attendance',
+        sa.Column('stage', sa.String(length=50), nullable=False),
+        sa.Column('section', sa.String(length=10), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('present', sa.Integer(), nullable=False),
+        sa.Column('absent', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('stage', 'section', 'date')
+        )
+    if not _has_table('table_version'):
+        op.create_table('table_version',
+        sa.Column('table_name', sa.String(length=100), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name')
+        )
+    if not _has_table('upload'):
+        op.create_table('upload',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('extension', sa.String(length=10), nullable=False),
+        sa.Column('content_type', sa.String(length=100), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('sha256')
+        )
+    if not _has_table('absence_alert'):
+        op.create_table('absence_alert',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('window_weeks', sa.Integer(), nullable=False),
+        sa.Column('absence_rate', sa.Float(), nullable=False),
+        sa.Column('absences', sa.Integer(), nullable=False),
+        sa.Column('records', sa.Integer(), nullable=False),
+        sa.Column('as_of', sa.Date(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['student_id'], ['student.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    existing = _indexes('absence_alert')
+    with op.batch_alter_table('absence_alert', schema=None) as batch_op:
+        if 'ix_absence_alert_student_id' not in existing:
+            batch_op.create_index(batch_op.f('ix_absence_alert_student_id'), ['student_id'], unique=False)
+
+    if not _has_table('attendance_bitmap'):
+        op.create_table('attendance_bitmap',
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('term', sa.String(length=10), nullable=False),
+        sa.Column('absent_bits', sa.LargeBinary(), nullable=False),
+        sa.Column('recorded_bits', sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(['student_id'], ['student.id'], ),
+        sa.PrimaryKeyConstraint('student_id', 'term')
+        )
+    if not _has_table('student_attendance_counter'):
+        op.create_table('student_attendance_counter',
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('present', sa.Integer(), nullable=False),
+        sa.Column('absent', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['student_id'], ['student.id'], ),
+        sa.PrimaryKeyConstraint('student_id')
+        )
+    if not _has_table('student_daily_attendance'):
+        op.create_table('student_daily_attendance',
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('present', sa.Integer(), nullable=False),
+        sa.Column('absent', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['student_id'], ['student.id'], ),
+        sa.PrimaryKeyConstraint('student_id', 'date')
+        )
+    if not _has_table('attachment'):
+        op.create_table('attachment',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('upload_sha256', sa.String(length=64), nullable=False),
+        sa.Column('kind', sa.String(length=30), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=True),
+        sa.Column('uploaded_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['upload_sha256'], ['upload.sha256'], ),
+        sa.ForeignKeyConstraint(['uploaded_by'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    existing = _indexes('attachment')
+    with op.batch_alter_table('attachment', schema=None) as batch_op:
+        if 'ix_attachment_kind_owner' not in existing:
+            batch_op.create_index('ix_attachment_kind_owner', ['kind', 'owner_id'], unique=False)
+        if 'ix_attachment_upload_sha256' not in existing:
+            batch_op.create_index(batch_op.f('ix_attachment_upload_sha256'), ['upload_sha256'], unique=False)
+
+    existing = _indexes('attendance')
+    unique = _unique_constraints('attendance')
+    if 'uq_attendance_date_period_student' not in unique:
+        # التكرارات القديمة (إعادة إرسال نفس الحصة) تمنع إنشاء القيد: يبقى آخر سجل لكل طالب وحصة ويوم
+        op.execute(
+            "DELETE FROM attendance WHERE period IS NOT NULL AND student_id IS NOT NULL AND id NOT IN "
+            "(SELECT MAX(id) FROM attendance GROUP BY date, period, student_id)"
+        )
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        if 'ix_attendance_date_id' not in existing:
+            batch_op.create_index('ix_attendance_date_id', ['date', 'id'], unique=False)
+        if 'ix_attendance_status_date_id' not in existing:
+            batch_op.create_index('ix_attendance_status_date_id', ['status', 'date', 'id'], unique=False)
+        if 'ix_attendance_student_date_id' not in existing:
+            batch_op.create_index('ix_attendance_student_date_id', ['student_id', 'date', 'id'], unique=False)
+        if 'ix_attendance_teacher_date_id' not in existing:
+            batch_op.create_index('ix_attendance_teacher_date_id', ['teacher_id', 'date', 'id'], unique=False)
+        if 'uq_attendance_date_period_student' not in unique:
+            batch_op.create_unique_constraint('uq_attendance_date_period_student', ['date', 'period', 'student_id'])
+
+    existing = _indexes('student')
+    with op.batch_alter_table('student', schema=None) as batch_op:
+        if 'ix_student_full_name' not in existing:
+            batch_op.create_index(batch_op.f('ix_student_full_name'), ['full_name'], unique=False)
+        if 'ix_student_stage_section' not in existing:
+            batch_op.create_index('ix_student_stage_section', ['stage', 'section'], unique=False)
+
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('user')}
+    if 'student_id' not in columns:
+        # SQLite لا يضيف قيود UNIQUE و FOREIGN KEY بـ ALTER، فيُعاد بناء الجدول (batch)
+        with op.batch_alter_table('user', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('student_id', sa.Integer(), nullable=True))
+            batch_op.create_unique_constraint('uq_user_student_id', ['student_id'])
+            batch_op.create_foreign_key('fk_user_student_id_student', 'student', ['student_id'], ['id'])
+    # بعد الترقية: flask rebuild-rollups يملأ جداول التجميع من سجلات الحضور الموجودة
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_user_student_id_student', type_='foreignkey')
+        batch_op.drop_constraint('uq_user_student_id', type_='unique')
+        batch_op.drop_column('student_id')
+
+    with op.batch_alter_table('student', schema=None) as batch_op:
+        batch_op.drop_index('ix_student_stage_section')
+        batch_op.drop_index(batch_op.f('ix_student_full_name'))
+
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_attendance_date_period_student', type_='unique')
+        batch_op.drop_index('ix_attendance_teacher_date_id')
+        batch_op.drop_index('ix_attendance_student_date_id')
+        batch_op.drop_index('ix_attendance_status_date_id')
+        batch_op.drop_index('ix_attendance_date_id')
+
+    with op.batch_alter_table('attachment', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_attachment_upload_sha256'))
+        batch_op.drop_index('ix_attachment_kind_owner')
+
+    op.drop_table('attachment')
+    op.drop_table('student_daily_attendance')
+    op.drop_table('student_attendance_counter')
+    op.drop_table('attendance_bitmap')
+    with op.batch_alter_table('absence_alert', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_absence_alert_student_id'))
+
+    op.drop_table('absence_alert')
+    op.drop_table('upload')
+    op.drop_table('table_version')
+    op.drop_table('class_daily_attendance')
+    with op.batch_alter_table('attendance_cube', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_cube_period_date')
+        batch_op.drop_index('ix_attendance_cube_class_date')
+
+    op.drop_table('attendance_cube')
+    op.drop_table('attendance_archive')
@@ -0,0 +1,146 @@
+"""Baseline schema
+
+Revision ID: 50ee0dd7e885
+Revises: 
+Create Date: 2026-10-17 04:43:06.737731
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '50ee0dd7e885'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # المخطط الأصلي كما أنشأه db.create_all() قبل اعتماد الترحيلات؛ الجداول الموجودة تُترك كما هي
+    # حتى تُرقّى القواعد القديمة بـ flask db upgrade مباشرة دون flask db stamp
+    if not _has_table('user'):
+        op.create_table('user',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=150), nullable=False),
+        sa.Column('password_hash', sa.String(length=150), nullable=False),
+        sa.Column('role', sa.String(length=50), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('username')
+        )
+    if not _has_table('student'):
+        op.create_table('student',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('full_name', sa.String(length=150), nullable=False),
+        sa.Column('birth_date', sa.Date(), nullable=False),
+        sa.Column('stage', sa.String(length=50), nullable=False),
+        sa.Column('section', sa.String(length=10), nullable=False),
+        sa.Column('guardian_info', sa.String(length=250), nullable=True),
+        sa.Column('academic_record', sa.Text(), nullable=True),
+        sa.Column('medical_reports', sa.Text(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if not _has_table('teacher'):
+        op.create_table('teacher',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('full_name', sa.String(length=150), nullable=False),
+        sa.Column('specialization', sa.String(length=150), nullable=True),
+        sa.Column('qualifications', sa.Text(), nullable=True),
+        sa.Column('experience_years', sa.Integer(), nullable=True),
+        sa.Column('evaluation', sa.Text(), nullable=True),
+        sa.Column('teaching_level', sa.String(length=50), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if not _has_table('book'):
+        op.create_table('book',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('author', sa.String(length=150), nullable=True),
+        sa.Column('isbn', sa.String(length=50), nullable=True),
+        sa.Column('quantity', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if not _has_table('attendance'):
+        op.create_table('attendance',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('period', sa.String(length=50), nullable=True),
+        sa.Column('reason', sa.String(length=100), nullable=True),
+        sa.Column('status', sa.String(length=10), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=True),
+        sa.Column('teacher_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['student_id'], ['student.id'], ),
+        sa.ForeignKeyConstraint(['teacher_id'], ['teacher.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if not _has_table('exam'):
+        op.create_table('exam',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('exam_date', sa.Date(), nullable=False),
+        sa.Column('subject', sa.String(length=150), nullable=False),
+        sa.Column('teacher_id', sa.Integer(), nullable=True),
+        sa.Column('details', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['teacher_id'], ['teacher.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if not _has_table('notification'):
+        op.create_table('notification',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=150), nullable=True),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if not _has_table('message'):
+        op.create_table('message',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sender_id', sa.Integer(), nullable=True),
+        sa.Column('receiver_id', sa.Integer(), nullable=True),
+        sa.Column('content', sa.Text(), nullable=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['receiver_id'], ['user.id'], ),
+        sa.ForeignKeyConstraint(['sender_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if not _has_table('schedule'):
+        op.create_table('schedule',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.String(length=20), nullable=True),
+        sa.Column('period', sa.String(length=50), nullable=True),
+        sa.Column('subject', sa.String(length=150), nullable=True),
+        sa.Column('teacher_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['teacher_id'], ['teacher.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if not _has_table('fee'):
+        op.create_table('fee',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=True),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('invoice_details', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['student_id'], ['student.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('fee')
+    op.drop_table('schedule')
+    op.drop_table('message')
+    op.drop_table('notification')
+    op.drop_table('exam')
+    op.drop_table('attendance')
+    op.drop_table('book')
+    op.drop_table('teacher')
+    op.drop_table('student')
+    op.drop_table('user')
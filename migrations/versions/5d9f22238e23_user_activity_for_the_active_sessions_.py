@@ -0,0 +1,35 @@
+"""User activity for the active sessions metric
+
+Revision ID: 5d9f22238e23
+Revises: aa025af681e2
+Create Date: 2026-10-17 04:58:24.770612
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d9f22238e23'
+down_revision = 'aa025af681e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # آخر نشاط لكل مستخدم: /metrics يعدّ الجلسات النشطة من هنا لأن الجلسات نفسها في ملفات تعريف الارتباط
+    op.create_table('user_activity',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('last_seen', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    with op.batch_alter_table('user_activity', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_activity_last_seen'), ['last_seen'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_activity', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_activity_last_seen'))
+
+    op.drop_table('user_activity')
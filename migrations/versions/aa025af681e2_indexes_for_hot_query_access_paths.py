@@ -0,0 +1,46 @@
+"""Indexes for hot query access paths
+
+Revision ID: aa025af681e2
+Revises: 166cfa117c16
+Create Date: 2026-10-17 04:44:08.921543
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'aa025af681e2'
+down_revision = '166cfa117c16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # كل فهرس يخدم استعلاماً محدداً؛ flask test يتحقق بـ EXPLAIN QUERY PLAN أن الاستعلام يستخدمه
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.create_index('ix_attendance_date_period_status', ['date', 'period', 'status', 'student_id'], unique=False)
+        batch_op.create_index('ix_attendance_student_status_date', ['student_id', 'status', 'date'], unique=False)
+
+    with op.batch_alter_table('fee', schema=None) as batch_op:
+        batch_op.create_index('ix_fee_student_status', ['student_id', 'status'], unique=False)
+
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.create_index('ix_message_receiver_timestamp', ['receiver_id', 'timestamp'], unique=False)
+
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.create_index('ix_notification_user_created', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.drop_index('ix_notification_user_created')
+
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.drop_index('ix_message_receiver_timestamp')
+
+    with op.batch_alter_table('fee', schema=None) as batch_op:
+        batch_op.drop_index('ix_fee_student_status')
+
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_student_status_date')
+        batch_op.drop_index('ix_attendance_date_period_status')
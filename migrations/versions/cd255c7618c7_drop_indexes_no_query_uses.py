@@ -0,0 +1,34 @@
+"""Drop indexes no query uses
+
+Revision ID: cd255c7618c7
+Revises: 5d9f22238e23
+Create Date: 2026-10-17 05:37:56.520980
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'cd255c7618c7'
+down_revision = '5d9f22238e23'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # التجميعات تعطي أعداد الغياب، والقيد الفريد يخدم الغيابات المسجلة لحصة في يوم، ولا استعلام يصفّي الرسوم بالطالب والحالة
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_date_period_status')
+        batch_op.drop_index('ix_attendance_student_status_date')
+
+    with op.batch_alter_table('fee', schema=None) as batch_op:
+        batch_op.drop_index('ix_fee_student_status')
+
+
+def downgrade():
+    with op.batch_alter_table('fee', schema=None) as batch_op:
+        batch_op.create_index('ix_fee_student_status', ['student_id', 'status'], unique=False)
+
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.create_index('ix_attendance_student_status_date', ['student_id', 'status', 'date'], unique=False)
+        batch_op.create_index('ix_attendance_date_period_status', ['date', 'period', 'status', 'student_id'], unique=False)
@@ -0,0 +1,54 @@
+import logging
+import os
+
+import click
+from flask import Flask
+
+from .config import PROJECT_ROOT, Config
+
+def create_app(config=None):
+    # إنشاء التطبيق وتكوينه مع تحديد مجلد الصور كـ static folder.
+    # كل الوحدات تُستورد هنا حتى يبقى "import schoolms" خفيفاً، ولا يُفتح أي اتصال أو خيط
+    # قبل fork العمال (gunicorn --preload): المجمعات والاتصالات تُنشأ عند أول استخدام في كل عامل
+    app = Flask(__name__, static_folder=os.path.join(PROJECT_ROOT, 'images'),
+                instance_path=os.path.join(PROJECT_ROOT, 'instance'))
+    app.config.from_object(Config)
+    if config:
+        app.config.update(config)
+
+    # إعداد تسجيل الأحداث
+    logging.basicConfig(level=logging.INFO)
+
+    from . import cli, coalescer, database, identity, metrics, passwords, profiling, templating
+    from .assets import assets_bp
+    from .blueprints import register_blueprints
+    from .caching import cache
+    from .compression import CompressionMiddleware
+    from .extensions import bcrypt, db, login_manager
+    from .uploads import UploadRequest, uploads_bp
+
+    # تهيئة الإضافات
+    database.configure_database(app)
+    db.init_app(app)
+    database.init_app(app)
+    profiling.init_app(app)
+    metrics.init_app(app)
+    # أوامر flask db (Flask-Migrate) تُسجَّل فقط عند التشغيل من flask CLI
+    if click.get_current_context(silent=True) is not None:
+        database.init_migrations(app)
+    bcrypt.init_app(app)
+    login_manager.init_app(app)
+    cache.init_app(app)
+    passwords.init_app(app)
+    coalescer.init_app(app)
+    identity.init_app(app)
+    templating.init_app(app)
+    cli.init_app(app)
+
+    app.request_class = UploadRequest
+    register_blueprints(app)
+    app.register_blueprint(assets_bp)
+    app.register_blueprint(uploads_bp)
+    app.register_blueprint(metrics.metrics_bp)
+    app.wsgi_app = CompressionMiddleware(app.wsgi_app, app.config)
+    return app
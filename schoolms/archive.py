@@ -0,0 +1,88 @@
+from datetime import date
+
+from flask import current_app
+from sqlalchemy import MetaData, select, union_all
+
+from .extensions import db
+from .models import Attendance, AttendanceArchive
+
+###############################################
+# أرشفة السنوات الدراسية المغلقة
+###############################################
+# جداول الأرشيف خارج db.metadata حتى لا ينشئها db.create_all()
+archive_metadata = MetaData()
+_archive_tables = {}
+
+def school_year_of(day):
+    start_month = current_app.config['SCHOOL_YEAR_START_MONTH']
+    return day.year if day.month >= start_month else day.year - 1
+
+def school_year_bounds(year):
+    start_month = current_app.config['SCHOOL_YEAR_START_MONTH']
+    return date(year, start_month, 1), date(year + 1, start_month, 1)
+
+def archive_table(year):
+    if year not in _archive_tables:
+        name = f'attendance_archive_{year}'
+        _archive_tables[year] = db.Table(
+            name, archive_metadata,
+            db.Column('id', db.Integer, primary_key=True),
+            db.Column('date', db.Date, nullable=False),
+            db.Column('period', db.String(50)),
+            db.Column('reason', db.String(100)),
+            db.Column('status', db.String(10), nullable=False),
+            db.Column('student_id', db.Integer),
+            db.Column('teacher_id', db.Integer),
+            db.Index(f'ix_{name}_date_id', 'date', 'id'),
+            db.Index(f'ix_{name}_student_date_id', 'student_id', 'date', 'id'),
+        )
+    return _archive_tables[year]
+
+def archived_years(start_date=None, end_date=None):
+    query = db.session.query(AttendanceArchive.year)
+    if start_date:
+        query = query.filter(AttendanceArchive.end_date > start_date)
+    if end_date:
+        query = query.filter(AttendanceArchive.start_date <= end_date)
+    return sorted(year for (year,) in query)
+
+def ensure_not_archived(dates):
+    archived = archived_years(min(dates), max(dates)) if dates else []
+    if any(school_year_of(day) in archived for day in dates):
+        raise ValueError("لا يمكن تعديل سجلات سنة دراسية مؤرشفة")
+
+def attendance_source(start_date=None, end_date=None):
+    # الاستعلامات العادية تقرأ جدول السنة الحالية فقط؛ عند تحديد نطاق تاريخ يمتد إلى
+    # سنوات مؤرشفة يُضم أرشيفها بـ UNION ALL بنفس أسماء الأعمدة
+    hot = Attendance.__table__
+    if not start_date and not end_date:
+        return hot
+    years = archived_years(start_date, end_date)
+    if not years:
+        return hot
+    columns = lambda table: [table.c.id, table.c.date, table.c.period, table.c.reason,
+                             table.c.status, table.c.student_id, table.c.teacher_id]
+    parts = [select(*columns(hot))] + [select(*columns(archive_table(year))) for year in years]
+    return union_all(*parts).subquery('attendance')
+
+def archive_school_year(year):
+    # نقل سنة دراسية مغلقة كاملة إلى جدولها في معاملة واحدة؛ جداول التجميع لا تتغير
+    if year >= school_year_of(date.today()):
+        raise ValueError("لا يمكن أرشفة السنة الدراسية الحالية")
+    if db.session.get(AttendanceArchive, year):
+        raise ValueError(f"السنة {year} مؤرشفة بالفعل")
+    start_date, end_date = school_year_bounds(year)
+    table = archive_table(year)
+    table.create(db.session.connection(), checkfirst=True)
+    hot = Attendance.__table__
+    in_year = (hot.c.date >= start_date) & (hot.c.date < end_date)
+    moved = db.session.execute(table.insert().from_select(
+        ['id', 'date', 'period', 'reason', 'status', 'student_id', 'teacher_id'],
+        select(hot.c.id, hot.c.date, hot.c.period, hot.c.reason, hot.c.status, hot.c.student_id, hot.c.teacher_id)
+        .where(in_year),
+    )).rowcount
+    db.session.execute(hot.delete().where(in_year))
+    db.session.add(AttendanceArchive(year=year, table_name=table.name, start_date=start_date,
+                                     end_date=end_date, row_count=moved))
+    db.session.commit()
+    return moved
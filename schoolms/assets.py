@@ -0,0 +1,156 @@
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+
+from flask import Blueprint, current_app, send_from_directory, url_for
+
+from .config import PROJECT_ROOT
+
+###############################################
+# حزم الأصول الثابتة المستضافة محلياً (بدلاً من CDN)
+###############################################
+# المصادر في static/vendor والحزم المبنية بأسماء ببصمة المحتوى في static/dist وتُخدم من /assets.
+# static/dist لا يُحفظ في المستودع: يبنيه gunicorn.conf.py عند تشغيل الخادم، أو أول طلب يحتاجه
+assets_bp = Blueprint('assets', __name__)
+
+ASSET_SOURCE_DIR = os.path.join(PROJECT_ROOT, 'static', 'vendor')
+ASSET_DIST_DIR = os.path.join(PROJECT_ROOT, 'static', 'dist')
+ASSET_MANIFEST = os.path.join(ASSET_DIST_DIR, 'manifest.json')
+_SOURCE_MAP_COMMENT = re.compile(rb'\n?(//# sourceMappingURL=\S+|/\*# sourceMappingURL=\S+ \*/)\s*$')
+_asset_manifest = None
+
+def _fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:10]
+
+def build_asset_bundles():
+    os.makedirs(ASSET_DIST_DIR, exist_ok=True)
+    manifest = {}
+    # الملفات المصدرية نسخ مصغّرة من المشاريع نفسها؛ الحزمة = دمجها بعد حذف تعليقات source map
+    for bundle, sources in current_app.config['ASSET_BUNDLES'].items():
+        parts = []
+        for source in sources:
+            with open(os.path.join(ASSET_SOURCE_DIR, source), 'rb') as handle:
+                parts.append(_SOURCE_MAP_COMMENT.sub(b'', handle.read()))
+        separator = b'\n' if bundle.endswith('.css') else b';\n'
+        data = separator.join(parts) + b'\n'
+        stem, extension = os.path.splitext(bundle)
+        name = f"{stem}.{_fingerprint(data)}{extension}"
+        with open(os.path.join(ASSET_DIST_DIR, name), 'wb') as output:
+            output.write(data)
+        manifest[bundle] = name
+    # المكتبات التي تحمّل ملفاتها بنفسها (مثل TinyMCE) تُنسخ كمجلد كامل ببصمة واحدة
+    for directory, source in current_app.config['ASSET_DIRECTORIES'].items():
+        source_dir = os.path.join(ASSET_SOURCE_DIR, source)
+        digest = hashlib.sha256()
+        paths = sorted(os.path.join(root, filename) for root, _, files in os.walk(source_dir) for filename in files)
+        for path in paths:
+            digest.update(os.path.relpath(path, source_dir).encode('utf-8'))
+            with open(path, 'rb') as handle:
+                digest.update(handle.read())
+        name = f"{directory}.{digest.hexdigest()[:10]}"
+        if not os.path.isdir(os.path.join(ASSET_DIST_DIR, name)):
+            shutil.copytree(source_dir, os.path.join(ASSET_DIST_DIR, name))
+        manifest[directory] = name
+    # حذف النسخ القديمة (مجلد مشتقات الصور يُدار بأمر build-images)
+    for name in os.listdir(ASSET_DIST_DIR):
+        path = os.path.join(ASSET_DIST_DIR, name)
+        if name in ('images', 'manifest.json') or name in manifest.values():
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    with open(ASSET_MANIFEST, 'w', encoding='utf-8') as output:
+        json.dump(manifest, output, indent=2, sort_keys=True)
+    return manifest
+
+def asset_manifest():
+    global _asset_manifest
+    if _asset_manifest is None:
+        try:
+            with open(ASSET_MANIFEST, encoding='utf-8') as source:
+                _asset_manifest = json.load(source)
+        except FileNotFoundError:
+            _asset_manifest = build_asset_bundles()
+    return _asset_manifest
+
+@assets_bp.app_template_global()
+def asset_url(name, path=None):
+    # asset_url('base.css') أو asset_url('tinymce', 'tinymce.min.js') لملف داخل مجلد
+    filename = asset_manifest()[name]
+    if path:
+        filename = f"{filename}/{path}"
+    return url_for('assets.asset', filename=filename)
+
+@assets_bp.route('/assets/<path:filename>')
+def asset(filename):
+    # الاسم يتغير مع المحتوى، لذا يمكن للمتصفح الاحتفاظ بالملف سنة كاملة دون إعادة تحقق
+    response = send_from_directory(ASSET_DIST_DIR, filename, max_age=31536000)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+###############################################
+# مشتقات الصور (WebP بأحجام متعددة وأسماء ببصمة المحتوى)
+###############################################
+# تُبنى بالأمر flask build-images في static/dist/images وتُخدم من /assets
+IMAGE_DIST_DIR = os.path.join(ASSET_DIST_DIR, 'images')
+IMAGE_MANIFEST = os.path.join(IMAGE_DIST_DIR, 'manifest.json')
+_image_manifest = None
+
+def build_image_derivatives():
+    from PIL import Image
+    os.makedirs(IMAGE_DIST_DIR, exist_ok=True)
+    manifest = {}
+    for filename, options in current_app.config['IMAGE_DERIVATIVES'].items():
+        with Image.open(os.path.join(current_app.static_folder, filename)) as source:
+            source = source.convert('RGBA' if source.mode in ('P', 'LA', 'RGBA') else 'RGB')
+            stem = os.path.splitext(filename)[0]
+            variants = {}
+            for width in options['widths']:
+                width = min(width, source.width)
+                height = round(source.height * width / source.width)
+                buffer = io.BytesIO()
+                source.resize((width, height), Image.LANCZOS).save(buffer, 'WEBP', quality=options['quality'], method=6)
+                data = buffer.getvalue()
+                name = f"{stem}.{width}.{hashlib.sha256(data).hexdigest()[:10]}.webp"
+                with open(os.path.join(IMAGE_DIST_DIR, name), 'wb') as output:
+                    output.write(data)
+                variants[str(width)] = name
+            manifest[filename] = variants
+    # حذف المشتقات القديمة التي لم تعد في البيان
+    current = {name for variants in manifest.values() for name in variants.values()}
+    for name in os.listdir(IMAGE_DIST_DIR):
+        if name.endswith('.webp') and name not in current:
+            os.remove(os.path.join(IMAGE_DIST_DIR, name))
+    with open(IMAGE_MANIFEST, 'w', encoding='utf-8') as output:
+        json.dump(manifest, output, indent=2, sort_keys=True)
+    return manifest
+
+def image_manifest():
+    global _image_manifest
+    if _image_manifest is None:
+        try:
+            with open(IMAGE_MANIFEST, encoding='utf-8') as source:
+                _image_manifest = json.load(source)
+        except FileNotFoundError:
+            _image_manifest = {}
+    return _image_manifest
+
+@assets_bp.app_template_global()
+def image_url(filename, width=None):
+    # بديل url_for('static', filename=...): أصغر مشتق لا يقل عرضه عن width، أو الأصل إن لم تُبنَ المشتقات
+    variants = image_manifest().get(filename)
+    if not variants:
+        return url_for('static', filename=filename)
+    widths = sorted(int(w) for w in variants)
+    chosen = next((w for w in widths if width and w >= width), widths[-1])
+    return url_for('assets.asset', filename='images/' + variants[str(chosen)])
+
+@assets_bp.app_template_global()
+def image_srcset(filename):
+    variants = image_manifest().get(filename, {})
+    return ', '.join(f"{url_for('assets.asset', filename='images/' + name)} {width}w"
+                     for width, name in sorted(variants.items(), key=lambda item: int(item[0])))
@@ -0,0 +1,21 @@
+def register_blueprints(app):
+    # وحدات النظام تُستورد عند إنشاء التطبيق لا عند استيراد الحزمة
+    from .attendance import attendance_bp
+    from .communication import communication_bp
+    from .finance import finance_bp
+    from .library import library_bp
+    from .main import main_bp
+    from .report import report_bp
+    from .schedule import schedule_bp
+    from .student import student_bp
+    from .teacher import teacher_bp
+
+    app.register_blueprint(main_bp)
+    app.register_blueprint(student_bp)
+    app.register_blueprint(teacher_bp)
+    app.register_blueprint(attendance_bp)
+    app.register_blueprint(schedule_bp)
+    app.register_blueprint(communication_bp)
+    app.register_blueprint(library_bp)
+    app.register_blueprint(finance_bp)
+    app.register_blueprint(report_bp)
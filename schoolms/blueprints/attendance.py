@@ -0,0 +1,694 @@
+import logging
+from datetime import date, datetime
+
+from flask import Blueprint, current_app, flash, jsonify, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import func, select, tuple_
+
+from ..archive import attendance_source, ensure_not_archived
+from ..caching import cache
+from ..database import read_only
+from ..early_warning import compute_absence_alerts
+from ..exports import can_export, export_response
+from ..extensions import db
+from ..models import ALL_PERIODS, Attendance, AttendanceCube, ClassDailyAttendance, Student, Teacher
+from ..rollups import class_term_stats, record_roll_call, save_attendance_batch
+from ..templating import templates
+
+logger = logging.getLogger(__name__)
+
+# (3) وحدة إدارة الحضور والغياب
+attendance_bp = Blueprint('attendance', __name__, url_prefix='/attendance')
+
+STAGES = ['first', 'second', 'third']
+SECTIONS = ['A', 'B', 'C', 'D']
+
+def parse_date_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+templates['attendance/add_attendance.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>إضافة سجل حضور/غياب</h2>
+    <form method="post">
+      <div class="form-group">
+        <label>نوع السجل</label>
+        <select name="record_type" class="form-control" required>
+          <option value="student">طالب</option>
+          <option value="teacher">مدرس</option>
+        </select>
+      </div>
+      <div class="form-group">
+        <label>التاريخ</label>
+        <input type="date" name="date" class="form-control" value="{{ request.args.get('current_date', date.today().strftime('%Y-%m-%d')) }}">
+      </div>
+      <div class="form-group">
+        <label>الحصة</label>
+        <input type="text" name="period" class="form-control">
+      </div>
+      <div class="form-group">
+        <label>سبب الغياب (إن وجد)</label>
+        <input type="text" name="reason" class="form-control">
+      </div>
+      <div class="form-group">
+        <label>الحالة</label>
+        <select name="status" class="form-control" required>
+          <option value="present">حاضر</option>
+          <option value="absent">غائب</option>
+        </select>
+      </div>
+      <div class="form-group" id="student_select">
+        <label>الطالب</label>
+        <select name="student_id" class="form-control">
+          {% for student in students %}
+          <option value="{{ student.id }}">{{ student.full_name }} - {{ student.stage }} - {{ student.section }}</option>
+          {% endfor %}
+        </select>
+      </div>
+      <div class="form-group" id="teacher_select" style="display:none;">
+        <label>المدرس</label>
+        <select name="teacher_id" class="form-control">
+          {% for teacher in teachers %}
+          <option value="{{ teacher.id }}">{{ teacher.full_name }}</option>
+          {% endfor %}
+        </select>
+      </div>
+      <button type="submit" class="btn btn-primary">إضافة السجل</button>
+    </form>
+    <script>
+      document.querySelector('select[name="record_type"]').addEventListener('change', function() {
+        if(this.value === 'student'){
+          document.getElementById('student_select').style.display = 'block';
+          document.getElementById('teacher_select').style.display = 'none';
+        } else {
+          document.getElementById('student_select').style.display = 'none';
+          document.getElementById('teacher_select').style.display = 'block';
+        }
+      });
+    </script>
+    {% endblock %}
+    """
+
+@attendance_bp.route('/add', methods=['GET', 'POST'])
+@login_required
+def add_attendance():
+    if current_user.role not in ['admin', 'teacher']:
+        flash("غير مسموح بالدخول", "danger")
+        return redirect(url_for('main.index'))
+    if request.method == 'POST':
+        try:
+            record_type = request.form['record_type']
+            date_str = request.form.get('date', date.today().strftime('%Y-%m-%d'))
+            attendance_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+            period = request.form.get('period', '')
+            reason = request.form.get('reason', '')
+            status = request.form['status']
+            if record_type == 'student':
+                student_id = int(request.form['student_id'])
+                save_attendance_batch([{
+                    'date': attendance_date,
+                    'period': period,
+                    'reason': reason,
+                    'status': status,
+                    'student_id': student_id
+                }])
+            else:
+                teacher_id = int(request.form['teacher_id'])
+                ensure_not_archived([attendance_date])
+                new_record = Attendance(
+                    date=attendance_date,
+                    period=period,
+                    reason=reason,
+                    status=status,
+                    teacher_id=teacher_id
+                )
+                db.session.add(new_record)
+            db.session.commit()
+            flash("تم إضافة سجل الحضور/الغياب بنجاح", "success")
+            logger.info("تم إضافة سجل حضور/غياب")
+            return redirect(url_for('attendance.list'))
+        except Exception as e:
+            logger.error("خطأ في إضافة سجل الحضور: " + str(e))
+            flash("حدث خطأ أثناء إضافة سجل الحضور/الغياب", "danger")
+    students = Student.query.all()
+    teachers = Teacher.query.all()
+    return render_template('attendance/add_attendance.html', students=students, teachers=teachers, date=date)
+
+ATTENDANCE_PAGE_SIZE = 50
+
+def filtered_attendance_source(args):
+    # تحويل معاملات الطلب إلى مصدر البيانات (مع الأرشيف عند الحاجة) وشروط عليه
+    start_date = parse_date_arg('from')
+    end_date = parse_date_arg('to')
+    source = attendance_source(start_date, end_date)
+    conditions = []
+    if start_date:
+        conditions.append(source.c.date >= start_date)
+    if end_date:
+        conditions.append(source.c.date <= end_date)
+    if args.get('status') in ('present', 'absent'):
+        conditions.append(source.c.status == args['status'])
+    if args.get('student_id', type=int):
+        conditions.append(source.c.student_id == args.get('student_id', type=int))
+    if args.get('teacher_id', type=int):
+        conditions.append(source.c.teacher_id == args.get('teacher_id', type=int))
+    if args.get('stage') or args.get('section'):
+        class_students = select(Student.id)
+        if args.get('stage'):
+            class_students = class_students.where(Student.stage == args['stage'])
+        if args.get('section'):
+            class_students = class_students.where(Student.section == args['section'])
+        conditions.append(source.c.student_id.in_(class_students))
+    return source, conditions
+
+def parse_cursor(value):
+    # المؤشر بالشكل YYYY-MM-DD_id ويشير إلى آخر سجل في الصفحة السابقة
+    try:
+        day, record_id = value.split('_')
+        return datetime.strptime(day, '%Y-%m-%d').date(), int(record_id)
+    except (AttributeError, ValueError):
+        return None
+
+def names_by_id(model, ids):
+    # تحميل الأسماء دفعة واحدة بدلاً من تحميل كل علاقة على حدة
+    ids = {i for i in ids if i}
+    if not ids:
+        return {}
+    return dict(db.session.query(model.id, model.full_name).filter(model.id.in_(ids)))
+
+templates['attendance/list.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>سجلات الحضور والغياب</h2>
+    {% if current_user.role in ['admin', 'responsible'] %}
+    <p>
+      <a href="{{ url_for('attendance.export_attendance', fmt='csv', **filters) }}" class="btn btn-sm btn-outline-secondary">تصدير CSV</a>
+      <a href="{{ url_for('attendance.export_attendance', fmt='xlsx', **filters) }}" class="btn btn-sm btn-outline-success">تصدير Excel</a>
+    </p>
+    {% endif %}
+    <form method="get" class="form-inline mb-3">
+      <input type="date" name="from" class="form-control mr-2" value="{{ request.args.get('from', '') }}">
+      <input type="date" name="to" class="form-control mr-2" value="{{ request.args.get('to', '') }}">
+      <select name="stage" class="form-control mr-2">
+        <option value="">كل المراحل</option>
+        {% for st in stages %}
+        <option value="{{ st }}" {% if request.args.get('stage') == st %}selected{% endif %}>{{ st }}</option>
+        {% endfor %}
+      </select>
+      <select name="section" class="form-control mr-2">
+        <option value="">كل الشعب</option>
+        {% for sec in sections %}
+        <option value="{{ sec }}" {% if request.args.get('section') == sec %}selected{% endif %}>{{ sec }}</option>
+        {% endfor %}
+      </select>
+      <select name="status" class="form-control mr-2">
+        <option value="">كل الحالات</option>
+        <option value="present" {% if request.args.get('status') == 'present' %}selected{% endif %}>حاضر</option>
+        <option value="absent" {% if request.args.get('status') == 'absent' %}selected{% endif %}>غائب</option>
+      </select>
+      {% if request.args.get('student_id') %}<input type="hidden" name="student_id" value="{{ request.args.get('student_id') }}">{% endif %}
+      {% if request.args.get('teacher_id') %}<input type="hidden" name="teacher_id" value="{{ request.args.get('teacher_id') }}">{% endif %}
+      <button type="submit" class="btn btn-info mr-2">تصفية</button>
+      <a href="{{ url_for('attendance.list') }}" class="btn btn-secondary">إلغاء التصفية</a>
+    </form>
+    <p class="text-muted">سجلات السنوات الدراسية المؤرشفة تظهر عند تحديد نطاق تاريخ يشملها.</p>
+    <table class="table">
+      <thead>
+        <tr>
+          <th>التاريخ</th>
+          <th>الحصة</th>
+          <th>السبب</th>
+          <th>الحالة</th>
+          <th>الطالب/المدرس</th>
+        </tr>
+      </thead>
+      <tbody>
+        {% for record in records %}
+        <tr>
+          <td>{{ record.date }}</td>
+          <td>{{ record.period }}</td>
+          <td>{{ record.reason }}</td>
+          <td>{{ record.status }}</td>
+          <td>
+            {% if record.student_id %}
+              <a href="{{ url_for('attendance.list', student_id=record.student_id) }}">{{ student_names.get(record.student_id, '') }}</a>
+            {% elif record.teacher_id %}
+              <a href="{{ url_for('attendance.list', teacher_id=record.teacher_id) }}">{{ teacher_names.get(record.teacher_id, '') }}</a>
+            {% endif %}
+          </td>
+        </tr>
+        {% endfor %}
+      </tbody>
+    </table>
+    <nav>
+      {% if request.args.get('cursor') %}
+      <a href="{{ url_for('attendance.list', **filters) }}" class="btn btn-outline-secondary">الصفحة الأولى</a>
+      {% endif %}
+      {% if next_cursor %}
+      <a href="{{ url_for('attendance.list', cursor=next_cursor, **filters) }}" class="btn btn-outline-primary">الصفحة التالية</a>
+      {% endif %}
+    </nav>
+    {% endblock %}
+    """
+
+@attendance_bp.route('/list')
+@login_required
+@read_only
+def list():
+    source, conditions = filtered_attendance_source(request.args)
+    query = select(
+        source.c.id, source.c.date, source.c.period, source.c.reason,
+        source.c.status, source.c.student_id, source.c.teacher_id,
+    ).where(*conditions)
+    cursor = parse_cursor(request.args.get('cursor'))
+    if cursor:
+        query = query.where(tuple_(source.c.date, source.c.id) < cursor)
+    query = query.order_by(source.c.date.desc(), source.c.id.desc()).limit(ATTENDANCE_PAGE_SIZE + 1)
+    records = db.session.execute(query).all()
+    next_cursor = None
+    if len(records) > ATTENDANCE_PAGE_SIZE:
+        records = records[:ATTENDANCE_PAGE_SIZE]
+        next_cursor = f"{records[-1].date:%Y-%m-%d}_{records[-1].id}"
+    student_names = names_by_id(Student, (r.student_id for r in records))
+    teacher_names = names_by_id(Teacher, (r.teacher_id for r in records))
+    filters = {k: v for k, v in request.args.items() if k != 'cursor' and v}
+    return render_template('attendance/list.html', records=records, student_names=student_names, teacher_names=teacher_names,
+       next_cursor=next_cursor, filters=filters, stages=STAGES, sections=SECTIONS)
+
+@attendance_bp.route('/export.<any(csv, xlsx):fmt>')
+@login_required
+def export_attendance(fmt):
+    if not can_export():
+        flash("غير مسموح بالدخول", "danger")
+        return redirect(url_for('main.index'))
+    # الأسماء تأتي من الربط في نفس الاستعلام المتدفق وليس من تحميل العلاقات
+    source, conditions = filtered_attendance_source(request.args)
+    query = select(
+        source.c.date, source.c.period, source.c.reason, source.c.status,
+        func.coalesce(Student.full_name, Teacher.full_name),
+    ).select_from(source).outerjoin(Student, source.c.student_id == Student.id).outerjoin(
+        Teacher, source.c.teacher_id == Teacher.id
+    ).where(*conditions).order_by(source.c.date, source.c.id)
+    header = ['التاريخ', 'الحصة', 'السبب', 'الحالة', 'الطالب/المدرس']
+    return export_response(fmt, 'attendance', header, query)
+
+# إضافة تسجيل الغيابات الأسبوعية لكل مرحلة وشعبة
+templates['attendance/weekly_attendance.html'] = """
+        {% extends "base.html" %}
+        {% block content %}
+        <h2>تسجيل الغيابات الأسبوعية</h2>
+        <form method="get" action="{{ url_for('attendance.weekly_attendance') }}">
+          <div class="form-group">
+            <label>المرحلة</label>
+            <select name="stage" class="form-control" required>
+              <option value="first" {% if request.args.get('stage')=='first' %}selected{% endif %}>المرحلة الأولى</option>
+              <option value="second" {% if request.args.get('stage')=='second' %}selected{% endif %}>المرحلة الثانية</option>
+              <option value="third" {% if request.args.get('stage')=='third' %}selected{% endif %}>المرحلة الثالثة</option>
+            </select>
+          </div>
+          <div class="form-group">
+            <label>الشعبة</label>
+            <select name="section" class="form-control" required>
+              <option value="A" {% if request.args.get('section')=='A' %}selected{% endif %}>أ</option>
+              <option value="B" {% if request.args.get('section')=='B' %}selected{% endif %}>ب</option>
+              <option value="C" {% if request.args.get('section')=='C' %}selected{% endif %}>ج</option>
+              <option value="D" {% if request.args.get('section')=='D' %}selected{% endif %}>د</option>
+            </select>
+          </div>
+          <div class="form-group">
+            <label>تاريخ الأسبوع (بداية الأسبوع)</label>
+            <input type="date" name="week_date" class="form-control" value="{{ request.args.get('week_date','') }}" required>
+          </div>
+          <div class="form-group">
+            <label>الحصة</label>
+            <input type="text" name="period" class="form-control" value="{{ period }}">
+          </div>
+          <button type="submit" class="btn btn-info">عرض الطلاب</button>
+        </form>
+        {% if students %}
+        <hr>
+        <form method="post" action="{{ url_for('attendance.weekly_attendance') }}">
+          <input type="hidden" name="stage" value="{{ request.args.get('stage') }}">
+          <input type="hidden" name="section" value="{{ request.args.get('section') }}">
+          <input type="hidden" name="week_date" value="{{ request.args.get('week_date') }}">
+          <input type="hidden" name="period" value="{{ period }}">
+          <table class="table">
+            <thead>
+              <tr>
+                <th>اختر الغياب</th>
+                <th>اسم الطالب</th>
+              </tr>
+            </thead>
+            <tbody>
+              {% for student in students %}
+              <tr>
+                <td><input type="checkbox" name="absent" value="{{ student.id }}" {% if student.id in absent_ids %}checked{% endif %}></td>
+                <td>{{ student.full_name }}</td>
+              </tr>
+              {% endfor %}
+            </tbody>
+          </table>
+          <p class="text-muted">الطلاب غير المحددين يُسجَّلون حاضرين.</p>
+          <button type="submit" class="btn btn-primary">تسجيل الغيابات</button>
+        </form>
+        {% endif %}
+        {% endblock %}
+        """
+
+@attendance_bp.route('/weekly', methods=['GET', 'POST'])
+@login_required
+def weekly_attendance():
+    if current_user.role not in ['admin', 'teacher']:
+        flash("غير مسموح بالدخول", "danger")
+        return redirect(url_for('main.index'))
+    if request.method == 'POST':
+        stage = request.form.get('stage')
+        section = request.form.get('section')
+        week_date_str = request.form.get('week_date')
+        period = request.form.get('period') or "أسبوعي"
+        absence_ids = request.form.getlist('absent')
+        week_date = datetime.strptime(week_date_str, '%Y-%m-%d').date()
+        try:
+            result = record_roll_call(stage, section, week_date, period, absence_ids)
+        except ValueError as e:
+            db.session.rollback()
+            flash(str(e), "danger")
+            return redirect(url_for('attendance.weekly_attendance', stage=stage, section=section, week_date=week_date_str))
+        except Exception as e:
+            db.session.rollback()
+            logger.error("خطأ في تسجيل الغيابات الأسبوعية: " + str(e))
+            flash("حدث خطأ أثناء تسجيل الغيابات", "danger")
+            return redirect(url_for('attendance.weekly_attendance', stage=stage, section=section, week_date=week_date_str))
+        logger.info(f"تسجيل حضور الشعبة {stage}-{section}: {result}")
+        flash("تم تسجيل الغيابات الأسبوعية", "success")
+        return redirect(url_for('attendance.list'))
+    else:
+        stage = request.args.get('stage')
+        section = request.args.get('section')
+        week_date = request.args.get('week_date')
+        period = request.args.get('period') or "أسبوعي"
+        students = []
+        absent_ids = set()
+        if stage and section and week_date:
+            students = Student.query.filter_by(stage=stage, section=section).all()
+            try:
+                day = datetime.strptime(week_date, '%Y-%m-%d').date()
+            except ValueError:
+                day = None
+            if day and students:
+                # إظهار الغيابات المسجلة مسبقاً حتى تكون إعادة الإرسال تعديلاً لا تكراراً
+                absent_ids = {sid for (sid,) in db.session.query(Attendance.student_id).filter(
+                    Attendance.date == day,
+                    Attendance.period == period,
+                    Attendance.status == 'absent',
+                    Attendance.student_id.in_([st.id for st in students]),
+                )}
+        return render_template('attendance/weekly_attendance.html', students=students, period=period, absent_ids=absent_ids)
+
+# نقطة تسجيل حضور الشعبة دفعة واحدة (JSON) للتطبيقات والأجهزة
+@attendance_bp.route('/rollcall', methods=['POST'])
+@login_required
+def roll_call():
+    if current_user.role not in ['admin', 'teacher']:
+        return jsonify({"error": "غير مسموح بالدخول"}), 403
+    payload = request.get_json(silent=True) or {}
+    try:
+        stage = payload['stage']
+        section = payload['section']
+        day = datetime.strptime(payload.get('date') or date.today().strftime('%Y-%m-%d'), '%Y-%m-%d').date()
+        period = payload.get('period') or "أسبوعي"
+        absent_ids = [int(sid) for sid in payload.get('absent', [])]
+        reasons = {int(sid): reason for sid, reason in (payload.get('reasons') or {}).items()}
+    except (KeyError, ValueError, TypeError):
+        return jsonify({"error": "بيانات غير صالحة"}), 400
+    try:
+        result = record_roll_call(stage, section, day, period, absent_ids, reasons)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error("خطأ في تسجيل حضور الشعبة: " + str(e))
+        return jsonify({"error": "حدث خطأ أثناء تسجيل الحضور"}), 500
+    return jsonify(result)
+
+# تسجيل مسح فردي (بوابة الدخول أو تطبيق المعلم): الكتابة تُجمَّع مع المسحات المتزامنة في commit واحد،
+# والاستجابة لا تُرسل إلا بعد أن تُكتب الدفعة على القرص
+@attendance_bp.route('/scan', methods=['POST'])
+@login_required
+def scan():
+    if current_user.role not in ['admin', 'teacher']:
+        return jsonify({"error": "غير مسموح بالدخول"}), 403
+    payload = request.get_json(silent=True) or {}
+    try:
+        record = {
+            'date': datetime.strptime(payload.get('date') or date.today().strftime('%Y-%m-%d'), '%Y-%m-%d').date(),
+            'period': payload.get('period') or current_app.config['ATTENDANCE_SCAN_PERIOD'],
+            'reason': payload.get('reason') or '',
+            'status': payload.get('status') or 'present',
+            'student_id': int(payload['student_id']),
+        }
+    except (KeyError, ValueError, TypeError):
+        return jsonify({"error": "بيانات غير صالحة"}), 400
+    if record['status'] not in ('present', 'absent'):
+        return jsonify({"error": "بيانات غير صالحة"}), 400
+    coalescer = current_app.extensions['write_coalescers']['attendance_scans']
+    try:
+        result = coalescer.submit(record).result(timeout=current_app.config['ATTENDANCE_SCAN_TIMEOUT'])
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except TimeoutError:
+        # قد تُكتب الدفعة لاحقاً؛ إعادة المسح آمنة لأن الكتابة upsert على (التاريخ، الحصة، الطالب)
+        logger.error("انتهت مهلة تأكيد المسح للطالب %s", record['student_id'])
+        return jsonify({"error": "لم يتم تأكيد التسجيل، أعد المحاولة"}), 503
+    except Exception as e:
+        logger.error("خطأ في تسجيل المسح: " + str(e))
+        return jsonify({"error": "حدث خطأ أثناء تسجيل الحضور"}), 500
+    return jsonify(result)
+
+###############################################
+# طبقة تجميع إحصائيات الغياب (تخدم صفحة المخططات وواجهة JSON)
+###############################################
+def absence_stats_by_class(start_date=None, end_date=None):
+    # القراءة من جدول التجميع اليومي: التكلفة تتناسب مع عدد المجموعات لا عدد سجلات الحضور
+    query = db.session.query(
+        ClassDailyAttendance.stage,
+        ClassDailyAttendance.section,
+        func.sum(ClassDailyAttendance.present + ClassDailyAttendance.absent),
+        func.sum(ClassDailyAttendance.absent),
+    )
+    if start_date:
+        query = query.filter(ClassDailyAttendance.date >= start_date)
+    if end_date:
+        query = query.filter(ClassDailyAttendance.date <= end_date)
+    totals = {
+        (stage, section): (records, absences)
+        for stage, section, records, absences in query.group_by(ClassDailyAttendance.stage, ClassDailyAttendance.section)
+    }
+    student_counts = dict(
+        ((stage, section), count)
+        for stage, section, count in db.session.query(Student.stage, Student.section, func.count(Student.id))
+        .group_by(Student.stage, Student.section)
+    )
+    data = []
+    for st in STAGES:
+        for sec in SECTIONS:
+            records, absences = totals.get((st, sec), (0, 0))
+            students = student_counts.get((st, sec), 0)
+            # النسبة = الغيابات / عدد سجلات الحضور (وليس عدد الطلاب)
+            percentage = round(absences / records * 100, 2) if records > 0 else 0
+            data.append({"stage": st, "section": sec, "students": students, "records": records,
+                         "absences": absences, "percentage": percentage})
+    return data
+
+@attendance_bp.route('/charts/data')
+@login_required
+@read_only
+def charts_data():
+    start_date, end_date = parse_date_arg('from'), parse_date_arg('to')
+    data = cache.get_or_set(f"attendance.charts_data:{start_date}:{end_date}", ['class_daily_attendance', 'student'],
+                            lambda: absence_stats_by_class(start_date, end_date))
+    return jsonify(data)
+
+ANALYTICS_GRAINS = {
+    'day': AttendanceCube.date,
+    'week': AttendanceCube.week,
+    'month': AttendanceCube.month,
+    'weekday': AttendanceCube.weekday,
+}
+ANALYTICS_DIMENSIONS = {
+    'stage': AttendanceCube.stage,
+    'section': AttendanceCube.section,
+    'period': AttendanceCube.period,
+}
+
+def attendance_trends(grain='month', by=(), filters=None, start_date=None, end_date=None):
+    # تجميع من المكعب: التكلفة تتناسب مع عدد صفوف المكعب في المدى المطلوب
+    filters = filters or {}
+    time_column = ANALYTICS_GRAINS[grain]
+    dimensions = [ANALYTICS_DIMENSIONS[name] for name in by]
+    query = select(
+        time_column, *dimensions,
+        func.sum(AttendanceCube.present), func.sum(AttendanceCube.absent),
+    )
+    for name, value in filters.items():
+        query = query.where(ANALYTICS_DIMENSIONS[name] == value)
+    if 'period' in by or 'period' in filters:
+        query = query.where(AttendanceCube.period != ALL_PERIODS)
+    else:
+        query = query.where(AttendanceCube.period == ALL_PERIODS)
+    if start_date:
+        query = query.where(AttendanceCube.date >= start_date)
+    if end_date:
+        query = query.where(AttendanceCube.date <= end_date)
+    query = query.group_by(time_column, *dimensions).order_by(*dimensions, time_column)
+    series = {}
+    for row in db.session.execute(query):
+        bucket, keys, (present, absent) = row[0], row[1:-2], row[-2:]
+        total = present + absent
+        series.setdefault(tuple(keys), []).append({
+            't': bucket.isoformat() if isinstance(bucket, date) else bucket,
+            'present': present,
+            'absent': absent,
+            'rate': round(absent / total * 100, 2) if total else 0,
+        })
+    return [{'key': dict(zip(by, keys)), 'points': points} for keys, points in series.items()]
+
+@attendance_bp.route('/analytics')
+@login_required
+@read_only
+def analytics():
+    grain = request.args.get('grain', 'month')
+    by = [name for name in request.args.get('by', '').split(',') if name]
+    if grain not in ANALYTICS_GRAINS or any(name not in ANALYTICS_DIMENSIONS for name in by):
+        return jsonify({"error": "معاملات غير صالحة"}), 400
+    filters = {name: request.args[name] for name in ANALYTICS_DIMENSIONS if request.args.get(name)}
+    series = attendance_trends(grain, by, filters, parse_date_arg('from'), parse_date_arg('to'))
+    return jsonify({'grain': grain, 'by': by, 'filters': filters, 'series': series})
+
+@attendance_bp.route('/early-warning')
+@login_required
+@read_only
+def early_warning():
+    if current_user.role not in ['admin', 'responsible', 'teacher']:
+        return jsonify({"error": "غير مسموح بالدخول"}), 403
+    as_of = parse_date_arg('as_of') or date.today()
+    alerts = compute_absence_alerts(as_of)
+    names = names_by_id(Student, (a['student_id'] for a in alerts))
+    for alert in alerts:
+        alert['full_name'] = names.get(alert['student_id'], '')
+        alert['as_of'] = alert['as_of'].isoformat()
+    return jsonify({'as_of': as_of.isoformat(), 'thresholds': current_app.config['EARLY_WARNING_THRESHOLDS'],
+                    'alerts': alerts})
+
+@attendance_bp.route('/bitmap/class')
+@login_required
+@read_only
+def class_bitmap():
+    stage = request.args.get('stage')
+    section = request.args.get('section')
+    if stage not in STAGES or section not in SECTIONS:
+        return jsonify({"error": "معاملات غير صالحة"}), 400
+    return jsonify(class_term_stats(stage, section, request.args.get('term')))
+
+# عرض المخططات البيانية لنسبة الغياب لكل مرحلة وشعبة (البيانات تُجلب من واجهات JSON)
+templates['attendance/charts.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>مخططات نسبة الغياب لكل مرحلة وشعبة</h2>
+    <canvas id="absenceChart" width="800" height="400"></canvas>
+    <h3 class="mt-4">اتجاهات الغياب</h3>
+    <form id="trendForm" class="form-inline mb-3">
+      <select name="grain" class="form-control mr-2">
+        <option value="day">يومي</option>
+        <option value="week">أسبوعي</option>
+        <option value="month" selected>شهري</option>
+        <option value="weekday">حسب أيام الأسبوع</option>
+      </select>
+      <select name="by" class="form-control mr-2">
+        <option value="">كل المدرسة</option>
+        <option value="stage">حسب المرحلة</option>
+        <option value="stage,section">حسب المرحلة والشعبة</option>
+        <option value="period">حسب الحصة</option>
+      </select>
+      <select name="stage" class="form-control mr-2">
+        <option value="">كل المراحل</option>
+        {% for st in stages %}<option value="{{ st }}">{{ st }}</option>{% endfor %}
+      </select>
+      <select name="section" class="form-control mr-2">
+        <option value="">كل الشعب</option>
+        {% for sec in sections %}<option value="{{ sec }}">{{ sec }}</option>{% endfor %}
+      </select>
+      <input type="date" name="from" class="form-control mr-2">
+      <input type="date" name="to" class="form-control mr-2">
+      <button type="submit" class="btn btn-info">عرض</button>
+    </form>
+    <canvas id="trendChart" width="800" height="400"></canvas>
+    <script src="{{ asset_url('charts.js') }}"></script>
+    <script>
+      var classUrl = "{{ url_for('attendance.charts_data') }}";
+      var trendUrl = "{{ url_for('attendance.analytics') }}";
+      var weekdays = ['الإثنين', 'الثلاثاء', 'الأربعاء', 'الخميس', 'الجمعة', 'السبت', 'الأحد'];
+      fetch(classUrl).then(function(r) { return r.json(); }).then(function(data) {
+        new Chart(document.getElementById('absenceChart').getContext('2d'), {
+          type: 'bar',
+          data: {
+            labels: data.map(function(item) { return item.stage + '-' + item.section; }),
+            datasets: [{
+              label: 'نسبة الغياب (%)',
+              data: data.map(function(item) { return item.percentage; }),
+              backgroundColor: 'rgba(255, 99, 132, 0.7)',
+              borderColor: 'rgba(255, 99, 132, 1)',
+              borderWidth: 1
+            }]
+          },
+          options: { scales: { y: { beginAtZero: true, max: 100 } } }
+        });
+      });
+      var trendChart = null;
+      function loadTrends() {
+        var params = new URLSearchParams();
+        new FormData(document.getElementById('trendForm')).forEach(function(value, key) {
+          if (value) { params.append(key, value); }
+        });
+        fetch(trendUrl + '?' + params.toString()).then(function(r) { return r.json(); }).then(function(result) {
+          var labels = [];
+          result.series.forEach(function(s) {
+            s.points.forEach(function(p) { if (labels.indexOf(p.t) < 0) { labels.push(p.t); } });
+          });
+          labels.sort();
+          var datasets = result.series.map(function(s) {
+            var rates = {};
+            s.points.forEach(function(p) { rates[p.t] = p.rate; });
+            var name = Object.values(s.key).join('-') || 'نسبة الغياب (%)';
+            return { label: name, data: labels.map(function(t) { return rates[t] === undefined ? null : rates[t]; }), fill: false };
+          });
+          if (result.grain === 'weekday') {
+            labels = labels.map(function(t) { return weekdays[t]; });
+          }
+          if (trendChart) { trendChart.destroy(); }
+          trendChart = new Chart(document.getElementById('trendChart').getContext('2d'), {
+            type: 'line',
+            data: { labels: labels, datasets: datasets },
+            options: { scales: { y: { beginAtZero: true, max: 100 } } }
+          });
+        });
+      }
+      document.getElementById('trendForm').addEventListener('submit', function(e) { e.preventDefault(); loadTrends(); });
+      loadTrends();
+    </script>
+    {% endblock %}
+    """
+
+@attendance_bp.route('/charts')
+@login_required
+def charts():
+    return render_template('attendance/charts.html', stages=STAGES, sections=SECTIONS)
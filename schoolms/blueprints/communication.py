@@ -0,0 +1,100 @@
+import logging
+
+from flask import Blueprint, flash, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+
+from ..caching import conditional_get
+from ..database import read_only
+from ..extensions import db
+from ..models import Message, Notification, User
+from ..templating import templates
+
+logger = logging.getLogger(__name__)
+
+# (5) وحدة التواصل والإشعارات
+communication_bp = Blueprint('communication', __name__, url_prefix='/communication')
+
+templates['communication/notifications.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>الإشعارات</h2>
+    <ul class="list-group">
+      {% for note in notes %}
+      <li class="list-group-item">
+        <strong>{{ note.title }}</strong> - {{ note.message }} <em>{{ note.created_at }}</em>
+      </li>
+      {% endfor %}
+    </ul>
+    {% endblock %}
+    """
+
+@communication_bp.route('/notifications')
+@login_required
+@read_only
+@conditional_get('notification')
+def notifications():
+    notes = Notification.query.filter_by(user_id=current_user.id).order_by(Notification.created_at.desc()).all()
+    return render_template('communication/notifications.html', notes=notes)
+
+templates['communication/send_message.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>إرسال رسالة</h2>
+    <form method="post">
+      <div class="form-group">
+        <label>المستقبل</label>
+        <select name="receiver_id" class="form-control">
+          {% for user in users %}
+          <option value="{{ user.id }}">{{ user.username }} ({{ user.role }})</option>
+          {% endfor %}
+        </select>
+      </div>
+      <div class="form-group">
+        <label>نص الرسالة</label>
+        <textarea name="content" class="form-control"></textarea>
+      </div>
+      <button type="submit" class="btn btn-primary">إرسال الرسالة</button>
+    </form>
+    {% endblock %}
+    """
+
+@communication_bp.route('/message/send', methods=['GET', 'POST'])
+@login_required
+def send_message():
+    if request.method == 'POST':
+        try:
+            receiver_id = int(request.form['receiver_id'])
+            content = request.form['content']
+            new_message = Message(sender_id=current_user.id, receiver_id=receiver_id, content=content)
+            db.session.add(new_message)
+            db.session.commit()
+            flash("تم إرسال الرسالة بنجاح", "success")
+            logger.info("تم إرسال رسالة")
+            return redirect(url_for('communication.inbox'))
+        except Exception as e:
+            logger.error("خطأ في إرسال الرسالة: " + str(e))
+            flash("حدث خطأ أثناء إرسال الرسالة", "danger")
+    users = User.query.filter(User.id != current_user.id).all()
+    return render_template('communication/send_message.html', users=users)
+
+templates['communication/inbox.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>صندوق الوارد</h2>
+    <ul class="list-group">
+      {% for msg in msgs %}
+      <li class="list-group-item">
+        <strong>من: {{ msg.sender_id }}</strong> - {{ msg.content }} <em>{{ msg.timestamp }}</em>
+      </li>
+      {% endfor %}
+    </ul>
+    {% endblock %}
+    """
+
+@communication_bp.route('/inbox')
+@login_required
+@read_only
+@conditional_get('message')
+def inbox():
+    msgs = Message.query.filter_by(receiver_id=current_user.id).order_by(Message.timestamp.desc()).all()
+    return render_template('communication/inbox.html', msgs=msgs)
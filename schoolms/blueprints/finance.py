@@ -0,0 +1,127 @@
+import logging
+
+from flask import Blueprint, flash, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from ..database import read_only
+from ..exports import can_export, export_response
+from ..extensions import db
+from ..models import Fee, Student
+from ..templating import templates
+
+logger = logging.getLogger(__name__)
+
+# (7) وحدة إدارة الرسوم والمحاسبة
+finance_bp = Blueprint('finance', __name__, url_prefix='/finance')
+
+templates['finance/add_fee.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>إضافة سجل رسوم</h2>
+    <form method="post">
+      <div class="form-group">
+        <label>الطالب</label>
+        <select name="student_id" class="form-control">
+          {% for student in students %}
+          <option value="{{ student.id }}">{{ student.full_name }}</option>
+          {% endfor %}
+        </select>
+      </div>
+      <div class="form-group">
+        <label>المبلغ</label>
+        <input type="number" step="0.01" name="amount" class="form-control" required>
+      </div>
+      <div class="form-group">
+        <label>الحالة</label>
+        <select name="status" class="form-control" required>
+          <option value="paid">مدفوع</option>
+          <option value="unpaid">غير مدفوع</option>
+        </select>
+      </div>
+      <div class="form-group">
+        <label>تفاصيل الفاتورة</label>
+        <textarea name="invoice_details" class="form-control"></textarea>
+      </div>
+      <button type="submit" class="btn btn-primary">إضافة سجل الرسوم</button>
+    </form>
+    {% endblock %}
+    """
+
+@finance_bp.route('/add', methods=['GET', 'POST'])
+@login_required
+def add_fee():
+    if current_user.role != 'admin':
+        flash("غير مسموح بالدخول", "danger")
+        return redirect(url_for('main.index'))
+    if request.method == 'POST':
+        try:
+            student_id = int(request.form['student_id'])
+            amount = float(request.form['amount'])
+            status = request.form['status']
+            invoice_details = request.form.get('invoice_details', '')
+            new_fee = Fee(student_id=student_id, amount=amount, status=status, invoice_details=invoice_details)
+            db.session.add(new_fee)
+            db.session.commit()
+            flash("تم إضافة سجل الرسوم بنجاح", "success")
+            logger.info("تم إضافة سجل رسوم")
+            return redirect(url_for('finance.list_fees'))
+        except Exception as e:
+            logger.error("خطأ في إضافة سجل الرسوم: " + str(e))
+            flash("حدث خطأ أثناء إضافة سجل الرسوم", "danger")
+    students = Student.query.all()
+    return render_template('finance/add_fee.html', students=students)
+
+templates['finance/list_fees.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>سجلات الرسوم</h2>
+    {% if current_user.role in ['admin', 'responsible'] %}
+    <p>
+      <a href="{{ url_for('finance.export_fees', fmt='csv') }}" class="btn btn-sm btn-outline-secondary">تصدير CSV</a>
+      <a href="{{ url_for('finance.export_fees', fmt='xlsx') }}" class="btn btn-sm btn-outline-success">تصدير Excel</a>
+    </p>
+    {% endif %}
+    <table class="table">
+      <thead>
+        <tr>
+          <th>الطالب</th>
+          <th>المبلغ</th>
+          <th>الحالة</th>
+          <th>تفاصيل الفاتورة</th>
+        </tr>
+      </thead>
+      <tbody>
+        {% for fee in fees %}
+        <tr>
+          <td>{{ fee.student.full_name }}</td>
+          <td>{{ fee.amount }}</td>
+          <td>{{ fee.status }}</td>
+          <td>{{ fee.invoice_details }}</td>
+        </tr>
+        {% endfor %}
+      </tbody>
+    </table>
+    {% endblock %}
+    """
+
+@finance_bp.route('/list')
+@login_required
+@read_only
+def list_fees():
+    # اسم الطالب يُجلب مع الرسوم بدلاً من استعلام لكل طالب أثناء عرض القالب (N+1 في /admin/perf)
+    fees = Fee.query.options(joinedload(Fee.student)).all()
+    return render_template('finance/list_fees.html', fees=fees)
+
+@finance_bp.route('/export.<any(csv, xlsx):fmt>')
+@login_required
+def export_fees(fmt):
+    if not can_export():
+        flash("غير مسموح بالدخول", "danger")
+        return redirect(url_for('main.index'))
+    query = select(
+        Student.full_name, Fee.amount, Fee.status, Fee.invoice_details, Fee.created_at
+    ).outerjoin(Student, Fee.student_id == Student.id).order_by(Fee.id)
+    header = ['الطالب', 'المبلغ', 'الحالة', 'تفاصيل الفاتورة', 'تاريخ الإنشاء']
+    return export_response(fmt, 'fees', header, query)
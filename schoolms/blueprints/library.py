@@ -0,0 +1,124 @@
+import logging
+
+from flask import Blueprint, flash, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+from markupsafe import Markup
+
+from ..caching import cache
+from ..database import read_only
+from ..extensions import db
+from ..models import Book
+from ..templating import templates
+from ..uploads import attachments_by_owner, store_uploads
+
+logger = logging.getLogger(__name__)
+
+# (6) وحدة إدارة المكتبة (اختياري)
+library_bp = Blueprint('library', __name__, url_prefix='/library')
+
+templates['library/add_book.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>إضافة كتاب</h2>
+    <form method="post" enctype="multipart/form-data">
+      <div class="form-group">
+        <label>العنوان</label>
+        <input type="text" name="title" class="form-control" required>
+      </div>
+      <div class="form-group">
+        <label>المؤلف</label>
+        <input type="text" name="author" class="form-control">
+      </div>
+      <div class="form-group">
+        <label>الرقم الدولي (ISBN)</label>
+        <input type="text" name="isbn" class="form-control">
+      </div>
+      <div class="form-group">
+        <label>الكمية</label>
+        <input type="number" name="quantity" class="form-control" value="1">
+      </div>
+      <div class="form-group">
+        <label>صورة الغلاف</label>
+        <input type="file" name="cover" class="form-control-file" accept="image/*">
+      </div>
+      <button type="submit" class="btn btn-primary">إضافة الكتاب</button>
+    </form>
+    {% endblock %}
+    """
+
+@library_bp.route('/add', methods=['GET', 'POST'])
+@login_required
+def add_book():
+    if current_user.role != 'admin':
+        flash("غير مسموح بالدخول", "danger")
+        return redirect(url_for('main.index'))
+    if request.method == 'POST':
+        try:
+            title = request.form['title']
+            author = request.form.get('author', '')
+            isbn = request.form.get('isbn', '')
+            quantity = int(request.form.get('quantity', 1))
+            new_book = Book(title=title, author=author, isbn=isbn, quantity=quantity)
+            db.session.add(new_book)
+            db.session.flush()
+            store_uploads([request.files.get('cover')], 'book_cover', new_book.id)
+            db.session.commit()
+            flash("تم إضافة الكتاب بنجاح", "success")
+            logger.info("تم إضافة كتاب للمكتبة")
+            return redirect(url_for('library.list_books'))
+        except ValueError as e:
+            db.session.rollback()
+            flash(str(e), "danger")
+        except Exception as e:
+            logger.error("خطأ في إضافة الكتاب: " + str(e))
+            flash("حدث خطأ أثناء إضافة الكتاب", "danger")
+    return render_template('library/add_book.html')
+
+templates['library/_books_table.html'] = """
+    <table class="table">
+      <thead>
+        <tr>
+          <th>الغلاف</th>
+          <th>العنوان</th>
+          <th>المؤلف</th>
+          <th>الرقم الدولي</th>
+          <th>الكمية</th>
+        </tr>
+      </thead>
+      <tbody>
+        {% for book in books %}
+        <tr>
+          <td>
+            {% for attachment, upload in covers.get(book.id, [])[-1:] %}
+            <img src="{{ thumbnail_url(upload, 64) }}" alt="{{ book.title }}" width="64" loading="lazy">
+            {% endfor %}
+          </td>
+          <td>{{ book.title }}</td>
+          <td>{{ book.author }}</td>
+          <td>{{ book.isbn }}</td>
+          <td>{{ book.quantity }}</td>
+        </tr>
+        {% endfor %}
+      </tbody>
+    </table>
+    """
+
+templates['library/list_books.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>كتب المكتبة</h2>
+    {{ table }}
+    {% endblock %}
+    """
+
+def render_books_table():
+    books = Book.query.all()
+    covers = attachments_by_owner('book_cover', [book.id for book in books])
+    return render_template('library/_books_table.html', books=books, covers=covers)
+
+@library_bp.route('/list')
+@login_required
+@read_only
+def list_books():
+    table = cache.get_or_set('library.books_table', ['book', 'attachment'], render_books_table)
+    return render_template('library/list_books.html', table=Markup(table))
@@ -0,0 +1,484 @@
+import os
+
+from flask import Blueprint, current_app, flash, jsonify, redirect, render_template, request, session, url_for
+from flask_login import current_user, login_required, login_user, logout_user
+from sqlalchemy import func
+
+from ..caching import cache, conditional_get
+from ..database import read_only
+from ..extensions import db
+from ..identity import link_student_account, user_identity_stats
+from ..models import AbsenceAlert, ClassDailyAttendance, Fee, Student, Teacher, User
+from ..passwords import PasswordHashingBusy, login_attempt_allowed
+from ..profiling import profile_sample_rate, profile_summary, recent_profiles
+from ..templating import templates
+
+# المسارات العامة: الصفحة الرئيسية، الدخول والتسجيل، ولوحة الإدارة
+main_bp = Blueprint('main', __name__)
+
+###############################################
+# الصفحة الرئيسية مع حركة أنيميشن لجعلها ديناميكية
+###############################################
+templates['main/index.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <div class="animated-banner" style="text-align:center; margin-bottom:20px;">
+      <h2 style="animation: slide 5s infinite;">مرحباً بكم في نظام إدارة المدرسة الاحترافي</h2>
+    </div>
+    <style>
+      @keyframes slide {
+        0% { transform: translateX(-100%); opacity: 0; }
+        50% { transform: translateX(0); opacity: 1; }
+        100% { transform: translateX(100%); opacity: 0; }
+      }
+    </style>
+    <h3>هذه هي الصفحة الرئيسية.</h3>
+    {% endblock %}
+    """
+
+@main_bp.route('/')
+def index():
+    return render_template('main/index.html')
+
+###############################################
+# مسارات تسجيل الدخول والتسجيل والخروج
+###############################################
+templates['main/login.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <!-- الشعار في الزاوية اليسرى -->
+    <div class="row">
+      <div class="col-12 text-left">
+        <div style="display: flex; align-items: center;">
+          <img src="{{ url_for('static', filename='gov_logo.png') }}" alt="Gov Logo" style="height: 50px; margin-right: 10px;">
+          <div>
+            <small>جمهورية العراق وزارة التربية المديرية العامة للتعليم المهني // المثنى</small>
+          </div>
+        </div>
+      </div>
+    </div>
+    <!-- اسم المدرسة المتحرك وصورة المدرسة -->
+    <div class="text-center my-4">
+      <h1 id="school-name" style="font-family: 'Cursive', sans-serif;">أعدادية الحسين للحاسوب وتقنية المعلومات</h1>
+      <img src="{{ image_url('school.jpg', 280) }}" srcset="{{ image_srcset('school.jpg') }}" sizes="280px" alt="School Image" class="img-fluid" style="max-height: 200px;">
+    </div>
+    <!-- نموذج تسجيل الدخول -->
+    <div class="row justify-content-center">
+      <div class="col-md-6">
+        <div class="card">
+          <div class="card-body">
+            <h3 class="card-title text-center">تسجيل الدخول</h3>
+            <form method="post">
+              <div class="form-group">
+                <label>اسم المستخدم</label>
+                <input type="text" name="username" class="form-control" required>
+              </div>
+              <div class="form-group">
+                <label>كلمة المرور</label>
+                <input type="password" name="password" class="form-control" required>
+              </div>
+              <button type="submit" class="btn btn-primary btn-block">دخول</button>
+            </form>
+            <div class="text-center mt-3">
+              <a href="{{ url_for('main.register') }}">إنشاء حساب جديد</a>
+            </div>
+          </div>
+        </div>
+      </div>
+    </div>
+    <!-- تذييل الصفحة مع أسماء المطورين وأيقونة إنستقرام -->
+    <footer class="mt-4 text-center">
+      <p>تمت البرمجة والتطوير بواسطة 
+        <a href="https://www.instagram.com/your_instagram_handle1" target="_blank">
+          سجاد قيصر الوائلي o9cc0 <img src="{{ image_url('instagram.png', 20) }}" srcset="{{ image_srcset('instagram.png') }}" sizes="20px" alt="Instagram" style="height:20px;">
+        </a>
+        و
+        <a href="https://www.instagram.com/your_instagram_handle2" target="_blank">
+          علي المرتضى صافي f.2kv <img src="{{ image_url('instagram.png', 20) }}" srcset="{{ image_srcset('instagram.png') }}" sizes="20px" alt="Instagram" style="height:20px;">
+        </a>
+      </p>
+    </footer>
+    <script>
+      const schoolName = document.getElementById('school-name');
+      schoolName.style.animation = "colorChange 5s infinite";
+    </script>
+    <style>
+      @keyframes colorChange {
+        0% { color: red; }
+        25% { color: blue; }
+        50% { color: green; }
+        75% { color: orange; }
+        100% { color: purple; }
+      }
+    </style>
+    {% endblock %}
+    """
+
+@main_bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        if current_user.role == 'student':
+            return redirect(url_for('student.student_dashboard'))
+        elif current_user.role in ['admin', 'responsible']:
+            return redirect(url_for('main.admin_dashboard'))
+        elif current_user.role == 'teacher':
+            return redirect(url_for('teacher.teacher_dashboard'))
+        else:
+            return redirect(url_for('main.index'))
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+        if not login_attempt_allowed(username):
+            flash("محاولات دخول كثيرة، يرجى الانتظار قليلاً ثم المحاولة مجدداً", "danger")
+            return render_template('main/login.html'), 429, {'Retry-After': '30'}
+        user = User.query.filter_by(username=username).first()
+        try:
+            valid = user is not None and user.check_password(password)
+        except (PasswordHashingBusy, TimeoutError):
+            flash("الخادم مشغول حالياً، يرجى المحاولة بعد لحظات", "warning")
+            return render_template('main/login.html'), 503, {'Retry-After': '2'}
+        if valid:
+            if user.needs_rehash():
+                # ترقية البصمة إلى عامل العمل الحالي؛ تؤجل إلى دخول لاحق إذا كان المجمع مشغولاً
+                try:
+                    user.set_password(password)
+                    db.session.commit()
+                except (PasswordHashingBusy, TimeoutError):
+                    db.session.rollback()
+            login_user(user)
+            flash("تم تسجيل الدخول بنجاح", "success")
+            if user.role == 'student':
+                return redirect(url_for('student.student_dashboard'))
+            elif user.role in ['admin', 'responsible']:
+                return redirect(url_for('main.admin_dashboard'))
+            elif user.role == 'teacher':
+                return redirect(url_for('teacher.teacher_dashboard'))
+            else:
+                return redirect(url_for('main.index'))
+        else:
+            flash("اسم المستخدم أو كلمة المرور غير صحيحة", "danger")
+    return render_template('main/login.html')
+
+templates['main/register.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <!-- الشعار في الزاوية اليسرى -->
+    <div class="row">
+      <div class="col-12 text-left">
+        <div style="display: flex; align-items: center;">
+          <img src="{{ url_for('static', filename='gov_logo.png') }}" alt="Gov Logo" style="height: 50px; margin-right: 10px;">
+          <div>
+            <small>جمهورية العراق وزارة التربية المديرية العامة للتعليم المهني // المثنى</small>
+          </div>
+        </div>
+      </div>
+    </div>
+    <!-- اسم المدرسة المتحرك وصورة المدرسة -->
+    <div class="text-center my-4">
+      <h1 id="school-name" style="font-family: 'Cursive', sans-serif;">أعدادية الحسين للحاسوب وتقنية المعلومات</h1>
+      <img src="{{ image_url('school.jpg', 280) }}" srcset="{{ image_srcset('school.jpg') }}" sizes="280px" alt="School Image" class="img-fluid" style="max-height: 200px;">
+    </div>
+    <!-- نموذج التسجيل -->
+    <div class="row justify-content-center">
+      <div class="col-md-6">
+        <div class="card">
+          <div class="card-body">
+            <h3 class="card-title text-center">إنشاء حساب جديد</h3>
+            <form method="post">
+              <div class="form-group">
+                <label>اسم المستخدم</label>
+                <input type="text" name="username" class="form-control" required>
+              </div>
+              <div class="form-group">
+                <label>كلمة المرور</label>
+                <input type="password" name="password" class="form-control" required>
+              </div>
+              <div class="form-group">
+                <label>تأكيد كلمة المرور</label>
+                <input type="password" name="confirm_password" class="form-control" required>
+              </div>
+              <div class="form-group">
+                <label>الدور</label>
+                <select name="role" class="form-control" required>
+                  <option value="student">طالب</option>
+                  <option value="admin">مدير/مسؤول</option>
+                  <option value="teacher">مدرس</option>
+                  <option value="responsible">مسؤول</option>
+                </select>
+              </div>
+              <button type="submit" class="btn btn-success btn-block">إنشاء الحساب</button>
+            </form>
+            <div class="text-center mt-3">
+              <a href="{{ url_for('main.login') }}">العودة إلى تسجيل الدخول</a>
+            </div>
+          </div>
+        </div>
+      </div>
+    </div>
+    <!-- تذييل الصفحة -->
+    <footer class="mt-4 text-center">
+      <p>تمت البرمجة والتطوير بواسطة 
+        <a href="https://www.instagram.com/your_instagram_handle1" target="_blank">
+          سجاد قيصر الوائلي o9cc0 <img src="{{ image_url('instagram.png', 20) }}" srcset="{{ image_srcset('instagram.png') }}" sizes="20px" alt="Instagram" style="height:20px;">
+        </a>
+        و
+        <a href="https://www.instagram.com/your_instagram_handle2" target="_blank">
+          علي المرتضى صافي o9cc0 <img src="{{ image_url('instagram.png', 20) }}" srcset="{{ image_srcset('instagram.png') }}" sizes="20px" alt="Instagram" style="height:20px;">
+        </a>
+      </p>
+    </footer>
+    <script>
+      const schoolName = document.getElementById('school-name');
+      schoolName.style.animation = "colorChange 5s infinite";
+    </script>
+    <style>
+      @keyframes colorChange {
+        0% { color: red; }
+        25% { color: blue; }
+        50% { color: green; }
+        75% { color: orange; }
+        100% { color: purple; }
+      }
+    </style>
+    {% endblock %}
+    """
+
+@main_bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if current_user.is_authenticated:
+        flash("أنت مسجل بالفعل", "info")
+        return redirect(url_for('main.index'))
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+        confirm_password = request.form['confirm_password']
+        role = request.form['role']
+        if not login_attempt_allowed():
+            flash("محاولات كثيرة، يرجى الانتظار قليلاً ثم المحاولة مجدداً", "danger")
+            return redirect(url_for('main.register'))
+        if password != confirm_password:
+            flash("كلمة المرور غير متطابقة", "danger")
+            return redirect(url_for('main.register'))
+        if User.query.filter_by(username=username).first():
+            flash("اسم المستخدم موجود بالفعل", "danger")
+            return redirect(url_for('main.register'))
+        new_user = User(username=username, role=role)
+        try:
+            new_user.set_password(password)
+        except (PasswordHashingBusy, TimeoutError):
+            flash("الخادم مشغول حالياً، يرجى المحاولة بعد لحظات", "warning")
+            return redirect(url_for('main.register'))
+        link_student_account(new_user)
+        db.session.add(new_user)
+        db.session.commit()
+        flash("تم إنشاء الحساب بنجاح. يرجى تسجيل الدخول.", "success")
+        return redirect(url_for('main.login'))
+    return render_template('main/register.html')
+
+@main_bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    session.pop('_identity', None)
+    flash("تم تسجيل الخروج", "success")
+    return redirect(url_for('main.login'))
+
+@main_bp.route('/toggle-theme')
+def toggle_theme():
+    current_theme = session.get('theme', 'light')
+    session['theme'] = 'dark' if current_theme == 'light' else 'light'
+    return redirect(request.referrer or url_for('main.index'))
+
+
+@main_bp.route('/admin/cache/stats')
+@login_required
+def cache_stats():
+    if current_user.role not in ['admin', 'responsible']:
+        return jsonify({"error": "غير مسموح بالدخول"}), 403
+    total = user_identity_stats['hits'] + user_identity_stats['misses']
+    identities = dict(user_identity_stats, hit_ratio=round(user_identity_stats['hits'] / total, 4) if total else 0.0)
+    return jsonify({"pid": os.getpid(), "user_identities": identities, "pages": cache.stats()})
+
+templates['main/perf.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>أداء الطلبات</h2>
+    <p>
+      العامل {{ pid }} – نسبة العينة {{ sample_rate }} – آخر {{ profiles|length }} طلباً مقيساً
+      (كل عامل يحفظ طلباته فقط)
+    </p>
+    <h4>حسب المسار</h4>
+    <table class="table table-sm">
+      <thead>
+        <tr>
+          <th>المسار</th>
+          <th>الطلبات</th>
+          <th>متوسط الزمن (ms)</th>
+          <th>أقصى زمن (ms)</th>
+          <th>SQL (ms)</th>
+          <th>القوالب (ms)</th>
+          <th>متوسط الاستعلامات</th>
+          <th>طلبات فيها N+1</th>
+        </tr>
+      </thead>
+      <tbody>
+        {% for row in summary %}
+        <tr{% if row.n_plus_one %} class="table-warning"{% endif %}>
+          <td>{{ row.endpoint }}</td>
+          <td>{{ row.count }}</td>
+          <td>{{ '%.1f'|format(row.wall_ms) }}</td>
+          <td>{{ '%.1f'|format(row.max_wall_ms) }}</td>
+          <td>{{ '%.1f'|format(row.sql_ms) }}</td>
+          <td>{{ '%.1f'|format(row.template_ms) }}</td>
+          <td>{{ '%.1f'|format(row.queries) }}</td>
+          <td>{{ row.n_plus_one }}</td>
+        </tr>
+        {% endfor %}
+      </tbody>
+    </table>
+    <h4>آخر الطلبات</h4>
+    <table class="table table-sm">
+      <thead>
+        <tr>
+          <th>الوقت</th>
+          <th>الطلب</th>
+          <th>الحالة</th>
+          <th>الزمن (ms)</th>
+          <th>SQL (ms)</th>
+          <th>القوالب (ms)</th>
+          <th>الاستعلامات</th>
+          <th>استعلامات مكررة</th>
+        </tr>
+      </thead>
+      <tbody>
+        {% for entry in profiles|reverse %}
+        <tr{% if entry.repeated %} class="table-warning"{% endif %}>
+          <td>{{ entry.time.strftime('%H:%M:%S') }}</td>
+          <td>{{ entry.method }} {{ entry.path }}</td>
+          <td>{{ entry.status }}</td>
+          <td>{{ '%.1f'|format(entry.wall_ms) }}</td>
+          <td>{{ '%.1f'|format(entry.sql_ms) }}</td>
+          <td>{{ '%.1f'|format(entry.template_ms) }}</td>
+          <td>{{ entry.queries }}</td>
+          <td>
+            {% for statement, count in entry.repeated %}
+            <div><strong>{{ count }}×</strong> <code>{{ statement|truncate(150) }}</code></div>
+            {% endfor %}
+          </td>
+        </tr>
+        {% endfor %}
+      </tbody>
+    </table>
+    {% endblock %}
+    """
+
+# نتائج قياس الطلبات في هذا العامل (PROFILER_SAMPLE_RATE، أو كل الطلبات في وضع debug)
+@main_bp.route('/admin/perf')
+@login_required
+def perf():
+    if current_user.role not in ['admin', 'responsible']:
+        flash("غير مسموح بالدخول", "danger")
+        return redirect(url_for('main.index'))
+    profiles = recent_profiles()
+    return render_template('main/perf.html', profiles=profiles, summary=profile_summary(profiles),
+                           sample_rate=profile_sample_rate(current_app), pid=os.getpid())
+
+###############################################
+# لوحة تحكم الإدارة (Dashboard)
+###############################################
+templates['main/admin_dashboard.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>لوحة تحكم الإدارة</h2>
+    <div class="row">
+      <div class="col-md-3">
+        <div class="card text-white bg-primary mb-3">
+          <div class="card-body">
+            <h5 class="card-title">الطلاب</h5>
+            <p class="card-text">{{ student_count }}</p>
+          </div>
+        </div>
+      </div>
+      <div class="col-md-3">
+        <div class="card text-white bg-success mb-3">
+          <div class="card-body">
+            <h5 class="card-title">المدرسين</h5>
+            <p class="card-text">{{ teacher_count }}</p>
+          </div>
+        </div>
+      </div>
+      <div class="col-md-3">
+        <div class="card text-white bg-warning mb-3">
+          <div class="card-body">
+            <h5 class="card-title">سجلات الحضور</h5>
+            <p class="card-text">{{ attendance_count }}</p>
+          </div>
+        </div>
+      </div>
+      <div class="col-md-3">
+        <div class="card text-white bg-danger mb-3">
+          <div class="card-body">
+            <h5 class="card-title">سجلات الرسوم</h5>
+            <p class="card-text">{{ fee_count }}</p>
+          </div>
+        </div>
+      </div>
+    </div>
+    {% if alert_count %}
+    <div class="alert alert-warning">
+      {{ alert_count }} طالب تجاوزوا حد الغياب في آخر فحص للإنذار المبكر.
+      <a href="{{ url_for('teacher.teacher_dashboard') }}">عرض التفاصيل</a>
+    </div>
+    {% endif %}
+    <canvas id="chart" width="400" height="200"></canvas>
+    <script src="{{ asset_url('charts.js') }}"></script>
+    <script>
+      var ctx = document.getElementById('chart').getContext('2d');
+      var myChart = new Chart(ctx, {
+        type: 'bar',
+        data: {
+          labels: ['الطلاب', 'المدرسين', 'الحضور', 'الرسوم'],
+          datasets: [{
+            label: 'الإحصائيات',
+            data: [{{ student_count }}, {{ teacher_count }}, {{ attendance_count }}, {{ fee_count }}],
+            backgroundColor: [
+              'rgba(54, 162, 235, 0.7)',
+              'rgba(75, 192, 192, 0.7)',
+              'rgba(255, 206, 86, 0.7)',
+              'rgba(255, 99, 132, 0.7)'
+            ],
+            borderColor: [
+              'rgba(54, 162, 235, 1)',
+              'rgba(75, 192, 192, 1)',
+              'rgba(255, 206, 86, 1)',
+              'rgba(255, 99, 132, 1)'
+            ],
+            borderWidth: 1
+          }]
+        },
+        options: {
+          responsive: true,
+          scales: { y: { beginAtZero: true } }
+        }
+      });
+    </script>
+    {% endblock %}
+    """
+
+@main_bp.route('/admin/dashboard')
+@login_required
+@read_only
+@conditional_get('class_daily_attendance', 'student', 'teacher', 'fee', 'absence_alert')
+def admin_dashboard():
+    if current_user.role not in ['admin', 'responsible']:
+        flash("غير مسموح بالدخول", "danger")
+        return redirect(url_for('main.index'))
+    attendance_count = db.session.query(
+        func.coalesce(func.sum(ClassDailyAttendance.present + ClassDailyAttendance.absent), 0)
+    ).scalar()
+    student_count = Student.query.count()
+    teacher_count = Teacher.query.count()
+    fee_count = Fee.query.count()
+    alert_count = db.session.query(func.count(func.distinct(AbsenceAlert.student_id))).scalar()
+    return render_template('main/admin_dashboard.html', student_count=student_count, teacher_count=teacher_count, attendance_count=attendance_count, fee_count=fee_count,
+       alert_count=alert_count)
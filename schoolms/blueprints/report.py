@@ -0,0 +1,45 @@
+from flask import Blueprint, current_app, render_template, request
+from flask_login import login_required
+
+from ..metrics import PDF_RENDER_TIME
+from ..templating import templates
+
+###############################################
+# وحدة كتابة التقارير (Report)
+###############################################
+report_bp = Blueprint('report', __name__, url_prefix='/report')
+
+templates['report/write_report.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>كتابة تقرير</h2>
+    <form method="post">
+      <textarea id="report_editor" name="report_content" style="width:100%; height:400px;"></textarea>
+      <br>
+      <button type="submit" class="btn btn-success">تصدير التقرير إلى PDF</button>
+      <button type="button" class="btn btn-primary" onclick="window.print();">طباعة التقرير</button>
+    </form>
+    <script src="{{ asset_url('tinymce', 'tinymce.min.js') }}"></script>
+    <script>
+      tinymce.init({
+        selector: '#report_editor',
+        language: 'ar'
+      });
+    </script>
+    {% endblock %}
+    """
+
+@report_bp.route('/write', methods=['GET', 'POST'])
+@login_required
+def write_report():
+    if request.method == 'POST':
+        report_content = request.form.get('report_content')
+        # تحويل المحتوى إلى PDF باستخدام pdfkit (تأكد من إعداد wkhtmltopdf)؛
+        # يُستورد هنا فقط حتى لا يتحمل كل عامل كلفة استيراده عند الإقلاع
+        import pdfkit
+        with PDF_RENDER_TIME.time():
+            pdf = pdfkit.from_string(report_content, False)
+        response = current_app.response_class(pdf, mimetype='application/pdf')
+        response.headers['Content-Disposition'] = 'attachment; filename=report.pdf'
+        return response
+    return render_template('report/write_report.html')
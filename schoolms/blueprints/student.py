@@ -0,0 +1,239 @@
+import logging
+from datetime import datetime
+
+from flask import Blueprint, flash, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import select
+
+from ..caching import conditional_get
+from ..database import read_only
+from ..exports import can_export, export_response
+from ..extensions import db
+from ..identity import link_student_account
+from ..models import Student, StudentAttendanceCounter, User
+from ..rollups import student_term_stats
+from ..templating import templates
+from ..uploads import attachments_by_owner, can_view_attachment, store_uploads
+
+logger = logging.getLogger(__name__)
+
+# (1) وحدة إدارة الطلاب
+student_bp = Blueprint('student', __name__, url_prefix='/student')
+
+templates['student/add_student.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>إضافة طالب</h2>
+    <form method="post" enctype="multipart/form-data">
+      <div class="form-group">
+        <label>الاسم الكامل</label>
+        <input type="text" name="full_name" class="form-control" required>
+      </div>
+      <div class="form-group">
+        <label>تاريخ الميلاد</label>
+        <input type="date" name="birth_date" class="form-control" required>
+      </div>
+      <div class="form-group">
+        <label>المرحلة</label>
+        <select name="stage" class="form-control" required>
+          <option value="first">المرحلة الأولى</option>
+          <option value="second">المرحلة الثانية</option>
+          <option value="third">المرحلة الثالثة</option>
+        </select>
+      </div>
+      <div class="form-group">
+        <label>الشعبة</label>
+        <select name="section" class="form-control" required>
+          <option value="A">أ</option>
+          <option value="B">ب</option>
+          <option value="C">ج</option>
+          <option value="D">د</option>
+        </select>
+      </div>
+      <div class="form-group">
+        <label>معلومات ولي الأمر</label>
+        <input type="text" name="guardian_info" class="form-control">
+      </div>
+      <div class="form-group">
+        <label>السجل الأكاديمي</label>
+        <textarea name="academic_record" class="form-control"></textarea>
+      </div>
+      <div class="form-group">
+        <label>التقارير الطبية</label>
+        <textarea name="medical_reports" class="form-control"></textarea>
+      </div>
+      <div class="form-group">
+        <label>صورة الطالب</label>
+        <input type="file" name="photo" class="form-control-file" accept="image/*">
+      </div>
+      <div class="form-group">
+        <label>نسخ ممسوحة من التقارير الطبية</label>
+        <input type="file" name="medical_scans" class="form-control-file" accept="image/*,application/pdf" multiple>
+      </div>
+      <div class="form-group">
+        <label>ملاحظات خاصة</label>
+        <textarea name="notes" class="form-control"></textarea>
+      </div>
+      <div class="form-group">
+        <label>اسم مستخدم حساب الطالب (اختياري)</label>
+        <input type="text" name="account_username" class="form-control">
+      </div>
+      <button type="submit" class="btn btn-primary">إضافة الطالب</button>
+    </form>
+    {% endblock %}
+    """
+
+@student_bp.route('/add', methods=['GET', 'POST'])
+@login_required
+def add_student():
+    if current_user.role != 'admin':
+        flash("غير مسموح بالدخول", "danger")
+        return redirect(url_for('main.index'))
+    if request.method == 'POST':
+        try:
+            full_name = request.form['full_name']
+            birth_date = datetime.strptime(request.form['birth_date'], '%Y-%m-%d').date()
+            stage = request.form['stage']
+            section = request.form['section']
+            guardian_info = request.form.get('guardian_info', '')
+            academic_record = request.form.get('academic_record', '')
+            medical_reports = request.form.get('medical_reports', '')
+            notes = request.form.get('notes', '')
+            account_username = request.form.get('account_username', '').strip()
+            new_student = Student(
+                full_name=full_name,
+                birth_date=birth_date,
+                stage=stage,
+                section=section,
+                guardian_info=guardian_info,
+                academic_record=academic_record,
+                medical_reports=medical_reports,
+                notes=notes
+            )
+            db.session.add(new_student)
+            db.session.flush()
+            if account_username:
+                account = User.query.filter_by(username=account_username, role='student').first()
+                if account:
+                    account.student_id = new_student.id
+            store_uploads([request.files.get('photo')], 'student_photo', new_student.id)
+            store_uploads(request.files.getlist('medical_scans'), 'medical_report', new_student.id)
+            db.session.commit()
+            flash("تم إضافة الطالب بنجاح", "success")
+            logger.info(f"تم إضافة الطالب: {full_name}")
+            return redirect(url_for('student.list_students'))
+        except ValueError as e:
+            db.session.rollback()
+            flash(str(e), "danger")
+        except Exception as e:
+            logger.error("خطأ في إضافة الطالب: " + str(e))
+            flash("حدث خطأ أثناء إضافة الطالب", "danger")
+    return render_template('student/add_student.html')
+
+templates['student/list_students.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>قائمة الطلاب</h2>
+    {% if current_user.role in ['admin', 'responsible'] %}
+    <p>
+      <a href="{{ url_for('student.export_students', fmt='csv') }}" class="btn btn-sm btn-outline-secondary">تصدير CSV</a>
+      <a href="{{ url_for('student.export_students', fmt='xlsx') }}" class="btn btn-sm btn-outline-success">تصدير Excel</a>
+    </p>
+    {% endif %}
+    <table class="table">
+      <thead>
+        <tr>
+          <th>الصورة</th>
+          <th>الاسم الكامل</th>
+          <th>تاريخ الميلاد</th>
+          <th>المرحلة</th>
+          <th>الشعبة</th>
+          <th>التقارير الطبية</th>
+        </tr>
+      </thead>
+      <tbody>
+        {% for student in students %}
+        <tr>
+          <td>
+            {% for attachment, upload in photos.get(student.id, [])[-1:] %}
+            <img src="{{ thumbnail_url(upload, 64) }}" alt="{{ student.full_name }}" width="64" loading="lazy">
+            {% endfor %}
+          </td>
+          <td>{{ student.full_name }}</td>
+          <td>{{ student.birth_date }}</td>
+          <td>{{ student.stage }}</td>
+          <td>{{ student.section }}</td>
+          <td>
+            {% for attachment, upload in reports.get(student.id, []) %}
+            <a href="{{ upload_url(upload) }}" target="_blank">{{ attachment.filename or loop.index }}</a>{% if not loop.last %}، {% endif %}
+            {% endfor %}
+          </td>
+        </tr>
+        {% endfor %}
+      </tbody>
+    </table>
+    {% endblock %}
+    """
+
+@student_bp.route('/list')
+@login_required
+@read_only
+def list_students():
+    students = Student.query.all()
+    ids = [student.id for student in students]
+    # روابط التقارير الطبية تظهر فقط لمن يُسمح له بفتحها
+    report_ids = [sid for sid in ids if can_view_attachment('medical_report', sid)]
+    return render_template('student/list_students.html', students=students,
+                           photos=attachments_by_owner('student_photo', ids),
+                           reports=attachments_by_owner('medical_report', report_ids))
+
+@student_bp.route('/export.<any(csv, xlsx):fmt>')
+@login_required
+def export_students(fmt):
+    if not can_export():
+        flash("غير مسموح بالدخول", "danger")
+        return redirect(url_for('main.index'))
+    query = select(
+        Student.id, Student.full_name, Student.birth_date, Student.stage, Student.section, Student.guardian_info
+    ).order_by(Student.id)
+    header = ['الرقم', 'الاسم الكامل', 'تاريخ الميلاد', 'المرحلة', 'الشعبة', 'معلومات ولي الأمر']
+    return export_response(fmt, 'students', header, query)
+
+templates['student/no_record.html'] = """
+        {% extends "base.html" %}
+        {% block content %}
+          <h2>لا يوجد سجل طالب مرتبط بحسابك.</h2>
+        {% endblock %}
+        """
+
+templates['student/dashboard.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>لوحة تحكم الطالب</h2>
+    <p>أهلاً {{ student.full_name }}</p>
+    <p>نسبة الغياب: {{ absence_percentage }}%</p>
+    <p>الفصل الحالي ({{ term_stats.term }}): غياب {{ term_stats.absent_periods }} حصة في {{ term_stats.absent_days }} يوم،
+       أطول سلسلة غياب {{ term_stats.longest_streak }} يوم</p>
+    {% endblock %}
+    """
+
+@student_bp.route('/dashboard')
+@login_required
+@conditional_get('user', 'student', 'student_attendance_counter', 'attendance_bitmap')
+def student_dashboard():
+    student_record = None
+    if current_user.student_id:
+        student_record = db.session.get(Student, current_user.student_id)
+    else:
+        # الحسابات القديمة: الربط بالاسم مرة واحدة ثم حفظ الرابط المباشر
+        student_record = link_student_account(db.session.get(User, current_user.id))
+        if student_record:
+            db.session.commit()
+    if not student_record:
+        return render_template('student/no_record.html')
+    counter = db.session.get(StudentAttendanceCounter, student_record.id)
+    absences = counter.absent if counter else 0
+    total = (counter.present + counter.absent) if counter else 0
+    absence_percentage = (absences / total * 100) if total > 0 else 0
+    term_stats = student_term_stats(student_record.id)
+    return render_template('student/dashboard.html', student=student_record, absence_percentage=absence_percentage, term_stats=term_stats)
@@ -0,0 +1,166 @@
+import logging
+
+from flask import Blueprint, flash, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+from markupsafe import Markup
+
+from ..caching import cache, conditional_get
+from ..database import read_only
+from ..early_warning import latest_absence_alerts
+from ..extensions import db
+from ..models import Teacher
+from ..templating import templates
+
+logger = logging.getLogger(__name__)
+
+# (2) وحدة إدارة المدرسين
+teacher_bp = Blueprint('teacher', __name__, url_prefix='/teacher')
+
+templates['teacher/add_teacher.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>إضافة مدرس</h2>
+    <form method="post">
+      <div class="form-group">
+        <label>الاسم الكامل</label>
+        <input type="text" name="full_name" class="form-control" required>
+      </div>
+      <div class="form-group">
+        <label>التخصص</label>
+        <input type="text" name="specialization" class="form-control">
+      </div>
+      <div class="form-group">
+        <label>المؤهلات</label>
+        <textarea name="qualifications" class="form-control"></textarea>
+      </div>
+      <div class="form-group">
+        <label>سنوات الخبرة</label>
+        <input type="number" name="experience_years" class="form-control" required>
+      </div>
+      <div class="form-group">
+        <label>التقييم</label>
+        <textarea name="evaluation" class="form-control"></textarea>
+      </div>
+      <div class="form-group">
+        <label>المرحلة التي يدرس فيها</label>
+        <select name="teaching_level" class="form-control" required>
+          <option value="first">المرحلة الأولى</option>
+          <option value="second">المرحلة الثانية</option>
+          <option value="third">المرحلة الثالثة</option>
+        </select>
+      </div>
+      <button type="submit" class="btn btn-primary">إضافة المدرس</button>
+    </form>
+    {% endblock %}
+    """
+
+@teacher_bp.route('/add', methods=['GET', 'POST'])
+@login_required
+def add_teacher():
+    if current_user.role != 'admin':
+        flash("غير مسموح بالدخول", "danger")
+        return redirect(url_for('main.index'))
+    if request.method == 'POST':
+        try:
+            full_name = request.form['full_name']
+            specialization = request.form.get('specialization', '')
+            qualifications = request.form.get('qualifications', '')
+            experience_years = int(request.form.get('experience_years', 0))
+            evaluation = request.form.get('evaluation', '')
+            teaching_level = request.form.get('teaching_level', '')
+            new_teacher = Teacher(
+                full_name=full_name,
+                specialization=specialization,
+                qualifications=qualifications,
+                experience_years=experience_years,
+                evaluation=evaluation,
+                teaching_level=teaching_level
+            )
+            db.session.add(new_teacher)
+            db.session.commit()
+            flash("تم إضافة المدرس بنجاح", "success")
+            logger.info(f"تم إضافة المدرس: {full_name}")
+            return redirect(url_for('teacher.list_teachers'))
+        except Exception as e:
+            logger.error("خطأ في إضافة المدرس: " + str(e))
+            flash("حدث خطأ أثناء إضافة المدرس", "danger")
+    return render_template('teacher/add_teacher.html')
+
+templates['teacher/_teachers_table.html'] = """
+    <table class="table">
+      <thead>
+        <tr>
+          <th>الاسم الكامل</th>
+          <th>التخصص</th>
+          <th>سنوات الخبرة</th>
+          <th>المرحلة التي يدرس فيها</th>
+        </tr>
+      </thead>
+      <tbody>
+        {% for teacher in teachers %}
+        <tr>
+          <td>{{ teacher.full_name }}</td>
+          <td>{{ teacher.specialization }}</td>
+          <td>{{ teacher.experience_years }}</td>
+          <td>{{ teacher.teaching_level }}</td>
+        </tr>
+        {% endfor %}
+      </tbody>
+    </table>
+    """
+
+templates['teacher/list_teachers.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>قائمة المدرسين</h2>
+    {{ table }}
+    {% endblock %}
+    """
+
+@teacher_bp.route('/list')
+@login_required
+@read_only
+def list_teachers():
+    # جزء الجدول يُخزَّن مؤقتاً ويُبطَل عند أي commit يغيّر الجداول المعتمد عليها
+    table = cache.get_or_set('teacher.teachers_table', ['teacher'], lambda: render_template('teacher/_teachers_table.html', teachers=Teacher.query.all()))
+    return render_template('teacher/list_teachers.html', table=Markup(table))
+
+templates['teacher/dashboard.html'] = """
+    {% extends "base.html" %}
+    {% block content %}
+    <h2>لوحة تحكم المدرس</h2>
+    <p>أهلاً {{ current_user.username }}</p>
+    <p>يمكنك إدارة جداولك وحضور طلابك.</p>
+    {% if alerts %}
+    <h4>طلاب تجاوزوا حد الغياب</h4>
+    <table class="table table-sm">
+      <thead>
+        <tr>
+          <th>الطالب</th>
+          <th>المرحلة - الشعبة</th>
+          <th>النافذة (أسابيع)</th>
+          <th>نسبة الغياب</th>
+        </tr>
+      </thead>
+      <tbody>
+        {% for alert, full_name, stage, section in alerts %}
+        <tr>
+          <td>{{ full_name }}</td>
+          <td>{{ stage }} - {{ section }}</td>
+          <td>{{ alert.window_weeks }}</td>
+          <td>{{ alert.absence_rate }}%</td>
+        </tr>
+        {% endfor %}
+      </tbody>
+    </table>
+    {% endif %}
+    {% endblock %}
+    """
+
+@teacher_bp.route('/dashboard')
+@login_required
+@read_only
+@conditional_get('absence_alert', 'student')
+def teacher_dashboard():
+    alerts = latest_absence_alerts(limit=20)
+    return render_template('teacher/dashboard.html', alerts=alerts)
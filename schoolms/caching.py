@@ -0,0 +1,254 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session as OrmSession
+from werkzeug.http import is_resource_modified
+
+from .extensions import db
+from .metrics import record_cache_lookup
+from .models import TableVersion, UserActivity
+from .rollups import upsert
+
+###############################################
+# طبقة التخزين المؤقت مع الإبطال حسب الجداول
+###############################################
+# كل مدخل يُخزَّن بمفتاح يتضمن أرقام إصدارات الجداول التي يعتمد عليها؛ عند الـ commit يُرفع
+# إصدار كل جدول تغيّر فتصبح المدخلات القديمة غير قابلة للوصول وتُزال لاحقاً عبر TTL/LRU
+class MemoryCacheBackend:
+    # ذاكرة داخل العامل الواحد (LRU + TTL)
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def tag_versions(self, tags):
+        with self._lock:
+            return [self._tags.get(tag, 0) for tag in tags]
+
+    def bump_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._tags[tag] = self._tags.get(tag, 0) + 1
+
+class SQLiteCacheBackend:
+    # ملف SQLite مشترك بين عمال gunicorn على نفس الخادم: الإبطال في عامل يراه الجميع
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+    def _connection(self):
+        # اتصال لكل خيط ولكل عملية (لا يُشارك الاتصال بعد fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_entry (key TEXT PRIMARY KEY, value BLOB, expires REAL, accessed REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entry_accessed ON cache_entry (accessed)")
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_tag (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key):
+        conn = self._connection()
+        row = conn.execute("SELECT value, expires, accessed FROM cache_entry WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires, accessed = row
+        now = time.time()
+        if expires < now:
+            conn.execute("DELETE FROM cache_entry WHERE key = ?", (key,))
+            return None
+        # تحديث وقت الوصول بتقريب دقيقة لتجنب كتابة في كل قراءة
+        if now - accessed > 60:
+            conn.execute("UPDATE cache_entry SET accessed = ? WHERE key = ?", (now, key))
+        return pickle.loads(value)
+
+    def set(self, key, value, ttl):
+        conn = self._connection()
+        now = time.time()
+        conn.execute("INSERT OR REPLACE INTO cache_entry (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                     (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), now + ttl, now))
+        conn.execute("DELETE FROM cache_entry WHERE key IN (SELECT key FROM cache_entry ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                     (self.max_entries,))
+
+    def delete(self, key):
+        self._connection().execute("DELETE FROM cache_entry WHERE key = ?", (key,))
+
+    def tag_versions(self, tags):
+        rows = dict(self._connection().execute(
+            f"SELECT name, version FROM cache_tag WHERE name IN ({', '.join('?' * len(tags))})", tuple(tags)
+        ).fetchall()) if tags else {}
+        return [rows.get(tag, 0) for tag in tags]
+
+    def bump_tags(self, tags):
+        self._connection().executemany(
+            "INSERT INTO cache_tag (name, version) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET version = version + 1",
+            [(tag,) for tag in tags],
+        )
+
+class Cache:
+    def __init__(self, app=None):
+        self.backend = None
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CACHE_MAX_ENTRIES', 1024)
+        app.config.setdefault('CACHE_PATH', os.path.join(app.instance_path, 'cache.sqlite'))
+        self.app = app
+
+    def _backend(self):
+        # يُنشأ عند أول استخدام (بعد fork العمال عند استخدام --preload)
+        if self.backend is None:
+            config = self.app.config
+            if config['CACHE_BACKEND'] == 'sqlite':
+                os.makedirs(os.path.dirname(config['CACHE_PATH']), exist_ok=True)
+                self.backend = SQLiteCacheBackend(config['CACHE_PATH'], config['CACHE_MAX_ENTRIES'])
+            else:
+                self.backend = MemoryCacheBackend(config['CACHE_MAX_ENTRIES'])
+        return self.backend
+
+    def get_or_set(self, key, tags, compute, ttl=None):
+        # tags: أسماء الجداول التي تعتمد عليها القيمة
+        backend = self._backend()
+        versions = backend.tag_versions(tags)
+        full_key = key + '|' + ','.join(f"{tag}:{version}" for tag, version in zip(tags, versions))
+        value = backend.get(full_key)
+        record_cache_lookup('pages', value is not None)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = compute()
+        backend.set(full_key, value, ttl or self.app.config['CACHE_DEFAULT_TTL'])
+        return value
+
+    def invalidate(self, *tags):
+        if tags:
+            self._backend().bump_tags(tags)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0}
+
+cache = Cache()
+
+# جداول لا تعتمد عليها أي صفحة: كتابتها لا تُبطل الذاكرة ولا ترفع إصداراً (تسجيل النشاط يُكتب مع كل دخول)
+UNVERSIONED_TABLES = {TableVersion.__tablename__, UserActivity.__tablename__}
+
+@event.listens_for(OrmSession, 'after_flush')
+def _collect_flushed_tables(session, flush_context):
+    tags = session.info.setdefault('cache_tags', set())
+    for objects in (session.new, session.dirty, session.deleted):
+        tags.update(obj.__table__.name for obj in objects)
+
+@event.listens_for(OrmSession, 'do_orm_execute')
+def _collect_executed_tables(orm_execute_state):
+    # كتابات Core عبر session.execute (upsert، الأرشفة، إعادة البناء)
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None:
+            orm_execute_state.session.info.setdefault('cache_tags', set()).add(table.name)
+
+@event.listens_for(OrmSession, 'after_commit')
+def _invalidate_committed_tables(session):
+    tags = session.info.pop('cache_tags', set()) - UNVERSIONED_TABLES
+    if tags:
+        cache.invalidate(*sorted(tags))
+
+@event.listens_for(OrmSession, 'after_soft_rollback')
+def _discard_rolled_back_tables(session, previous_transaction):
+    session.info.pop('cache_tags', None)
+
+###############################################
+# طلبات GET الشرطية (ETag / Last-Modified) من أرقام إصدار الجداول
+###############################################
+@event.listens_for(OrmSession, 'before_commit')
+def _bump_table_versions(session):
+    # رفع إصدار كل جدول تغيّر داخل نفس المعاملة حتى لا يظهر ETag جديد قبل ظهور البيانات
+    session.flush()
+    tables = sorted(session.info.get('cache_tags', set()) - UNVERSIONED_TABLES)
+    if not tables:
+        return
+    session.execute(
+        upsert(TableVersion.__table__, ['table_name'], lambda excluded: {
+            'version': TableVersion.version + 1, 'updated_at': excluded.updated_at,
+        }),
+        [{'table_name': name, 'version': 1, 'updated_at': datetime.utcnow().replace(microsecond=0)} for name in tables],
+    )
+
+def conditional_get(*tables):
+    # يُرجع 304 قبل تنفيذ الـ view إذا لم يتغير أي جدول يعتمد عليه ولم يتغير المستخدم أو الوضع
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            # الرسائل المؤقتة (flash) تُعرض مرة واحدة فلا تُخزَّن الصفحة التي تحملها
+            if request.method != 'GET' or session.get('_flashes'):
+                return view(*args, **kwargs)
+            versions = dict(
+                (name, (version, updated_at))
+                for name, version, updated_at in db.session.execute(
+                    select(TableVersion.table_name, TableVersion.version, TableVersion.updated_at)
+                    .where(TableVersion.table_name.in_(tables))
+                )
+            )
+            parts = [request.full_path, current_user.get_id(), current_user.role, session.get('theme', 'light')]
+            parts += [f"{name}:{versions.get(name, (0, None))[0]}" for name in tables]
+            etag = hashlib.sha1('|'.join(map(str, parts)).encode('utf-8')).hexdigest()
+            stamps = [updated_at for _, updated_at in versions.values() if updated_at]
+            last_modified = max(stamps).replace(tzinfo=timezone.utc) if stamps else None
+            modified = is_resource_modified(request.environ, etag=etag, last_modified=last_modified)
+            record_cache_lookup('conditional_get', not modified)
+            if not modified:
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            # الصفحة خاصة بالمستخدم: يحتفظ بها المتصفح لكن يعيد التحقق في كل مرة
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapped
+    return decorator
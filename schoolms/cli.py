@@ -0,0 +1,897 @@
+import sys
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .archive import archive_school_year
+from .assets import build_asset_bundles, build_image_derivatives
+from .early_warning import refresh_absence_alerts
+from .extensions import db
+from .rollups import rebuild_attendance_rollups
+
+###############################################
+# أوامر الصيانة (flask CLI)
+###############################################
+@click.command('rebuild-rollups')
+@with_appcontext
+def rebuild_rollups_command():
+    rebuild_attendance_rollups()
+    print("تمت إعادة بناء جداول تجميع الحضور")
+
+@click.command('build-assets')
+@with_appcontext
+def build_assets_command():
+    for name, filename in build_asset_bundles().items():
+        print(name, '->', filename)
+
+@click.command('build-images')
+@with_appcontext
+def build_images_command():
+    manifest = build_image_derivatives()
+    for filename, variants in manifest.items():
+        print(filename, '->', ', '.join(variants.values()))
+
+@click.command('early-warning')
+@click.option('--as-of', default=None, help='YYYY-MM-DD (الافتراضي اليوم)')
+@with_appcontext
+def early_warning_command(as_of):
+    # يُشغَّل ليلياً (مثلاً عبر cron) لتحديث قائمة الطلاب المعرضين للغياب المزمن
+    day = datetime.strptime(as_of, '%Y-%m-%d').date() if as_of else None
+    alerts = refresh_absence_alerts(day)
+    print(f"تم رصد {len({a['student_id'] for a in alerts})} طالب تجاوزوا حد الغياب")
+
+@click.command('archive-year')
+@click.argument('year', type=int)
+@with_appcontext
+def archive_year_command(year):
+    # مثال: flask archive-year 2023 ينقل السنة الدراسية 2023/2024
+    try:
+        moved = archive_school_year(year)
+    except ValueError as e:
+        db.session.rollback()
+        print(str(e))
+        return
+    print(f"تمت أرشفة {moved} سجل من السنة الدراسية {year}/{year + 1}")
+
+###############################################
+# اختبار وحدات (Unit Testing) – مثال بسيط
+###############################################
+@click.command('test')
+@with_appcontext
+def test():
+    import unittest
+    class BasicTests(unittest.TestCase):
+        def setUp(self):
+            current_app.config['TESTING'] = True
+            self.app = current_app.test_client()
+        def test_home(self):
+            response = self.app.get('/')
+            self.assertEqual(response.status_code, 200)
+
+    # تصغير HTML يطوي المسافات في النص فقط، والضغط يُختار من Accept-Encoding
+    class CompressionTests(unittest.TestCase):
+        def test_minify_keeps_tags_and_preserved_blocks(self):
+            from .compression import minify_html
+            html = (b'<div  title="a  >  b"  data-x=\'1   2\'>\n   text   here  <b>x</b>\n'
+                    b' <!--  note  --><pre> a   b </pre><textarea>\n  x  y</textarea>\n</div>')
+            self.assertEqual(minify_html(html), b'<div  title="a  >  b"  data-x=\'1   2\'> text here <b>x</b> '
+                                                b'<!--  note  --><pre> a   b </pre><textarea>\n  x  y</textarea> </div>')
+
+        def test_compressed_response(self):
+            import gzip
+            client = current_app.test_client()
+            plain = client.get('/')
+            compressed = client.get('/', headers={'Accept-Encoding': 'gzip'})
+            self.assertEqual(compressed.headers['Content-Encoding'], 'gzip')
+            self.assertIn('Accept-Encoding', compressed.headers['Vary'])
+            self.assertEqual(gzip.decompress(compressed.data), plain.data)
+
+    # قاعدة مؤقتة تُبنى بالترحيلات فقط (flask db upgrade)
+    class MigratedDatabaseTests(unittest.TestCase):
+        @classmethod
+        def setUpClass(cls):
+            import os
+            import tempfile
+
+            from flask_migrate import upgrade
+
+            from . import create_app
+            from .database import init_migrations
+
+            cls.directory = tempfile.TemporaryDirectory()
+            cls.migrated = create_app({
+                'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(cls.directory.name, 'migrated.db'),
+            })
+            init_migrations(cls.migrated)
+            with cls.migrated.app_context():
+                upgrade()
+
+        @classmethod
+        def tearDownClass(cls):
+            # تسجيل نشاط المستخدمين يُكتب في الخلفية: ينتهي قبل حذف القاعدة
+            for coalescer in cls.migrated.extensions['write_coalescers'].values():
+                coalescer.flush(timeout=10)
+            with cls.migrated.app_context():
+                for engine in db.engines.values():
+                    engine.dispose()
+            cls.directory.cleanup()
+
+        def login(self, username, role='admin'):
+            from .models import User
+
+            with self.migrated.app_context():
+                user = User(username=username, role=role)
+                user.set_password(username)
+                db.session.add(user)
+                db.session.commit()
+            client = self.migrated.test_client()
+            client.post('/login', data={'username': username, 'password': username})
+            return client
+
+        def pause_before_attendance_upsert(self, parties):
+            # كل كاتب ينتظر الآخرين قبل upsert الحضور: لو قُرئت الحالات السابقة قبل قفل الكتابة لقرأ الجميع نفس
+            # الحالة. مع القفل ينتظر الثاني القفل، فتنتهي مهلة الحاجز ويكمل الأول
+            import threading
+            from unittest import mock
+
+            from . import rollups
+
+            barrier = threading.Barrier(parties, timeout=1)
+            original = rollups.upsert
+            def paused_upsert(table, *args, **kwargs):
+                if table is rollups.Attendance.__table__:
+                    try:
+                        barrier.wait()
+                    except threading.BrokenBarrierError:
+                        pass
+                return original(table, *args, **kwargs)
+            return mock.patch.object(rollups, 'upsert', paused_upsert)
+
+        def run_concurrently(self, *functions):
+            import threading
+
+            results = [None] * len(functions)
+            def run(index):
+                results[index] = functions[index]()
+            threads = [threading.Thread(target=run, args=(index,)) for index in range(len(functions))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return results
+
+    # التحقق من أن الاستعلامات الساخنة تستخدم فهارسها: الخطة تؤخذ من SQL الذي تنفذه الصفحة فعلاً
+    class MigrationTests(MigratedDatabaseTests):
+        @classmethod
+        def setUpClass(cls):
+            super().setUpClass()
+            from datetime import date
+
+            from .models import Student, User
+
+            with cls.migrated.app_context():
+                admin = User(username='planner', role='admin')
+                admin.set_password('planner')
+                db.session.add(admin)
+                db.session.add(Student(full_name='طالب', birth_date=date(2015, 1, 1), stage='الأول', section='أ'))
+                db.session.commit()
+            cls.client = cls.migrated.test_client()
+            cls.client.post('/login', data={'username': 'planner', 'password': 'planner'})
+
+        def plans(self, path):
+            from sqlalchemy import event
+            from sqlalchemy.engine import Engine
+
+            statements = []
+            def record(conn, cursor, statement, parameters, context, executemany):
+                if statement.lstrip().upper().startswith('SELECT'):
+                    statements.append((statement, parameters))
+            # صفحات العرض تقرأ من محرك القراءة، فالاستماع على كل المحركات
+            event.listen(Engine, 'before_cursor_execute', record)
+            try:
+                response = self.client.get(path)
+            finally:
+                event.remove(Engine, 'before_cursor_execute', record)
+            self.assertEqual(response.status_code, 200)
+            with self.migrated.app_context():
+                connection = db.session.connection()
+                return [' | '.join(row[-1] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement,
+                                                                                 parameters))
+                        for statement, parameters in statements]
+
+        def assertUsesIndex(self, path, table, index):
+            plans = [plan for plan in self.plans(path) if f' {table} ' in plan + ' ']
+            self.assertTrue(plans, f"{path} لم ينفذ استعلاماً على {table}")
+            self.assertTrue(any(f'INDEX {index} ' in plan + ' ' for plan in plans), plans)
+
+        def test_attendance_cursor_page(self):
+            self.assertUsesIndex('/attendance/list', 'attendance', 'ix_attendance_date_id')
+            self.assertUsesIndex('/attendance/list?cursor=2024-01-01_5', 'attendance', 'ix_attendance_date_id')
+
+        def test_attendance_filters(self):
+            self.assertUsesIndex('/attendance/list?student_id=1', 'attendance', 'ix_attendance_student_date_id')
+            self.assertUsesIndex('/attendance/list?teacher_id=1', 'attendance', 'ix_attendance_teacher_date_id')
+            self.assertUsesIndex('/attendance/list?status=absent', 'attendance', 'ix_attendance_status_date_id')
+
+        def test_weekly_roll_call(self):
+            path = '/attendance/weekly?stage=الأول&section=أ&week_date=2024-01-01'
+            self.assertUsesIndex(path, 'student', 'ix_student_stage_section')
+            # الغيابات المسجلة لحصة في يوم يخدمها فهرس القيد الفريد (date, period, student_id)
+            self.assertUsesIndex(path, 'attendance', 'sqlite_autoindex_attendance_1')
+
+        def test_attachments_by_owner(self):
+            self.assertUsesIndex('/student/list', 'attachment', 'ix_attachment_kind_owner')
+
+        def test_inbox(self):
+            self.assertUsesIndex('/communication/inbox', 'message', 'ix_message_receiver_timestamp')
+
+        def test_notifications(self):
+            self.assertUsesIndex('/communication/notifications', 'notification', 'ix_notification_user_created')
+
+    # المسحات المتزامنة تُكتب في دفعات أقل من عدد الطلبات، وكل طلب يُؤكَّد بعد commit دفعته
+    class ScanTests(MigratedDatabaseTests):
+        def test_concurrent_scans_are_coalesced(self):
+            import threading
+            from datetime import date
+
+            from .models import Attendance, Student, User
+
+            with self.migrated.app_context():
+                teacher = User(username='scanner', role='teacher')
+                teacher.set_password('scanner')
+                db.session.add(teacher)
+                db.session.add_all(Student(full_name=f'طالب {i}', birth_date=date(2015, 1, 1), stage='الأول',
+                                           section='أ') for i in range(40))
+                db.session.commit()
+                student_ids = [sid for (sid,) in db.session.query(Student.id)]
+            client = self.migrated.test_client()
+            client.post('/login', data={'username': 'scanner', 'password': 'scanner'})
+            statuses = []
+            def scan(ids):
+                for sid in ids:
+                    statuses.append(client.post('/attendance/scan', json={'student_id': sid}).status_code)
+            threads = [threading.Thread(target=scan, args=(student_ids[i::8],)) for i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(statuses, [200] * len(student_ids))
+            stats = self.migrated.extensions['write_coalescers']['attendance_scans'].stats
+            self.assertEqual(stats['items'], len(student_ids))
+            self.assertLess(stats['batches'], len(student_ids))
+            with self.migrated.app_context():
+                self.assertEqual(Attendance.query.filter_by(date=date.today()).count(), len(student_ids))
+            self.assertEqual(client.post('/attendance/scan', json={'student_id': 0}).status_code, 404)
+
+        def test_same_scan_on_two_workers(self):
+            # كل عامل gunicorn له WriteCoalescer واتصالاته الخاصة: تطبيقان على نفس القاعدة يمثلان عاملين
+            from datetime import date
+
+            from . import create_app
+            from .models import Attendance, Student, StudentAttendanceCounter
+
+            other = create_app({'SQLALCHEMY_DATABASE_URI': self.migrated.config['SQLALCHEMY_DATABASE_URI']})
+            try:
+                first = self.login('two-workers', 'teacher')
+                second = other.test_client()
+                second.post('/login', data={'username': 'two-workers', 'password': 'two-workers'})
+                with self.migrated.app_context():
+                    student = Student(full_name='طالب', birth_date=date(2015, 1, 1), stage='الخامس', section='ب')
+                    db.session.add(student)
+                    db.session.commit()
+                    student_id = student.id
+                scans = [lambda client=client: client.post('/attendance/scan', json={'student_id': student_id}).status_code
+                         for client in (first, second)]
+                with self.pause_before_attendance_upsert(2):
+                    self.assertEqual(self.run_concurrently(*scans), [200, 200])
+            finally:
+                for coalescer in other.extensions['write_coalescers'].values():
+                    coalescer.flush(timeout=10)
+                with other.app_context():
+                    for engine in db.engines.values():
+                        engine.dispose()
+            with self.migrated.app_context():
+                self.assertEqual(Attendance.query.filter_by(student_id=student_id).count(), 1)
+                counter = db.session.get(StudentAttendanceCounter, student_id)
+                self.assertEqual((counter.present, counter.absent), (1, 0))
+
+    # التجميعات المحدَّثة مع كل كتابة تساوي إعادة بنائها من جدول الحضور
+    class RollupTests(MigratedDatabaseTests):
+        def test_incremental_rollups_match_rebuild(self):
+            from datetime import date
+
+            from .models import (AttendanceCube, ClassDailyAttendance, Student, StudentAttendanceCounter,
+                                 StudentDailyAttendance, Teacher)
+
+            client = self.login('rollup-admin')
+            with self.migrated.app_context():
+                students = [Student(full_name=f'طالب {i}', birth_date=date(2015, 1, 1), stage='الأول',
+                                    section='أ' if i < 3 else 'ب') for i in range(5)]
+                teacher = Teacher(full_name='مدرس', specialization='رياضيات')
+                db.session.add_all(students + [teacher])
+                db.session.commit()
+                ids = [student.id for student in students]
+                teacher_id = teacher.id
+
+            def add(student_id, day, period, status):
+                response = client.post('/attendance/add', data={'record_type': 'student', 'student_id': student_id,
+                                                                 'date': day, 'period': period, 'status': status})
+                self.assertEqual(response.status_code, 302)
+
+            add(ids[0], '2025-10-06', '1', 'absent')
+            add(ids[0], '2025-10-06', '2', 'present')
+            add(ids[0], '2025-10-06', '1', 'present')
+            add(ids[3], '2025-10-07', 'نشاط', 'absent')
+            add(ids[3], '2025-10-07', 'نشاط', 'absent')
+            client.post('/attendance/add', data={'record_type': 'teacher', 'teacher_id': teacher_id,
+                                                 'date': '2025-10-06', 'period': '1', 'status': 'absent'})
+            for absent in ([ids[1]], [ids[2]], [ids[2]]):
+                response = client.post('/attendance/rollcall', json={'stage': 'الأول', 'section': 'أ',
+                                                                     'date': '2025-10-08', 'period': '3',
+                                                                     'absent': absent})
+                self.assertEqual(response.status_code, 200)
+
+            with self.migrated.app_context():
+                def snapshot():
+                    return {model.__tablename__: sorted(tuple(getattr(row, column.key) for column in model.__table__.c)
+                                                        for row in model.query)
+                            for model in (StudentDailyAttendance, ClassDailyAttendance, StudentAttendanceCounter,
+                                          AttendanceCube)}
+
+                incremental = snapshot()
+                self.assertEqual([row for row in incremental['student_attendance_counter'] if row[0] in ids],
+                                 [(ids[0], 3, 0), (ids[1], 1, 0), (ids[2], 0, 1), (ids[3], 0, 1)])
+                rebuild_attendance_rollups()
+                db.session.commit()
+                self.assertEqual(snapshot(), incremental)
+
+        def test_concurrent_adds_count_once(self):
+            from datetime import date
+
+            from .models import Attendance, Student, StudentAttendanceCounter, StudentDailyAttendance
+
+            clients = [self.login(f'concurrent-add-{i}', 'teacher') for i in range(2)]
+            with self.migrated.app_context():
+                student = Student(full_name='طالب', birth_date=date(2015, 1, 1), stage='الرابع', section='أ')
+                db.session.add(student)
+                db.session.commit()
+                student_id = student.id
+            form = {'record_type': 'student', 'student_id': student_id, 'date': '2025-10-14', 'period': '2',
+                    'status': 'absent'}
+            adds = [lambda client=client: client.post('/attendance/add', data=form).status_code for client in clients]
+            with self.pause_before_attendance_upsert(2):
+                self.assertEqual(self.run_concurrently(*adds), [302, 302])
+            with self.migrated.app_context():
+                self.assertEqual(Attendance.query.filter_by(student_id=student_id).count(), 1)
+                counter = db.session.get(StudentAttendanceCounter, student_id)
+                daily = db.session.get(StudentDailyAttendance, (student_id, date(2025, 10, 14)))
+                self.assertEqual([(counter.present, counter.absent), (daily.present, daily.absent)], [(0, 1)] * 2)
+
+    # إعادة تسجيل الشعبة لا تكرر السجلات، وإعادة الإرسال بقائمة غياب مختلفة تعدّل السجلات نفسها
+    class RollCallTests(MigratedDatabaseTests):
+        def test_roll_call_is_idempotent(self):
+            from datetime import date
+
+            from .models import Attendance, ClassDailyAttendance, Student
+
+            client = self.login('rollcall-teacher', 'teacher')
+            day = date(2025, 10, 9)
+            with self.migrated.app_context():
+                students = [Student(full_name=f'طالب {i}', birth_date=date(2015, 1, 1), stage='الثاني', section='ج')
+                            for i in range(4)]
+                db.session.add_all(students)
+                db.session.commit()
+                ids = [student.id for student in students]
+
+            def recorded():
+                with self.migrated.app_context():
+                    rows = Attendance.query.filter_by(date=day, period='2').all()
+                    daily = db.session.get(ClassDailyAttendance, ('الثاني', 'ج', day))
+                    return (len(rows), {(row.student_id, row.reason) for row in rows if row.status == 'absent'},
+                            (daily.present, daily.absent))
+
+            payload = {'stage': 'الثاني', 'section': 'ج', 'date': day.isoformat(), 'period': '2',
+                       'absent': [ids[0]], 'reasons': {str(ids[0]): 'مرض'}}
+            for _ in range(2):
+                response = client.post('/attendance/rollcall', json=payload)
+                self.assertEqual(response.get_json(), {'students': 4, 'absent': 1, 'present': 3})
+                self.assertEqual(recorded(), (4, {(ids[0], 'مرض')}, (3, 1)))
+            response = client.post('/attendance/weekly', data={'stage': 'الثاني', 'section': 'ج', 'period': '2',
+                                                               'week_date': day.isoformat(), 'absent': [str(ids[1])]})
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual(recorded(), (4, {(ids[1], '')}, (3, 1)))
+            self.assertEqual(client.post('/attendance/rollcall', json={'stage': 'الثاني'}).status_code, 400)
+
+        def test_concurrent_double_submit(self):
+            from datetime import date
+
+            from .models import Attendance, ClassDailyAttendance, Student, StudentAttendanceCounter
+
+            client = self.login('double-submit', 'teacher')
+            day = date(2025, 10, 13)
+            with self.migrated.app_context():
+                students = [Student(full_name=f'طالب {i}', birth_date=date(2015, 1, 1), stage='الثالث', section='د')
+                            for i in range(3)]
+                db.session.add_all(students)
+                db.session.commit()
+                ids = [student.id for student in students]
+            payload = {'stage': 'الثالث', 'section': 'د', 'date': day.isoformat(), 'period': '1', 'absent': [ids[0]]}
+            submit = lambda: client.post('/attendance/rollcall', json=payload).status_code
+            with self.pause_before_attendance_upsert(2):
+                self.assertEqual(self.run_concurrently(submit, submit), [200, 200])
+            with self.migrated.app_context():
+                self.assertEqual(Attendance.query.filter_by(date=day).count(), 3)
+                daily = db.session.get(ClassDailyAttendance, ('الثالث', 'د', day))
+                self.assertEqual((daily.present, daily.absent), (2, 1))
+                counters = {c.student_id: (c.present, c.absent) for c in StudentAttendanceCounter.query.filter(
+                    StudentAttendanceCounter.student_id.in_(ids))}
+                self.assertEqual(counters, {ids[0]: (0, 1), ids[1]: (1, 0), ids[2]: (1, 0)})
+
+    # أرشفة سنة مغلقة تنقل سجلاتها إلى جدولها دون تغيير التجميعات، وتبقى ظاهرة عند البحث بتاريخها
+    class ArchiveTests(MigratedDatabaseTests):
+        def test_archive_year(self):
+            from datetime import date
+
+            from .archive import archive_table
+            from .models import Attendance, Student, StudentAttendanceCounter
+            from .rollups import save_attendance_batch
+
+            client = self.login('archive-admin')
+            with self.migrated.app_context():
+                student = Student(full_name='طالب قديم', birth_date=date(2010, 1, 1), stage='الأول', section='أ')
+                db.session.add(student)
+                db.session.commit()
+                save_attendance_batch([
+                    {'student_id': student.id, 'date': date(2023, 10, 2), 'period': 'قديمة', 'status': 'absent',
+                     'reason': ''},
+                    {'student_id': student.id, 'date': date(2024, 3, 4), 'period': '1', 'status': 'present',
+                     'reason': ''},
+                    {'student_id': student.id, 'date': date(2025, 10, 6), 'period': '1', 'status': 'absent',
+                     'reason': ''},
+                ])
+                db.session.commit()
+                student_id = student.id
+
+            def counter():
+                with self.migrated.app_context():
+                    row = db.session.get(StudentAttendanceCounter, student_id)
+                    return row.present, row.absent
+
+            def archive_year(year):
+                # flask test يعمل داخل سياق التطبيق الأساسي؛ سياق قاعدة الاختبار يمنع الأمر من الكتابة في instance
+                with self.migrated.app_context():
+                    return self.migrated.test_cli_runner().invoke(args=['archive-year', str(year)]).output
+
+            before = counter()
+            self.assertIn('تمت أرشفة 2 سجل', archive_year(2023))
+            self.assertIn('مؤرشفة بالفعل', archive_year(2023))
+            self.assertIn('السنة الدراسية الحالية', archive_year(date.today().year))
+            with self.migrated.app_context():
+                self.assertEqual([row.date for row in Attendance.query], [date(2025, 10, 6)])
+                archived = db.session.execute(db.select(archive_table(2023).c.date)).scalars().all()
+                self.assertEqual(sorted(archived), [date(2023, 10, 2), date(2024, 3, 4)])
+                self.assertRaises(ValueError, save_attendance_batch, [
+                    {'student_id': student_id, 'date': date(2024, 3, 5), 'period': '1', 'status': 'present',
+                     'reason': ''}])
+                db.session.rollback()
+            self.assertEqual(counter(), before)
+            self.assertNotIn('قديمة', client.get('/attendance/list').get_data(as_text=True))
+            page = client.get('/attendance/list?from=2023-09-01&to=2025-12-31').get_data(as_text=True)
+            self.assertIn('2023-10-02', page)
+            self.assertIn('2025-10-06', page)
+            with self.migrated.app_context():
+                rebuild_attendance_rollups()
+                db.session.commit()
+            self.assertEqual(counter(), before)
+
+    # جزء الصفحة المخزَّن يُبطَل عند commit يغيّر جدوله في الذاكرتين، وتسجيل النشاط لا يرفع أي إصدار
+    class CacheTests(MigratedDatabaseTests):
+        def test_fragment_invalidated_on_commit(self):
+            import os
+
+            from .caching import MemoryCacheBackend, SQLiteCacheBackend, cache
+            from .models import Teacher
+
+            client = self.login('cache-admin')
+            backends = [MemoryCacheBackend(64), SQLiteCacheBackend(os.path.join(self.directory.name, 'cache.sqlite'), 64)]
+            previous = cache.backend
+            try:
+                for number, backend in enumerate(backends):
+                    cache.backend = backend
+                    client.get('/teacher/list')
+                    hits = cache.hits
+                    self.assertEqual(client.get('/teacher/list').status_code, 200)
+                    self.assertEqual(cache.hits, hits + 1)
+                    with self.migrated.app_context():
+                        db.session.add(Teacher(full_name=f'مدرس جديد {number}'))
+                        db.session.commit()
+                    self.assertIn(f'مدرس جديد {number}', client.get('/teacher/list').get_data(as_text=True))
+                    self.assertEqual(cache.hits, hits + 1)
+            finally:
+                cache.backend = previous
+
+        def test_user_activity_is_unversioned(self):
+            from .caching import MemoryCacheBackend, cache
+            from .identity import save_user_activity
+            from .models import TableVersion, User
+
+            self.login('activity-user', 'teacher')
+            previous = cache.backend
+            cache.backend = MemoryCacheBackend(64)
+            try:
+                with self.migrated.app_context():
+                    user_id = User.query.filter_by(username='activity-user').one().id
+                    before = sorted((row.table_name, row.version) for row in TableVersion.query)
+                    save_user_activity([user_id])
+                    db.session.commit()
+                    self.assertEqual(sorted((row.table_name, row.version) for row in TableVersion.query), before)
+                    self.assertEqual(cache.backend.tag_versions(['user_activity']), [0])
+            finally:
+                cache.backend = previous
+
+    # الصفحة غير المتغيرة تُرجع 304، وأي commit على جدولها أو تغيير المستخدم يعطي ETag جديداً
+    class ConditionalGetTests(MigratedDatabaseTests):
+        def test_etag_revalidation(self):
+            from .models import Notification, User
+
+            client = self.login('etag-user', 'teacher')
+            other = self.login('etag-other', 'teacher')
+            # الصفحة الأولى بعد الدخول تحمل رسالة flash فلا يُرسل لها ETag
+            self.assertNotIn('ETag', client.get('/communication/notifications').headers)
+            other.get('/communication/notifications')
+            first = client.get('/communication/notifications')
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(first.headers['Cache-Control'], 'private, no-cache')
+            etag = first.headers['ETag']
+            cached = client.get('/communication/notifications', headers={'If-None-Match': etag})
+            self.assertEqual(cached.status_code, 304)
+            self.assertEqual(cached.data, b'')
+            self.assertNotEqual(other.get('/communication/notifications').headers['ETag'], etag)
+            with self.migrated.app_context():
+                user_id = User.query.filter_by(username='etag-user').one().id
+                db.session.add(Notification(title='تنبيه', message='اجتماع أولياء الأمور', user_id=user_id))
+                db.session.commit()
+            changed = client.get('/communication/notifications', headers={'If-None-Match': etag})
+            self.assertEqual(changed.status_code, 200)
+            self.assertIn('اجتماع أولياء الأمور', changed.get_data(as_text=True))
+            self.assertNotEqual(changed.headers['ETag'], etag)
+
+    # الطلبات المتتالية تأخذ هوية المستخدم من الذاكرة، وتغيير الدور يظهر في الطلب التالي مباشرة
+    class IdentityCacheTests(MigratedDatabaseTests):
+        def test_identity_cache(self):
+            from .identity import user_identity_stats
+            from .models import User
+
+            client = self.login('identity-user', 'teacher')
+            client.get('/')
+            misses = user_identity_stats['misses']
+            for _ in range(3):
+                client.get('/')
+            self.assertEqual(user_identity_stats['misses'], misses)
+            self.assertEqual(client.get('/admin/dashboard').status_code, 302)
+            with self.migrated.app_context():
+                User.query.filter_by(username='identity-user').one().role = 'admin'
+                db.session.commit()
+            self.assertEqual(client.get('/admin/dashboard').status_code, 200)
+            self.assertEqual(user_identity_stats['misses'], misses + 1)
+
+    # المحاولات الزائدة لنفس الاسم تُرفض بـ 429 قبل التجزئة، والبصمة القديمة تُرقّى عند الدخول الناجح
+    class LoginTests(MigratedDatabaseTests):
+        def test_username_rate_limit(self):
+            self.login('limited-user', 'teacher')
+            client = self.migrated.test_client()
+            capacity = self.migrated.config['LOGIN_RATE_LIMIT_USERNAME'][0]
+            # login() استهلك محاولة واحدة من دلو الاسم
+            for _ in range(capacity - 1):
+                response = client.post('/login', data={'username': 'limited-user', 'password': 'wrong'})
+                self.assertEqual(response.status_code, 200)
+            response = client.post('/login', data={'username': 'Limited-User', 'password': 'limited-user'})
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response.headers['Retry-After'], '30')
+            self.assertEqual(client.post('/login', data={'username': 'another-user', 'password': 'x'}).status_code, 200)
+
+        def test_rehash_on_login(self):
+            from .models import User
+
+            rounds = self.migrated.config['BCRYPT_LOG_ROUNDS']
+            with self.migrated.app_context():
+                self.migrated.config['BCRYPT_LOG_ROUNDS'] = 4
+                try:
+                    user = User(username='old-hash', role='teacher')
+                    user.set_password('old-hash')
+                    db.session.add(user)
+                    db.session.commit()
+                finally:
+                    self.migrated.config['BCRYPT_LOG_ROUNDS'] = rounds
+            response = self.migrated.test_client().post('/login', data={'username': 'old-hash', 'password': 'old-hash'})
+            self.assertEqual(response.status_code, 302)
+            with self.migrated.app_context():
+                self.assertFalse(User.query.filter_by(username='old-hash').one().needs_rehash())
+
+    # تكرار نفس الدفعة لا يضيف سجلات ولا يغيّر التجميعات، وأمر upsert يُبنى لكل قاعدة مدعومة
+    class UpsertTests(MigratedDatabaseTests):
+        def test_repeated_batch_is_idempotent(self):
+            from datetime import date
+
+            from .models import Attendance, ClassDailyAttendance, Student, StudentAttendanceCounter
+            from .rollups import save_attendance_batch
+
+            day = date(2025, 10, 6)
+            with self.migrated.app_context():
+                students = [Student(full_name=f'طالب {i}', birth_date=date(2015, 1, 1), stage='الثاني', section='ب')
+                            for i in range(3)]
+                db.session.add_all(students)
+                db.session.commit()
+                records = [{'student_id': student.id, 'date': day, 'period': '1', 'reason': '',
+                            'status': 'absent' if i == 0 else 'present'} for i, student in enumerate(students)]
+
+                def totals():
+                    counters = sorted((c.student_id, c.present, c.absent) for c in StudentAttendanceCounter.query)
+                    daily = db.session.get(ClassDailyAttendance, ('الثاني', 'ب', day))
+                    return Attendance.query.count(), counters, (daily.present, daily.absent)
+
+                for _ in range(2):
+                    save_attendance_batch(records)
+                    db.session.commit()
+                    self.assertEqual(totals()[0], 3)
+                    self.assertEqual(totals()[2], (2, 1))
+                first = totals()
+                save_attendance_batch([dict(records[0], status='present')])
+                db.session.commit()
+                self.assertEqual(totals()[2], (3, 0))
+                self.assertEqual(totals()[0], first[0])
+
+        def test_dialects(self):
+            from unittest import mock
+
+            from sqlalchemy.dialects import mssql, mysql, postgresql, sqlite
+
+            from .models import StudentAttendanceCounter
+            from .rollups import upsert
+
+            table = StudentAttendanceCounter.__table__
+            expected = {
+                sqlite: 'ON CONFLICT (student_id) DO UPDATE SET present = (student_attendance_counter.present + excluded.present)',
+                postgresql: 'ON CONFLICT (student_id) DO UPDATE SET present = (student_attendance_counter.present + excluded.present)',
+                mysql: 'ON DUPLICATE KEY UPDATE present = (student_attendance_counter.present + VALUES(present))',
+            }
+            with self.migrated.app_context():
+                for module, sql in expected.items():
+                    with mock.patch.object(db.session, 'get_bind', return_value=mock.Mock(dialect=module.dialect())):
+                        stmt = upsert(table, ['student_id'], lambda excluded: {'present': table.c.present + excluded.present})
+                        self.assertIn(sql, str(stmt.compile(dialect=module.dialect())))
+                with mock.patch.object(db.session, 'get_bind', return_value=mock.Mock(dialect=mssql.dialect())):
+                    self.assertRaises(NotImplementedError, upsert, table, ['student_id'])
+
+    # الخريطة البتية تطابق سجلات الحصص المرقمة، والعدادات تشمل كل السجلات، قبل إعادة البناء وبعدها
+    class BitmapTests(MigratedDatabaseTests):
+        def test_bitmap_matches_counters(self):
+            from datetime import date
+
+            from .models import Attendance, Student, StudentAttendanceCounter
+            from .rollups import BITMAP_SLOTS, save_attendance_batch, student_term_stats, term_of
+
+            day = date(2025, 10, 6)
+            with self.migrated.app_context():
+                student = Student(full_name='طالب', birth_date=date(2015, 1, 1), stage='الأول', section='أ')
+                db.session.add(student)
+                db.session.commit()
+                def record(day, period, status):
+                    return {'student_id': student.id, 'date': day, 'period': period, 'status': status, 'reason': ''}
+                # حصة نصية غائبة ثم مسح دخول حاضر في اليوم نفسه لا يغيّران الخريطة
+                save_attendance_batch([record(day, 'أسبوعي', 'absent'), record(day, 'الدخول', 'present'),
+                                       record(day, '1', 'present'), record(day, '2', 'present'),
+                                       record(date(2025, 10, 7), '1', 'absent')])
+                save_attendance_batch([record(day, '2', 'absent'), record(day, 'الدخول', 'absent')])
+                db.session.commit()
+
+                def snapshot():
+                    stats = student_term_stats(student.id, term_of(day)[0])
+                    counter = db.session.get(StudentAttendanceCounter, student.id)
+                    numbered = Attendance.query.filter(Attendance.student_id == student.id,
+                                                       Attendance.period.in_(BITMAP_SLOTS))
+                    self.assertEqual(stats['recorded_periods'], numbered.count())
+                    self.assertEqual(stats['absent_periods'], numbered.filter_by(status='absent').count())
+                    rows = Attendance.query.filter_by(student_id=student.id)
+                    self.assertEqual(counter.absent, rows.filter_by(status='absent').count())
+                    self.assertEqual(counter.present, rows.filter_by(status='present').count())
+                    return stats, (counter.present, counter.absent)
+
+                stats, counts = snapshot()
+                self.assertEqual((stats['absent_periods'], stats['absent_days'], stats['longest_streak']), (2, 2, 2))
+                self.assertEqual(counts, (1, 4))
+                rebuild_attendance_rollups()
+                self.assertEqual(snapshot(), (stats, counts))
+
+    # الملفات المرفوعة: التقارير الطبية للإدارة وللطالب المرتبط بالسجل فقط، والمحتوى المكرر يُخزَّن مرة واحدة
+    class UploadTests(MigratedDatabaseTests):
+        def test_medical_reports_are_private(self):
+            import io
+            import os
+            import re
+
+            from PIL import Image
+
+            from .models import Attachment, Student, Upload, User
+
+            self.migrated.config['UPLOAD_FOLDER'] = os.path.join(self.directory.name, 'uploads')
+            image = io.BytesIO()
+            Image.new('RGB', (80, 60), 'red').save(image, 'PNG')
+            with self.migrated.app_context():
+                for username, role in (('up-admin', 'admin'), ('up-teacher', 'teacher'), ('up-student', 'student')):
+                    user = User(username=username, role=role)
+                    user.set_password(username)
+                    db.session.add(user)
+                db.session.commit()
+            clients = {}
+            for username in ('up-admin', 'up-teacher', 'up-student'):
+                clients[username] = self.migrated.test_client()
+                clients[username].post('/login', data={'username': username, 'password': username})
+            response = clients['up-admin'].post('/student/add', content_type='multipart/form-data', data={
+                'full_name': 'طالب', 'birth_date': '2015-01-01', 'stage': 'الأول', 'section': 'أ',
+                'photo': (io.BytesIO(image.getvalue()), 'photo.png'),
+                'medical_scans': [(io.BytesIO(b'%PDF-1.4 report'), 'report.pdf'),
+                                  (io.BytesIO(image.getvalue()), 'scan.png')],
+            })
+            self.assertEqual(response.status_code, 302)
+            with self.migrated.app_context():
+                student_id = Student.query.filter_by(full_name='طالب').one().id
+                User.query.filter_by(username='up-student').one().student_id = student_id
+                db.session.commit()
+                self.assertEqual(Attachment.query.count(), 3)
+                self.assertEqual(Upload.query.count(), 2)
+                scan = Upload.query.filter_by(extension='png').one().sha256
+                report = Upload.query.filter_by(extension='pdf').one().sha256
+
+            def links(username):
+                html = clients[username].get('/student/list').get_data(as_text=True)
+                return set(re.findall(r'(?:src|href)="(/uploads/[^"]+)"', html))
+            report_url, thumbnail = f'/uploads/{report}.pdf', f'/uploads/thumbs/{scan}.64.webp'
+            self.assertIn(report_url, links('up-admin'))
+            self.assertIn(report_url, links('up-student'))
+            # الصورة نفسها مرفوعة كصورة شخصية وكتقرير طبي فتبقى مصغّرتها ظاهرة للجميع
+            self.assertEqual(links('up-teacher'), {thumbnail})
+            self.assertEqual(clients['up-admin'].get(report_url).status_code, 200)
+            self.assertEqual(clients['up-student'].get(report_url).status_code, 200)
+            self.assertEqual(clients['up-teacher'].get(report_url).status_code, 403)
+            self.assertEqual(clients['up-teacher'].get(thumbnail).status_code, 200)
+            self.assertEqual(clients['up-admin'].get(f'/uploads/{report}.png').status_code, 404)
+            self.assertEqual(clients['up-admin'].get(f'/uploads/{"0" * 64}.pdf').status_code, 404)
+
+    # قياس الطلبات: ترويسة Server-Timing، سجل /admin/perf، وعدم تكرار استعلام الطالب في قائمة الرسوم
+    class ProfilerTests(MigratedDatabaseTests):
+        def test_profiled_requests(self):
+            from datetime import date
+
+            from .models import Fee, Student, User
+
+            with self.migrated.app_context():
+                admin = User(username='perf-admin', role='admin')
+                admin.set_password('perf-admin')
+                db.session.add(admin)
+                for i in range(10):
+                    db.session.add(Fee(amount=100, status='unpaid', student=Student(
+                        full_name=f'طالب {i}', birth_date=date(2015, 1, 1), stage='الأول', section='أ')))
+                db.session.commit()
+            self.migrated.config['PROFILER_HEADERS'] = True
+            try:
+                client = self.migrated.test_client()
+                client.post('/login', data={'username': 'perf-admin', 'password': 'perf-admin'})
+                response = client.get('/finance/list')
+                self.assertIn('sql;dur=', response.headers['Server-Timing'])
+                profile = self.migrated.extensions['request_profiles'][-1]
+                self.assertEqual(profile['endpoint'], 'finance.list_fees')
+                self.assertEqual(profile['repeated'], [])
+                self.assertLess(profile['queries'], 5)
+                self.assertEqual(client.get('/admin/perf').status_code, 200)
+            finally:
+                self.migrated.config['PROFILER_HEADERS'] = False
+
+    # /metrics بصيغة Prometheus: قراءة المقاييس بعميل محلي، وجمعها من عدة عمليات عبر PROMETHEUS_MULTIPROC_DIR
+    class MetricsTests(MigratedDatabaseTests):
+        def scrape(self, client):
+            from prometheus_client.parser import text_string_to_metric_families
+
+            response = client.get('/metrics')
+            self.assertEqual(response.status_code, 200)
+            return {family.name: family for family in text_string_to_metric_families(response.get_data(as_text=True))}
+
+        def request_count(self, families, endpoint):
+            return sum(sample.value for sample in families['schoolms_http_requests'].samples
+                       if sample.name.endswith('_total') and sample.labels['endpoint'] == endpoint)
+
+        def test_scrape(self):
+            import time
+
+            from .models import User
+
+            with self.migrated.app_context():
+                user = User(username='metrics-admin', role='admin')
+                user.set_password('metrics-admin')
+                db.session.add(user)
+                db.session.commit()
+            client = self.migrated.test_client()
+            client.post('/login', data={'username': 'metrics-admin', 'password': 'metrics-admin'})
+            before = self.scrape(client)
+            client.get('/admin/dashboard')
+            client.get('/admin/dashboard')
+            families = self.scrape(client)
+            for name in ('schoolms_http_request_duration_seconds', 'schoolms_db_query_duration_seconds',
+                         'schoolms_pdf_render_duration_seconds', 'schoolms_cache_requests', 'schoolms_active_sessions'):
+                self.assertIn(name, families)
+            self.assertEqual(self.request_count(families, 'main.admin_dashboard')
+                             - self.request_count(before, 'main.admin_dashboard'), 2)
+            # تسجيل النشاط يمر عبر WriteCoalescer دون انتظار
+            for _ in range(50):
+                if self.scrape(client)['schoolms_active_sessions'].samples[0].value >= 1:
+                    break
+                time.sleep(0.02)
+            self.assertEqual(self.scrape(client)['schoolms_active_sessions'].samples[0].value, 1)
+            # بدون رمز يُرفض الطلب من جهاز آخر، ومع الرمز يلزم إرساله
+            remote = {'REMOTE_ADDR': '10.0.0.5'}
+            self.assertEqual(client.get('/metrics', environ_base=remote).status_code, 403)
+            self.migrated.config['METRICS_TOKEN'] = 'scrape-token'
+            try:
+                self.assertEqual(client.get('/metrics').status_code, 403)
+                self.assertEqual(client.get('/metrics', environ_base=remote,
+                                            headers={'Authorization': 'Bearer scrape-token'}).status_code, 200)
+                self.assertEqual(client.get('/metrics', headers={'Authorization': 'Bearer scrape-token'}).status_code, 200)
+            finally:
+                self.migrated.config['METRICS_TOKEN'] = None
+
+        def test_multiprocess_aggregation(self):
+            import os
+            import subprocess
+            import sys
+            import tempfile
+
+            from prometheus_client.parser import text_string_to_metric_families
+
+            from .config import PROJECT_ROOT
+
+            # عمليتان تستقبلان طلبات (مثل عمال gunicorn) وثالثة تقرأ /metrics
+            script = (
+                "import sys\n"
+                "from schoolms import create_app\n"
+                "app = create_app({'SQLALCHEMY_DATABASE_URI': sys.argv[1]})\n"
+                "print(app.test_client().get(sys.argv[2]).get_data(as_text=True))\n"
+            )
+            with tempfile.TemporaryDirectory() as metrics_dir:
+                env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=metrics_dir)
+                uri = self.migrated.config['SQLALCHEMY_DATABASE_URI']
+                def run(path):
+                    return subprocess.run([sys.executable, '-c', script, uri, path], cwd=PROJECT_ROOT, env=env,
+                                          capture_output=True, text=True, check=True).stdout
+                run('/')
+                run('/')
+                families = {family.name: family for family in text_string_to_metric_families(run('/metrics'))}
+            self.assertEqual(self.request_count(families, 'main.index'), 2)
+
+    loader = unittest.TestLoader()
+    tests = unittest.TestSuite([loader.loadTestsFromTestCase(BasicTests),
+                                loader.loadTestsFromTestCase(CompressionTests),
+                                loader.loadTestsFromTestCase(MigrationTests),
+                                loader.loadTestsFromTestCase(ScanTests),
+                                loader.loadTestsFromTestCase(RollupTests),
+                                loader.loadTestsFromTestCase(RollCallTests),
+                                loader.loadTestsFromTestCase(ArchiveTests),
+                                loader.loadTestsFromTestCase(CacheTests),
+                                loader.loadTestsFromTestCase(ConditionalGetTests),
+                                loader.loadTestsFromTestCase(IdentityCacheTests),
+                                loader.loadTestsFromTestCase(LoginTests),
+                                loader.loadTestsFromTestCase(UpsertTests),
+                                loader.loadTestsFromTestCase(BitmapTests),
+                                loader.loadTestsFromTestCase(UploadTests),
+                                loader.loadTestsFromTestCase(ProfilerTests),
+                                loader.loadTestsFromTestCase(MetricsTests)])
+    # رمز خروج غير صفري عند الفشل حتى يوقف خط النشر (CI)
+    result = unittest.TextTestRunner(verbosity=2).run(tests)
+    if not result.wasSuccessful():
+        sys.exit(1)
+
+def init_app(app):
+    for command in (rebuild_rollups_command, build_assets_command, build_images_command,
+                    early_warning_command, archive_year_command, test):
+        app.cli.add_command(command)
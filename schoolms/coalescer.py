@@ -0,0 +1,118 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .extensions import db
+from .identity import save_user_activity
+from .rollups import save_attendance_scans
+
+logger = logging.getLogger(__name__)
+
+###############################################
+# تجميع الكتابات الصغيرة في معاملة واحدة (group commit)
+###############################################
+_FLUSH = object()
+
+class WriteCoalescer:
+    # طلبات متزامنة تضع عناصرها في طابور، وخيط خلفي واحد في كل عامل يكتبها دفعةً واحدة ثم commit واحد؛
+    # لا يحصل أي طلب على نتيجته إلا بعد نجاح commit الدفعة التي تحويه
+    def __init__(self, app, name, write_batch, max_delay, max_batch, durable=True):
+        # write_batch(items) تُستدعى داخل سياق التطبيق وتُرجع نتيجة لكل عنصر بنفس الترتيب؛
+        # النتيجة التي هي استثناء تُرفض بها العنصر وحده دون إفشال بقية الدفعة.
+        # durable=False للكتابات التي لا تحتاج مزامنة القرص عند كل commit (تُكتب على المحرك الأساسي)
+        self.app = app
+        self.name = name
+        self.write_batch = write_batch
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.durable = durable
+        self.stats = {'batches': 0, 'items': 0, 'largest_batch': 0}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+
+    def submit(self, item):
+        future = Future()
+        self._pending().put((item, future))
+        return future
+
+    def flush(self, timeout=None):
+        # ينتظر حتى تُكتب كل العناصر المرسلة قبله (قبل إغلاق قاعدة البيانات في الاختبارات مثلاً)
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+        future = Future()
+        self._queue.put((_FLUSH, future))
+        future.result(timeout=timeout)
+
+    def _pending(self):
+        # الخيط يُنشأ عند أول استخدام، ومن جديد في كل عامل بعد fork لأن الخيوط لا تنتقل مع fork
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.SimpleQueue()
+                threading.Thread(target=self._run, args=(self._queue,), name=self.name, daemon=True).start()
+                self._pid = os.getpid()
+            return self._queue
+
+    def _run(self, pending):
+        while True:
+            batch = [pending.get()]
+            # انتظار قصير بعد أول عنصر لجمع ما يصل معه؛ وما يصل أثناء commit ينضم للدفعة التالية
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(pending.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            flushes = [future for item, future in batch if item is _FLUSH]
+            batch = [entry for entry in batch if entry[0] is not _FLUSH]
+            if batch:
+                self._commit(batch)
+            for future in flushes:
+                future.set_result(None)
+
+    def _commit(self, batch):
+        try:
+            with self.app.app_context():
+                # اتصال الكتابة المؤكدة (synchronous=FULL في SQLite): التأكيد للطالب يعني أن السجل على القرص
+                # (ما لم يُنشأ بـ durable=False)
+                db.session.info['durable'] = self.durable
+                try:
+                    results = self.write_batch([item for item, _ in batch])
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    raise
+        except Exception as e:
+            if len(batch) > 1:
+                # دفعة فاشلة تُعاد عنصراً عنصراً حتى لا يُفشل عنصر واحد خاطئ بقية الطلبات
+                logger.warning("فشلت دفعة %s (%d عنصر)، إعادة المحاولة لكل عنصر: %s", self.name, len(batch), e)
+                for entry in batch:
+                    self._commit([entry])
+            else:
+                batch[0][1].set_exception(e)
+            return
+        self.stats['batches'] += 1
+        self.stats['items'] += len(batch)
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+def init_app(app):
+    config = app.config
+    app.extensions['write_coalescers'] = {
+        'attendance_scans': WriteCoalescer(
+            app, 'attendance-scans', save_attendance_scans,
+            config['ATTENDANCE_SCAN_MAX_DELAY'], config['ATTENDANCE_SCAN_MAX_BATCH'],
+        ),
+        'user_activity': WriteCoalescer(
+            app, 'user-activity', save_user_activity,
+            config['ATTENDANCE_SCAN_MAX_DELAY'], config['ATTENDANCE_SCAN_MAX_BATCH'], durable=False,
+        ),
+    }
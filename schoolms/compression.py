@@ -0,0 +1,127 @@
+import gzip
+import re
+import zlib
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+
+# ضغط brotli اختياري؛ عند غيابه يُستخدم gzip فقط
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+###############################################
+# ضغط الاستجابات وتصغير HTML (WSGI middleware)
+###############################################
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+# ما يُحافظ عليه كما هو عند التصغير: كتل pre/textarea/script/style، التعليقات، وكل وسم بسماته
+# (قيم السمات بين علامات التنصيص قد تحتوي مسافات مقصودة أو الحرف >)؛ بلا مجموعات داخلية حتى
+# يُرجع split() النص والوسوم بالتناوب
+_PRESERVED_HTML = re.compile(
+    rb'(<pre\b.*?</pre\s*>|<textarea\b.*?</textarea\s*>|<script\b.*?</script\s*>|<style\b.*?</style\s*>'
+    rb'|<!--.*?-->|<[^<>"\']*(?:(?:"[^"]*"|\'[^\']*\')[^<>"\']*)*>)',
+    re.S | re.I,
+)
+
+def _collapse_whitespace(chunk):
+    # bytes.split() يعمل بسرعة C على مسافات ASCII فقط فلا يمس حروف UTF-8
+    words = chunk.split()
+    if not words:
+        return b' ' if chunk else b''
+    leading = b' ' if chunk[:1].isspace() else b''
+    trailing = b' ' if chunk[-1:].isspace() else b''
+    return leading + b' '.join(words) + trailing
+
+def minify_html(data):
+    # المتصفح يعامل أي سلسلة مسافات في النص كمسافة واحدة، فطيّها لا يغيّر العرض
+    # (وهو يزيل مسافات الإزاحة الكثيفة في القوالب)؛ يُطوى النص بين الوسوم فقط
+    parts = _PRESERVED_HTML.split(data)
+    parts[::2] = map(_collapse_whitespace, parts[::2])
+    return b''.join(parts)
+
+class CompressionMiddleware:
+    def __init__(self, wsgi_app, config):
+        self.wsgi_app = wsgi_app
+        self.config = config
+
+    def route_options(self, path):
+        options = {'enabled': True, 'minify': True, 'streaming': None,
+                   'min_size': self.config['COMPRESSION_MIN_SIZE']}
+        # الإعدادات حسب بادئة المسار؛ البادئة الأطول تُطبق أخيراً
+        routes = self.config['COMPRESSION_ROUTES']
+        for prefix in sorted(routes, key=len):
+            if path.startswith(prefix):
+                options.update(routes[prefix])
+        return options
+
+    def choose_encoding(self, environ):
+        accepted = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and accepted.quality('br') > 0:
+            return 'br'
+        if accepted.quality('gzip') > 0:
+            return 'gzip'
+        return None
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.config['COMPRESSION_BROTLI_QUALITY'])
+        return gzip.compress(data, self.config['COMPRESSION_LEVEL'], mtime=0)
+
+    def compress_stream(self, body, encoding):
+        # الوضع المتدفق: كل جزء يُضغط ويُفرَّغ فوراً (Z_SYNC_FLUSH) فيصل للعميل دون انتظار نهاية الاستجابة
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.config['COMPRESSION_BROTLI_QUALITY'])
+            step = lambda chunk: compressor.process(chunk) + compressor.flush()
+            finish = compressor.finish
+        else:
+            compressor = zlib.compressobj(self.config['COMPRESSION_LEVEL'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            step = lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            finish = compressor.flush
+        try:
+            for chunk in body:
+                if chunk:
+                    yield step(chunk)
+            yield finish()
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+
+    def __call__(self, environ, start_response):
+        options = self.route_options(environ.get('PATH_INFO', ''))
+        if not options['enabled'] or environ['REQUEST_METHOD'] == 'HEAD':
+            return self.wsgi_app(environ, start_response)
+        captured = []
+        body = self.wsgi_app(environ, lambda status, headers, exc_info=None: captured.extend((status, headers, exc_info)))
+        status, headers, exc_info = captured
+        headers = Headers(headers)
+        if (not status.startswith('200') or 'Content-Encoding' in headers
+                or not headers.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)):
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return body
+        headers['Vary'] = ', '.join(filter(None, [headers.get('Vary'), 'Accept-Encoding']))
+        encoding = self.choose_encoding(environ)
+        streaming = options['streaming']
+        if streaming is None:
+            # استجابة بدون Content-Length هي مولّد (مثل التصدير المتدفق)
+            streaming = 'Content-Length' not in headers
+        if streaming:
+            if encoding:
+                headers['Content-Encoding'] = encoding
+                headers.pop('Content-Length', None)
+                body = self.compress_stream(body, encoding)
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return body
+        try:
+            data = b''.join(body)
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        if options['minify'] and headers.get('Content-Type', '').startswith('text/html'):
+            data = minify_html(data)
+        if encoding and len(data) >= options['min_size']:
+            data = self.compress(data, encoding)
+            headers['Content-Encoding'] = encoding
+        headers['Content-Length'] = str(len(data))
+        start_response(status, headers.to_wsgi_list(), exc_info)
+        return [data]
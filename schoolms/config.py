@@ -0,0 +1,101 @@
+import os
+
+# جذر المشروع (المجلد الذي يحوي app.py و static و images)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class Config:
+    SECRET_KEY = 'secret_key_here'
+    # قاعدة البيانات: SQLite افتراضياً، أو خادم (PostgreSQL/MySQL) عبر DATABASE_URL للمدارس الكبيرة،
+    # مع نسخة قراءة اختيارية عبر DATABASE_READER_URL (لـ SQLite تُستخدم نفس القاعدة باتصالات قراءة منفصلة)
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///school.db')
+    DATABASE_READER_URL = os.environ.get('DATABASE_READER_URL')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # مجمع الاتصالات لكل محرك (الكتابة والقراءة) في كل عامل
+    DATABASE_POOL_SIZE = 5
+    DATABASE_MAX_OVERFLOW = 10
+    DATABASE_POOL_RECYCLE = 1800
+    # إعدادات تُطبَّق على كل اتصال SQLite جديد: WAL يسمح بالقراءة أثناء الكتابة، و busy_timeout
+    # ينتظر القفل بدلاً من رفع "database is locked" فوراً
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -16000,
+        'busy_timeout': 5000,
+    }
+    # اتصال الكتابة المؤكدة (دفعات تسجيل الحضور السريع): في WAL مع NORMAL قد تضيع آخر المعاملات عند انقطاع
+    # الكهرباء، و FULL يزامن الملف عند كل commit؛ التجميع يجعل كلفته مرة لكل دفعة لا لكل طلب
+    SQLITE_DURABLE_PRAGMAS = {'synchronous': 'FULL'}
+    # عامل عمل bcrypt (تُرقّى البصمات القديمة عند الدخول)، حجم مجمع التجزئة، وحد الانتظار
+    BCRYPT_LOG_ROUNDS = 12
+    # (BCRYPT_MAX_PENDING أقل من threads في gunicorn.conf.py حتى تبقى خيوط للصفحات الأخرى)
+    BCRYPT_POOL_SIZE = 1
+    BCRYPT_MAX_PENDING = 6
+    BCRYPT_TIMEOUT = 10
+    # حد محاولات الدخول (سعة الدلو، رموز في الثانية): لكل IP (قد يشترك فيه صف كامل عبر NAT) ولكل اسم مستخدم
+    LOGIN_RATE_LIMIT_IP = (60, 2.0)
+    LOGIN_RATE_LIMIT_USERNAME = (5, 5 / 60)
+    # الشهر الذي تبدأ فيه السنة الدراسية (تُستخدم في الأرشفة)
+    SCHOOL_YEAR_START_MONTH = 9
+    # الشهر الذي يبدأ فيه الفصل الدراسي الثاني (خرائط البتات لكل فصل)
+    SECOND_TERM_START_MONTH = 2
+    # عتبات الإنذار المبكر: {عدد الأسابيع: نسبة الغياب المئوية}
+    EARLY_WARNING_THRESHOLDS = {2: 20.0, 4: 15.0, 8: 10.0}
+    EARLY_WARNING_MIN_RECORDS = 3
+    # تسجيل الحضور السريع (/attendance/scan): أقصى انتظار بالثواني لتجميع المسحات المتزامنة، أقصى حجم للدفعة،
+    # مهلة انتظار الطلب لتأكيد الكتابة، والحصة الافتراضية لمسح البوابة. الدفعة لا تجمع أكثر من الطلبات المتزامنة
+    # في العامل، أي threads في gunicorn.conf.py (مع العامل المتزامن sync تكون كل دفعة مسحاً واحداً)
+    ATTENDANCE_SCAN_MAX_DELAY = 0.005
+    ATTENDANCE_SCAN_MAX_BATCH = 500
+    ATTENDANCE_SCAN_TIMEOUT = 10
+    ATTENDANCE_SCAN_PERIOD = 'الدخول'
+    # رفع الملفات: مجلد التخزين بعنوان المحتوى، الحد الأقصى للطلب، وأحجام الصور المصغرة
+    UPLOAD_FOLDER = os.path.join(PROJECT_ROOT, 'static', 'uploads')
+    MAX_CONTENT_LENGTH = 20 * 1024 * 1024
+    UPLOAD_THUMBNAIL_SIZES = (64, 256)
+    UPLOAD_THUMBNAIL_WORKERS = 2
+    # حزم الأصول: {اسم الحزمة: ملفات من static/vendor تُدمج بالترتيب}
+    ASSET_BUNDLES = {
+        'base.css': ['bootstrap-4.5.3/bootstrap.min.css'],
+        'base.js': ['jquery-3.5.1/jquery.slim.min.js', 'bootstrap-4.5.3/bootstrap.bundle.min.js'],
+        'charts.js': ['chart.js-4.4/chart.umd.min.js'],
+    }
+    # مكتبات تُنسخ كمجلد كامل لأنها تحمّل ملفاتها الإضافية بنفسها
+    ASSET_DIRECTORIES = {'tinymce': 'tinymce-5.10.7'}
+    # مشتقات الصور: {اسم الملف في مجلد الصور: الأعراض المطلوبة وجودة WebP}
+    IMAGE_DERIVATIVES = {
+        'watermark.png': {'widths': [800, 1600], 'quality': 45},
+        'school.jpg': {'widths': [280, 560], 'quality': 75},
+        'instagram.png': {'widths': [20, 40, 60], 'quality': 80},
+    }
+    # ذاكرة الصفحات والاستعلامات: memory داخل كل عامل، أو sqlite مشتركة بين العمال (CACHE_PATH). الإبطال بعد
+    # الكتابة في memory يصل إلى العامل الذي نفّذها فقط، فتعرض العمال الأخرى الصفحة القديمة حتى CACHE_DEFAULT_TTL
+    # ثانية؛ لذلك يجعل gunicorn.conf.py القيمة sqlite عند تشغيل أكثر من عامل
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_DEFAULT_TTL = 300
+    # ذاكرة هويات المستخدمين: مدة الصلاحية بالثواني، الحجم، وتخزين الهوية موقّعة في الجلسة (اختياري)
+    USER_CACHE_TTL = 60
+    USER_CACHE_MAX_ENTRIES = 2048
+    USER_IDENTITY_IN_SESSION = False
+    # قياس الطلبات (/admin/perf): نسبة الطلبات المقيسة (0 يعطله)، عدد الطلبات المحفوظة في كل عامل، وعدد تكرار
+    # نفس الاستعلام في طلب واحد الذي يُعد نمط N+1. في وضع debug أو مع PROFILER_HEADERS يُقاس كل طلب
+    # وتُضاف ترويسة Server-Timing (تظهر في أدوات المطور في المتصفح)
+    PROFILER_SAMPLE_RATE = float(os.environ.get('PROFILER_SAMPLE_RATE', 0))
+    PROFILER_HISTORY = 500
+    PROFILER_N_PLUS_ONE_THRESHOLD = 5
+    PROFILER_HEADERS = False
+    # مقاييس Prometheus (/metrics): الرمز يرسله Prometheus كـ Bearer، وبدونه لا تُقرأ المقاييس إلا من نفس الجهاز
+    # (127.0.0.1)؛ خلف وكيل عكسي يلزم ضبط الرمز. نافذة الجلسات النشطة بالثواني، وكل كم ثانية يُسجَّل نشاط المستخدم
+    # الواحد في كل عامل (0 يعطل التسجيل)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    ACTIVE_SESSION_WINDOW = 15 * 60
+    ACTIVE_SESSION_TOUCH_INTERVAL = 5 * 60
+    # ضغط الاستجابات: الحد الأدنى للحجم بالبايت، المستويات، وإعدادات لكل بادئة مسار
+    COMPRESSION_MIN_SIZE = 500
+    COMPRESSION_LEVEL = 6
+    COMPRESSION_BROTLI_QUALITY = 5
+    COMPRESSION_ROUTES = {
+        '/student/export.': {'streaming': True},
+        '/attendance/export.': {'streaming': True},
+        '/finance/export.': {'streaming': True},
+    }
@@ -0,0 +1,96 @@
+import os
+from functools import partial, wraps
+
+from sqlalchemy import event, select
+from sqlalchemy.engine import make_url
+
+from .config import PROJECT_ROOT
+from .extensions import db
+
+# ترحيلات Alembic (Flask-Migrate): flask db upgrade
+MIGRATIONS_DIR = os.path.join(PROJECT_ROOT, 'migrations')
+
+###############################################
+# إعداد محركات قاعدة البيانات: إعدادات SQLite، مجمع الاتصالات، واتصالات القراءة
+###############################################
+def configure_database(app):
+    # يُستدعى قبل db.init_app لأن Flask-SQLAlchemy يقرأ الإعدادات عند إنشاء المحركات
+    config = app.config
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    # بعض المنصات تعطي postgres:// وهو اسم لم يعد SQLAlchemy يقبله
+    if uri.startswith('postgres://'):
+        uri = config['SQLALCHEMY_DATABASE_URI'] = 'postgresql://' + uri[len('postgres://'):]
+    url = make_url(uri)
+    options = config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    in_memory = url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+    if not in_memory:
+        options.setdefault('pool_size', config['DATABASE_POOL_SIZE'])
+        options.setdefault('max_overflow', config['DATABASE_MAX_OVERFLOW'])
+    if url.get_backend_name() != 'sqlite':
+        options.setdefault('pool_pre_ping', True)
+        options.setdefault('pool_recycle', config['DATABASE_POOL_RECYCLE'])
+    reader = config['DATABASE_READER_URL']
+    if reader is None and url.get_backend_name() == 'sqlite' and not in_memory:
+        reader = uri
+    # قاعدة في الذاكرة لا يمكن فتحها من اتصال ثانٍ، فتبقى القراءة على المحرك الأساسي
+    if reader:
+        config.setdefault('SQLALCHEMY_BINDS', {})['reader'] = dict(options, url=reader)
+    if in_memory:
+        # اتصال واحد مشترك بين كل الخيوط: تسجيل النشاط في الخلفية قد يتداخل مع معاملة الطلب الجاري
+        config['ACTIVE_SESSION_TOUCH_INTERVAL'] = 0
+    # اتصال منفصل لنفس قاعدة SQLite بإعدادات SQLITE_DURABLE_PRAGMAS لدفعات WriteCoalescer؛
+    # خيط واحد يكتب في كل عامل فيكفيه اتصال واحد. قواعد الخادم تؤكد الكتابة عند commit أصلاً
+    if url.get_backend_name() == 'sqlite' and not in_memory:
+        config.setdefault('SQLALCHEMY_BINDS', {})['durable'] = dict(options, url=uri, pool_size=1, max_overflow=1)
+
+def _apply_sqlite_pragmas(pragmas, read_only, dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+    if read_only:
+        # أي كتابة عبر اتصال قراءة تفشل بدلاً من أن تتجاوز المحرك الأساسي
+        cursor.execute("PRAGMA query_only = ON")
+    cursor.close()
+
+def init_app(app):
+    with app.app_context():
+        engines = db.engines
+    for key, engine in engines.items():
+        if engine.dialect.name == 'sqlite':
+            pragmas = app.config['SQLITE_PRAGMAS']
+            if key == 'durable':
+                pragmas = dict(pragmas, **app.config['SQLITE_DURABLE_PRAGMAS'])
+            event.listen(engine, 'connect', partial(_apply_sqlite_pragmas, pragmas, key == 'reader'))
+
+###############################################
+# قفل الكتابة قبل قراءة قيم ستُبنى عليها الكتابة
+###############################################
+def lock_for_write(model, ids):
+    # عند حساب التغيير من الحالة السابقة (قراءة ثم كتابة) يُؤخذ القفل قبل القراءة، وإلا قرأ طلبان متزامنان (نقرة
+    # مزدوجة، أو نفس المسح على عاملين) نفس الحالة وأضافا نفس التغيير مرتين. pysqlite لا يرسل BEGIN إلا عند أول
+    # أمر كتابة، فتقع القراءات قبله خارج أي معاملة: BEGIN IMMEDIATE يأخذ قفل الكتابة الآن. قواعد الخادم: قفل صفوف
+    # الأب (model) بترتيب ثابت، فيشمل القفل الصفوف الأبناء التي لم تُنشأ بعد
+    connection = db.session.connection()
+    if connection.dialect.name == 'sqlite':
+        if not connection.connection.driver_connection.in_transaction:
+            connection.exec_driver_sql('BEGIN IMMEDIATE')
+        return
+    db.session.execute(select(model.id).where(model.id.in_(sorted(ids))).order_by(model.id).with_for_update())
+
+def init_migrations(app):
+    # alembic يُستورد هنا فقط: عمال الويب لا يحتاجونه، بل flask db والتشغيل المحلي
+    from flask_migrate import Migrate
+    # وضع batch يعيد بناء الجدول في SQLite عند تعديل الأعمدة والقيود (ALTER محدود فيها)
+    Migrate(app, db, directory=MIGRATIONS_DIR, render_as_batch=True)
+
+def read_only(view):
+    # لصفحات العرض التي لا تكتب شيئاً: تُقرأ من اتصالات القراءة فلا تنافس الكتابات على نفس المجمع
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        previous = db.session.info.get('read_only')
+        db.session.info['read_only'] = True
+        try:
+            return view(*args, **kwargs)
+        finally:
+            db.session.info['read_only'] = previous
+    return wrapped
@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+
+from flask import current_app
+from sqlalchemy import insert, select, type_coerce
+
+from .extensions import db
+from .models import AbsenceAlert, Student, StudentDailyAttendance
+
+###############################################
+# محرك الإنذار المبكر للغياب المزمن
+###############################################
+def compute_absence_alerts(as_of=None):
+    # مصفوفة (طالب × يوم دراسي) تُبنى من التجميع اليومي ثم تُحسب كل النوافذ بعمليات NumPy
+    # بدلاً من حلقات ORM لكل طالب
+    import numpy as np
+    as_of = as_of or date.today()
+    thresholds = current_app.config['EARLY_WARNING_THRESHOLDS']
+    min_records = current_app.config['EARLY_WARNING_MIN_RECORDS']
+    start = as_of - timedelta(weeks=max(thresholds))
+    table = StudentDailyAttendance.__table__
+    # استعلام Core بدون تحميل ORM؛ التاريخ يُقرأ كنص ويُحوَّل مرة واحدة لكل يوم مختلف فقط
+    rows = db.session.connection().execute(
+        select(table.c.student_id, type_coerce(table.c.date, db.String), table.c.present, table.c.absent)
+        .where(table.c.date > start, table.c.date <= as_of)
+    ).all()
+    if not rows:
+        return []
+    student_col, day_col, present_col, absent_col = zip(*rows)
+    day_keys = sorted(set(day_col), key=str)
+    day_position = {key: i for i, key in enumerate(day_keys)}
+    days = np.array([(key if isinstance(key, date) else date.fromisoformat(str(key))).toordinal() for key in day_keys])
+    day_index = np.fromiter((day_position[key] for key in day_col), dtype=np.intp, count=len(day_col))
+    student_ids, student_index = np.unique(np.fromiter(student_col, dtype=np.int64, count=len(student_col)),
+                                           return_inverse=True)
+    absent_values = np.fromiter(absent_col, dtype=np.int32, count=len(absent_col))
+    total_values = absent_values + np.fromiter(present_col, dtype=np.int32, count=len(present_col))
+    flat_index = student_index * len(days) + day_index
+    size = len(student_ids) * len(days)
+    absent = np.bincount(flat_index, weights=absent_values, minlength=size).reshape(len(student_ids), len(days))
+    total = np.bincount(flat_index, weights=total_values, minlength=size).reshape(len(student_ids), len(days))
+    # مجاميع تراكمية من نهاية المدى: كل نافذة = عمود واحد من المصفوفة
+    absent_cum = np.cumsum(absent[:, ::-1], axis=1)[:, ::-1]
+    total_cum = np.cumsum(total[:, ::-1], axis=1)[:, ::-1]
+    alerts = []
+    for weeks, threshold in sorted(thresholds.items()):
+        first_day = np.searchsorted(days, (as_of - timedelta(weeks=weeks)).toordinal(), side='right')
+        if first_day >= len(days):
+            continue
+        window_absent = absent_cum[:, first_day]
+        window_total = total_cum[:, first_day]
+        rates = np.divide(window_absent * 100.0, window_total,
+                          out=np.zeros(len(student_ids)), where=window_total > 0)
+        flagged = np.nonzero((window_total >= min_records) & (rates >= threshold))[0]
+        alerts.extend({
+            'student_id': int(student_ids[i]),
+            'window_weeks': weeks,
+            'absence_rate': round(float(rates[i]), 2),
+            'absences': int(window_absent[i]),
+            'records': int(window_total[i]),
+            'as_of': as_of,
+        } for i in flagged)
+    return alerts
+
+def refresh_absence_alerts(as_of=None):
+    alerts = compute_absence_alerts(as_of)
+    db.session.execute(AbsenceAlert.__table__.delete())
+    if alerts:
+        db.session.execute(insert(AbsenceAlert), alerts)
+    db.session.commit()
+    return alerts
+
+def latest_absence_alerts(limit=None):
+    # أعلى نافذة إنذار لكل طالب مع اسمه وشعبته لعرضها في لوحات التحكم
+    query = db.session.query(AbsenceAlert, Student.full_name, Student.stage, Student.section).join(
+        Student, AbsenceAlert.student_id == Student.id
+    ).order_by(AbsenceAlert.absence_rate.desc())
+    if limit:
+        query = query.limit(limit)
+    return query.all()
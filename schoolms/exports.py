@@ -0,0 +1,126 @@
+import csv
+import io
+import zipfile
+from xml.sax.saxutils import escape as xml_escape
+
+from flask import Response, stream_with_context
+from flask_login import current_user
+
+from .extensions import db
+
+###############################################
+# التصدير المتدفق إلى CSV و XLSX
+###############################################
+EXPORT_BATCH_SIZE = 1000
+
+def stream_batches(query):
+    # yield_per يجلب الصفوف من قاعدة البيانات على دفعات فتبقى الذاكرة ثابتة مهما كان حجم التصدير
+    result = db.session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    for batch in result.partitions():
+        yield batch
+
+def csv_chunks(header, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM حتى يتعرف Excel على الترميز العربي
+    buffer.write('\ufeff')
+    writer.writerow(header)
+    yield buffer.getvalue().encode('utf-8')
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue().encode('utf-8')
+
+class _ChunkSink:
+    # ملف للكتابة فقط يجمع ما يكتبه zipfile ليُرسل مباشرة إلى العميل
+    def __init__(self):
+        self.chunks = []
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+    def flush(self):
+        pass
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        if value is None:
+            cells.append('<c/>')
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f'<c><v>{value}</v></c>')
+        else:
+            cells.append(f'<c t="inlineStr"><is><t>{xml_escape(str(value))}</t></is></c>')
+    return '<row>' + ''.join(cells) + '</row>'
+
+def xlsx_chunks(header, batches):
+    # كتابة ملف XLSX (ZIP) بشكل متدفق: zipfile يدعم الكتابة إلى ملف غير قابل للتنقل
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content)
+        yield sink.take()
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetViews><sheetView workbookViewId="0" rightToLeft="1"/></sheetViews><sheetData>'
+                + _xlsx_row(header)
+            ).encode('utf-8'))
+            for batch in batches:
+                sheet.write(''.join(_xlsx_row(row) for row in batch).encode('utf-8'))
+                data = sink.take()
+                if data:
+                    yield data
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.take()
+
+def export_response(fmt, filename, header, query):
+    batches = stream_batches(query)
+    if fmt == 'xlsx':
+        chunks = xlsx_chunks(header, batches)
+        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    else:
+        chunks = csv_chunks(header, batches)
+        mimetype = 'text/csv; charset=utf-8'
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}.{fmt}'
+    return response
+
+def can_export():
+    return current_user.role in ['admin', 'responsible']
@@ -0,0 +1,25 @@
+from flask_bcrypt import Bcrypt
+from flask_login import LoginManager
+from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+
+class RoutingSession(Session):
+    # الاستعلامات داخل view معلَّم بـ read_only تذهب إلى محرك القراءة؛ الكتابة (flush) تبقى على المحرك الأساسي.
+    # جلسة معلَّمة بـ durable (دفعات WriteCoalescer) تستخدم محرك الكتابة المؤكدة بالكامل، قراءةً وكتابة
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            key = None
+            if self.info.get('durable'):
+                key = 'durable'
+            elif self.info.get('read_only') and not self._flushing:
+                key = 'reader'
+            engine = self._db.engines.get(key) if key else None
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+# الإضافات تُنشأ بلا تطبيق وتُربط به داخل create_app()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+bcrypt = Bcrypt()
+login_manager = LoginManager()
+login_manager.login_view = 'main.login'
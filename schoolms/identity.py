@@ -0,0 +1,130 @@
+import logging
+import time
+from datetime import datetime
+
+from flask import current_app, has_request_context, session
+from flask_login import UserMixin
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session as OrmSession
+
+from .caching import MemoryCacheBackend
+from .extensions import db, login_manager
+from .metrics import record_cache_lookup
+from .models import Student, User, UserActivity
+from .rollups import upsert
+
+logger = logging.getLogger(__name__)
+
+###############################################
+# إعداد تسجيل الدخول باستخدام Flask-Login
+###############################################
+def link_student_account(user):
+    # ربط حساب الطالب بسجله عبر تطابق الاسم (الطريقة السابقة)؛ يُستدعى مرة واحدة فقط لكل حساب
+    if user.role != 'student':
+        return None
+    student_record = Student.query.filter_by(full_name=user.username).first()
+    if student_record and not User.query.filter_by(student_id=student_record.id).first():
+        user.student_id = student_record.id
+        return student_record
+    return None
+
+###############################################
+# ذاكرة هويات المستخدمين لـ Flask-Login (بدون استعلام لكل طلب)
+###############################################
+class UserIdentity(UserMixin):
+    # نسخة خفيفة من حقول المستخدم التي تحتاجها الطلبات؛ للتعديل يُجلب كائن User من الجلسة
+    def __init__(self, id, username, role, student_id):
+        self.id = id
+        self.username = username
+        self.role = role
+        self.student_id = student_id
+
+user_identity_stats = {'hits': 0, 'misses': 0}
+
+def init_app(app):
+    app.extensions['user_identities'] = MemoryCacheBackend(app.config['USER_CACHE_MAX_ENTRIES'])
+    app.extensions['user_activity_touched'] = {}
+
+def identity_from_session(user_id):
+    # الجلسة موقّعة بـ SECRET_KEY فلا يمكن للعميل تعديل الدور المخزن فيها
+    data = session.get('_identity')
+    if not data or data['id'] != user_id or data['expires'] < time.time():
+        return None
+    return UserIdentity(data['id'], data['username'], data['role'], data['student_id'])
+
+@login_manager.user_loader
+def load_user(user_id):
+    user_id = int(user_id)
+    identity = None
+    if current_app.config['USER_IDENTITY_IN_SESSION']:
+        identity = identity_from_session(user_id)
+    if identity is None:
+        identity = current_app.extensions['user_identities'].get(user_id)
+    record_cache_lookup('user_identities', identity is not None)
+    if identity is not None:
+        user_identity_stats['hits'] += 1
+        touch_user_activity(user_id)
+        return identity
+    user_identity_stats['misses'] += 1
+    row = db.session.execute(
+        select(User.id, User.username, User.role, User.student_id).where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    identity = UserIdentity(*row)
+    ttl = current_app.config['USER_CACHE_TTL']
+    current_app.extensions['user_identities'].set(user_id, identity, ttl)
+    if current_app.config['USER_IDENTITY_IN_SESSION']:
+        session['_identity'] = {'id': identity.id, 'username': identity.username, 'role': identity.role,
+                                'student_id': identity.student_id, 'expires': time.time() + ttl}
+    touch_user_activity(user_id)
+    return identity
+
+def invalidate_user_identity(user_id):
+    # العمال الأخرى ونسخ الجلسات لدى المستخدمين الآخرين تنتهي صلاحيتها خلال USER_CACHE_TTL
+    current_app.extensions['user_identities'].delete(user_id)
+    if has_request_context() and session.get('_identity', {}).get('id') == user_id:
+        session.pop('_identity')
+
+###############################################
+# آخر نشاط للمستخدمين (مقياس الجلسات النشطة في /metrics)
+###############################################
+def touch_user_activity(user_id):
+    # كل عامل يسجل نشاط المستخدم مرة كل ACTIVE_SESSION_TOUCH_INTERVAL ثانية على الأكثر (0 يعطله)، والكتابة
+    # تمر عبر WriteCoalescer دون انتظار: الطلب لا ينتظر commit ولا يفشل إذا فشلت الكتابة
+    interval = current_app.config['ACTIVE_SESSION_TOUCH_INTERVAL']
+    touched = current_app.extensions['user_activity_touched']
+    now = time.monotonic()
+    if not interval or now - touched.get(user_id, -interval) < interval:
+        return
+    if len(touched) >= current_app.config['USER_CACHE_MAX_ENTRIES']:
+        touched.clear()
+    touched[user_id] = now
+    future = current_app.extensions['write_coalescers']['user_activity'].submit(user_id)
+    future.add_done_callback(_log_activity_failure)
+
+def _log_activity_failure(future):
+    if future.exception() is not None:
+        logger.warning("تعذر تسجيل نشاط المستخدم: %s", future.exception())
+
+def save_user_activity(user_ids):
+    # دفعة من WriteCoalescer؛ لا تنفّذ commit
+    now = datetime.utcnow()
+    stmt = upsert(UserActivity.__table__, ['user_id'], lambda excluded: {'last_seen': excluded.last_seen})
+    db.session.execute(stmt, [{'user_id': user_id, 'last_seen': now} for user_id in set(user_ids)])
+    return [None] * len(user_ids)
+
+@event.listens_for(OrmSession, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault('changed_user_ids', set())
+    for objects in (session.dirty, session.deleted):
+        changed.update(obj.id for obj in objects if isinstance(obj, User))
+
+@event.listens_for(OrmSession, 'after_commit')
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        invalidate_user_identity(user_id)
+
+@event.listens_for(OrmSession, 'after_soft_rollback')
+def _discard_changed_users(session, previous_transaction):
+    session.info.pop('changed_user_ids', None)
@@ -0,0 +1,118 @@
+import os
+import time
+from datetime import datetime, timedelta
+from functools import partial
+
+from flask import Blueprint, current_app, g, jsonify, request
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy import event, func
+
+from .database import read_only
+from .extensions import db
+from .models import UserActivity
+
+###############################################
+# مقاييس Prometheus من كل عمال gunicorn (/metrics)
+###############################################
+# gunicorn.conf.py يضبط PROMETHEUS_MULTIPROC_DIR قبل تحميل التطبيق: كل عامل يكتب قيمه في ملفات داخل المجلد
+# و /metrics يجمعها من كل العمال مهما كان العامل الذي استقبل الطلب. بدونه (flask run) تبقى القيم في ذاكرة العملية
+registry = CollectorRegistry()
+
+REQUEST_LATENCY = Histogram(
+    'schoolms_http_request_duration_seconds', 'زمن معالجة الطلب حتى إرجاع الاستجابة',
+    ['blueprint', 'endpoint', 'method'], registry=registry,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_COUNT = Counter(
+    'schoolms_http_requests', 'عدد الطلبات حسب المسار والحالة',
+    ['blueprint', 'endpoint', 'method', 'status'], registry=registry,
+)
+DB_QUERY_TIME = Histogram(
+    'schoolms_db_query_duration_seconds', 'زمن تنفيذ استعلامات قاعدة البيانات حسب المحرك',
+    ['database'], registry=registry,
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+PDF_RENDER_TIME = Histogram(
+    'schoolms_pdf_render_duration_seconds', 'زمن تحويل التقارير إلى PDF (write_report)',
+    registry=registry, buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+# نسبة الإصابة تُحسب في Prometheus: rate(...{result="hit"}) / rate(...) لأن النسب لا تُجمع بين العمال
+CACHE_REQUESTS = Counter(
+    'schoolms_cache_requests', 'طلبات الذاكرات المؤقتة حسب النتيجة (hit/miss)',
+    ['cache', 'result'], registry=registry,
+)
+
+def record_cache_lookup(cache_name, hit):
+    CACHE_REQUESTS.labels(cache_name, 'hit' if hit else 'miss').inc()
+
+def _start_timer():
+    g.metrics_started = time.perf_counter()
+
+def _record_request(response):
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        # اسم الـ endpoint لا المسار حتى لا تتضخم السلاسل بمعرفات الطلاب والملفات
+        labels = (request.blueprint or '', request.endpoint or 'none', request.method)
+        REQUEST_LATENCY.labels(*labels).observe(time.perf_counter() - started)
+        REQUEST_COUNT.labels(*labels, str(response.status_code)).inc()
+    return response
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(database, conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('metrics_started')
+    if started:
+        DB_QUERY_TIME.labels(database).observe(time.perf_counter() - started.pop())
+
+def active_session_count(window):
+    since = datetime.utcnow() - timedelta(seconds=window)
+    return db.session.query(func.count()).select_from(UserActivity).filter(UserActivity.last_seen >= since).scalar()
+
+class ScrapeCollector:
+    # المقاييس المسجلة (من ملفات كل العمال أو من ذاكرة العملية) + الجلسات النشطة محسوبة من قاعدة البيانات
+    def __init__(self, source, active_sessions, window):
+        self.source = source
+        self.active_sessions = active_sessions
+        self.window = window
+
+    def collect(self):
+        yield from self.source.collect()
+        gauge = GaugeMetricFamily('schoolms_active_sessions',
+                                  f'المستخدمون الذين أرسلوا طلباً خلال آخر {self.window} ثانية')
+        gauge.add_metric([], self.active_sessions)
+        yield gauge
+
+metrics_bp = Blueprint('metrics', __name__)
+
+LOCAL_ADDRESSES = {'127.0.0.1', '::1'}
+
+@metrics_bp.route('/metrics')
+@read_only
+def metrics():
+    # Prometheus يرسل METRICS_TOKEN في ترويسة Authorization، وبدون رمز لا يُقبل إلا الطلب من نفس الجهاز
+    token = current_app.config['METRICS_TOKEN']
+    if token:
+        allowed = request.headers.get('Authorization') == f'Bearer {token}'
+    else:
+        allowed = request.remote_addr in LOCAL_ADDRESSES
+    if not allowed:
+        return jsonify({"error": "غير مسموح بالدخول"}), 403
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        source = MultiProcessCollector(None)
+    else:
+        source = registry
+    window = current_app.config['ACTIVE_SESSION_WINDOW']
+    body = generate_latest(ScrapeCollector(source, active_session_count(window), window))
+    return current_app.response_class(body, content_type=CONTENT_TYPE_LATEST)
+
+def init_app(app):
+    with app.app_context():
+        engines = db.engines
+    for key, engine in engines.items():
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', partial(_after_cursor_execute, key or 'primary'))
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
@@ -0,0 +1,220 @@
+from datetime import date, datetime
+
+from flask import current_app
+from flask_login import UserMixin
+
+from .extensions import bcrypt, db
+from .passwords import run_password_hashing
+
+###############################################
+# نماذج البيانات (Data Models)
+###############################################
+class User(db.Model, UserMixin):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(150), nullable=False, unique=True)
+    password_hash = db.Column(db.String(150), nullable=False)
+    role = db.Column(db.String(50), nullable=False)  # student, admin, teacher, responsible
+    # ربط مباشر ومفهرس بسجل الطالب (لحسابات الطلاب)
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), unique=True)
+
+    def set_password(self, password):
+        rounds = current_app.config['BCRYPT_LOG_ROUNDS']
+        self.password_hash = run_password_hashing(bcrypt.generate_password_hash, password, rounds).decode('utf-8')
+    def check_password(self, password):
+        return run_password_hashing(bcrypt.check_password_hash, self.password_hash, password)
+    def needs_rehash(self):
+        # البصمة تحمل عامل العمل الذي أُنشئت به ($2b$12$...)
+        return int(self.password_hash.split('$')[2]) != current_app.config['BCRYPT_LOG_ROUNDS']
+
+class Student(db.Model):
+    __table_args__ = (db.Index('ix_student_stage_section', 'stage', 'section'),)
+    id = db.Column(db.Integer, primary_key=True)
+    full_name = db.Column(db.String(150), nullable=False, index=True)
+    birth_date = db.Column(db.Date, nullable=False)
+    stage = db.Column(db.String(50), nullable=False)      # first, second, third
+    section = db.Column(db.String(10), nullable=False)      # A, B, C, D
+    guardian_info = db.Column(db.String(250))
+    academic_record = db.Column(db.Text)
+    medical_reports = db.Column(db.Text)
+    notes = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    attendance_records = db.relationship('Attendance', backref='student', lazy=True)
+    fees = db.relationship('Fee', backref='student', lazy=True)
+
+class Teacher(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    full_name = db.Column(db.String(150), nullable=False)
+    specialization = db.Column(db.String(150))
+    qualifications = db.Column(db.Text)
+    experience_years = db.Column(db.Integer)
+    evaluation = db.Column(db.Text)
+    teaching_level = db.Column(db.String(50))  # المرحلة التي يدرس فيها (first, second, third)
+    attendance_records = db.relationship('Attendance', backref='teacher', lazy=True)
+    schedule = db.relationship('Schedule', backref='teacher', lazy=True)
+    exams = db.relationship('Exam', backref='teacher', lazy=True)
+
+class Attendance(db.Model):
+    # سجل واحد فقط لكل طالب في كل حصة من كل يوم (يجعل إعادة الإرسال آمنة)
+    # الفهارس المركبة تخدم التصفح بالمؤشر (date, id) مع كل نوع من المرشحات
+    __table_args__ = (
+        db.UniqueConstraint('date', 'period', 'student_id', name='uq_attendance_date_period_student'),
+        db.Index('ix_attendance_date_id', 'date', 'id'),
+        db.Index('ix_attendance_student_date_id', 'student_id', 'date', 'id'),
+        db.Index('ix_attendance_teacher_date_id', 'teacher_id', 'date', 'id'),
+        db.Index('ix_attendance_status_date_id', 'status', 'date', 'id'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False, default=date.today)
+    period = db.Column(db.String(50))
+    reason = db.Column(db.String(100))
+    status = db.Column(db.String(10), nullable=False)  # present / absent
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=True)
+    teacher_id = db.Column(db.Integer, db.ForeignKey('teacher.id'), nullable=True)
+
+# جداول تجميع يومية تُحدَّث مع كل إدخال حضور لتجنب إعادة مسح جدول الحضور
+class StudentDailyAttendance(db.Model):
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    present = db.Column(db.Integer, nullable=False, default=0)
+    absent = db.Column(db.Integer, nullable=False, default=0)
+
+# عدادات إجمالية لكل طالب: لوحة الطالب تقرأ صفاً واحداً مهما طال سجل حضوره
+class StudentAttendanceCounter(db.Model):
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), primary_key=True)
+    present = db.Column(db.Integer, nullable=False, default=0)
+    absent = db.Column(db.Integer, nullable=False, default=0)
+
+class ClassDailyAttendance(db.Model):
+    stage = db.Column(db.String(50), primary_key=True)
+    section = db.Column(db.String(10), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    present = db.Column(db.Integer, nullable=False, default=0)
+    absent = db.Column(db.Integer, nullable=False, default=0)
+
+# مكعب تجميع مسبق للتحليلات الزمنية: صف لكل (يوم، مرحلة، شعبة، حصة)
+# مع أعمدة مشتقة (اليوم من الأسبوع، الأسبوع، الشهر) حتى يكون التجميع بأي دقة زمنية مجرد GROUP BY.
+# الصفوف ذات الحصة ALL_PERIODS تحمل مجموع كل الحصص فتقرأ الاستعلامات التي لا تحتاج الحصة صفوفاً أقل بكثير
+ALL_PERIODS = '*'
+
+class AttendanceCube(db.Model):
+    __table_args__ = (
+        db.Index('ix_attendance_cube_period_date', 'period', 'date'),
+        db.Index('ix_attendance_cube_class_date', 'stage', 'section', 'date'),
+    )
+    date = db.Column(db.Date, primary_key=True)
+    stage = db.Column(db.String(50), primary_key=True)
+    section = db.Column(db.String(10), primary_key=True)
+    period = db.Column(db.String(50), primary_key=True)
+    weekday = db.Column(db.Integer, nullable=False)     # 0 = الإثنين
+    week = db.Column(db.String(10), nullable=False)     # مثل 2024-W05
+    month = db.Column(db.String(7), nullable=False)     # مثل 2024-02
+    present = db.Column(db.Integer, nullable=False, default=0)
+    absent = db.Column(db.Integer, nullable=False, default=0)
+
+# تمثيل مضغوط للحضور: خريطة بتات لكل طالب وفصل دراسي، بايت لكل يوم وبت لكل حصة.
+# جدول Attendance يبقى السجل التفصيلي (الأسباب وغيرها)
+BITMAP_PERIODS_PER_DAY = 8
+
+class AttendanceBitmap(db.Model):
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), primary_key=True)
+    term = db.Column(db.String(10), primary_key=True)        # مثل 2024-1
+    absent_bits = db.Column(db.LargeBinary, nullable=False, default=b'')
+    recorded_bits = db.Column(db.LargeBinary, nullable=False, default=b'')
+
+# سجل السنوات الدراسية المؤرشفة: كل سنة تُنقل إلى جدول attendance_archive_<year>
+class AttendanceArchive(db.Model):
+    year = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)   # غير مشمول
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# نتائج آخر تشغيل لمحرك الإنذار المبكر (تُستبدل في كل تشغيل ليلي)
+class AbsenceAlert(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False, index=True)
+    window_weeks = db.Column(db.Integer, nullable=False)
+    absence_rate = db.Column(db.Float, nullable=False)
+    absences = db.Column(db.Integer, nullable=False)
+    records = db.Column(db.Integer, nullable=False)
+    as_of = db.Column(db.Date, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Exam(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    exam_date = db.Column(db.Date, nullable=False)
+    subject = db.Column(db.String(150), nullable=False)
+    teacher_id = db.Column(db.Integer, db.ForeignKey('teacher.id'))
+    details = db.Column(db.Text)
+
+class Notification(db.Model):
+    # إشعارات المستخدم الحالي مرتبة بالتاريخ
+    __table_args__ = (db.Index('ix_notification_user_created', 'user_id', 'created_at'),)
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(150))
+    message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+
+class Message(db.Model):
+    # صندوق الوارد: رسائل المستلم مرتبة بالوقت
+    __table_args__ = (db.Index('ix_message_receiver_timestamp', 'receiver_id', 'timestamp'),)
+    id = db.Column(db.Integer, primary_key=True)
+    sender_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    receiver_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    content = db.Column(db.Text)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Schedule(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.String(20))
+    period = db.Column(db.String(50))
+    subject = db.Column(db.String(150))
+    teacher_id = db.Column(db.Integer, db.ForeignKey('teacher.id'))
+
+class Fee(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'))
+    amount = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(50))   # paid, unpaid
+    invoice_details = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Book(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    author = db.Column(db.String(150))
+    isbn = db.Column(db.String(50))
+    quantity = db.Column(db.Integer, default=1)
+
+class Upload(db.Model):
+    # ملف واحد لكل محتوى مختلف: المفتاح بصمة SHA-256 فالنسخ المكررة لا تُخزَّن مرتين
+    sha256 = db.Column(db.String(64), primary_key=True)
+    extension = db.Column(db.String(10), nullable=False)
+    content_type = db.Column(db.String(100), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Attachment(db.Model):
+    __table_args__ = (db.Index('ix_attachment_kind_owner', 'kind', 'owner_id'),)
+    id = db.Column(db.Integer, primary_key=True)
+    upload_sha256 = db.Column(db.String(64), db.ForeignKey('upload.sha256'), nullable=False, index=True)
+    kind = db.Column(db.String(30), nullable=False)   # student_photo, medical_report, book_cover
+    owner_id = db.Column(db.Integer, nullable=False)
+    filename = db.Column(db.String(255))
+    uploaded_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class TableVersion(db.Model):
+    # رقم إصدار لكل جدول يُرفع في معاملة أي كتابة عليه (ETag / Last-Modified)
+    table_name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class UserActivity(db.Model):
+    # آخر نشاط لكل مستخدم (يُحدَّث مرة كل ACTIVE_SESSION_TOUCH_INTERVAL على الأكثر) لمقياس الجلسات النشطة
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    last_seen = db.Column(db.DateTime, nullable=False, index=True)
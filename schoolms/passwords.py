@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, request
+
+###############################################
+# تجزئة كلمات المرور في مجمع محدود وحد محاولات الدخول
+###############################################
+class PasswordHashingBusy(Exception):
+    pass
+
+_worker_pools = {}
+_password_slots = (None, None)
+
+def worker_pool(name, max_workers):
+    # مجمعات خيوط تُنشأ عند أول استخدام، ومن جديد في كل عامل بعد fork لأن الخيوط لا تنتقل مع fork
+    pid, pool = _worker_pools.get(name, (None, None))
+    if pool is None or pid != os.getpid():
+        pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        _worker_pools[name] = (os.getpid(), pool)
+    return pool
+
+def run_password_hashing(function, *args):
+    # bcrypt يحرر الـ GIL أثناء الحساب: المجمع يحدد عدد عمليات التجزئة المتزامنة في العامل،
+    # وما يزيد عن BCRYPT_MAX_PENDING يُرفض فوراً بدلاً من أن يحجز خيوط العامل
+    global _password_slots
+    pid, slots = _password_slots
+    if slots is None or pid != os.getpid():
+        slots = threading.BoundedSemaphore(current_app.config['BCRYPT_MAX_PENDING'])
+        _password_slots = (os.getpid(), slots)
+    if not slots.acquire(blocking=False):
+        raise PasswordHashingBusy()
+    try:
+        future = worker_pool('bcrypt', current_app.config['BCRYPT_POOL_SIZE']).submit(function, *args)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future.result(timeout=current_app.config['BCRYPT_TIMEOUT'])
+
+class TokenBucketLimiter:
+    # دلو رموز لكل مفتاح داخل العامل (LRU محدود الحجم)؛ يُستدعى قبل أي تجزئة
+    def __init__(self, capacity, refill_per_second, max_keys=10000):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed
+
+def init_app(app):
+    app.extensions['login_limiters'] = {
+        'ip': TokenBucketLimiter(*app.config['LOGIN_RATE_LIMIT_IP']),
+        'username': TokenBucketLimiter(*app.config['LOGIN_RATE_LIMIT_USERNAME']),
+    }
+
+def login_attempt_allowed(username=None):
+    limiters = current_app.extensions['login_limiters']
+    if not limiters['ip'].allow(request.remote_addr or ''):
+        return False
+    return username is None or limiters['username'].allow(username.lower())
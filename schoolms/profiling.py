@@ -0,0 +1,132 @@
+import logging
+import random
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+from flask import before_render_template, current_app, g, has_app_context, request, template_rendered
+from sqlalchemy import event
+
+from .extensions import db
+
+logger = logging.getLogger(__name__)
+
+###############################################
+# قياس الطلبات: زمن الطلب، زمن SQL وعدد الاستعلامات، زمن القوالب، وكشف نمط N+1
+###############################################
+# القياس اختياري وبالعينة (PROFILER_SAMPLE_RATE)؛ الطلب غير المقيس لا يدفع إلا فحص g.profile في كل استعلام.
+# في وضع debug (أو PROFILER_HEADERS) تُقاس كل الطلبات وتُضاف ترويسة Server-Timing للاستجابة
+_history_lock = threading.Lock()
+
+def _current_profile():
+    # خيوط الخلفية (WriteCoalescer، الصور المصغرة) لها سياق تطبيق بلا g.profile
+    return g.get('profile') if has_app_context() else None
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile() is not None:
+        conn.info.setdefault('profile_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile()
+    started = conn.info.get('profile_started')
+    if profile is None or not started:
+        return
+    profile['sql_time'] += time.perf_counter() - started.pop()
+    # نفس نص SQL (المعاملات مربوطة لا مدمجة) يتكرر في حلقة: علامة N+1
+    profile['statements'][statement] += 1
+
+def _before_render_template(app, template, context, **extra):
+    profile = _current_profile()
+    if profile is not None:
+        profile['rendering'].append(time.perf_counter())
+
+def _template_rendered(app, template, context, **extra):
+    profile = _current_profile()
+    if profile is not None and profile['rendering']:
+        started = profile['rendering'].pop()
+        # قالب يُعرض داخل قالب آخر محسوب ضمن زمن القالب الخارجي
+        if not profile['rendering']:
+            profile['template_time'] += time.perf_counter() - started
+
+def _headers_enabled(app):
+    return app.debug or app.config['PROFILER_HEADERS']
+
+def profile_sample_rate(app):
+    return 1.0 if _headers_enabled(app) else app.config['PROFILER_SAMPLE_RATE']
+
+def _start_profile():
+    rate = profile_sample_rate(current_app)
+    if rate > 0 and random.random() < rate:
+        g.profile = {'started': time.perf_counter(), 'sql_time': 0.0, 'template_time': 0.0,
+                     'statements': Counter(), 'rendering': []}
+
+def _finish_profile(response):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+    # الاستجابات المتدفقة (التصدير) تُقاس حتى بداية الإرسال فقط
+    wall = time.perf_counter() - profile['started']
+    threshold = current_app.config['PROFILER_N_PLUS_ONE_THRESHOLD']
+    repeated = [(statement, count) for statement, count in profile['statements'].most_common() if count >= threshold]
+    for statement, count in repeated:
+        logger.warning("نمط N+1 محتمل في %s: الاستعلام نُفّذ %d مرة: %s", request.endpoint, count, statement[:200])
+    entry = {
+        'time': datetime.now(),
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'wall_ms': wall * 1000,
+        'sql_ms': profile['sql_time'] * 1000,
+        'template_ms': profile['template_time'] * 1000,
+        'queries': sum(profile['statements'].values()),
+        'repeated': repeated,
+    }
+    with _history_lock:
+        current_app.extensions['request_profiles'].append(entry)
+    if _headers_enabled(current_app):
+        # القوالب تشمل الاستعلامات الكسولة التي تُنفَّذ أثناء العرض
+        response.headers['Server-Timing'] = (
+            f'sql;dur={entry["sql_ms"]:.1f};desc="{entry["queries"]} queries", '
+            f'tpl;dur={entry["template_ms"]:.1f}, total;dur={entry["wall_ms"]:.1f}'
+        )
+    return response
+
+def recent_profiles():
+    with _history_lock:
+        return [dict(entry) for entry in current_app.extensions['request_profiles']]
+
+def profile_summary(profiles):
+    # ملخص لكل endpoint من الطلبات المحفوظة في هذا العامل
+    summary = {}
+    for entry in profiles:
+        row = summary.setdefault(entry['endpoint'], {
+            'endpoint': entry['endpoint'], 'count': 0, 'wall_ms': 0.0, 'max_wall_ms': 0.0,
+            'sql_ms': 0.0, 'template_ms': 0.0, 'queries': 0, 'n_plus_one': 0,
+        })
+        row['count'] += 1
+        row['wall_ms'] += entry['wall_ms']
+        row['max_wall_ms'] = max(row['max_wall_ms'], entry['wall_ms'])
+        row['sql_ms'] += entry['sql_ms']
+        row['template_ms'] += entry['template_ms']
+        row['queries'] += entry['queries']
+        row['n_plus_one'] += bool(entry['repeated'])
+    rows = sorted(summary.values(), key=lambda row: row['wall_ms'], reverse=True)
+    for row in rows:
+        for key in ('wall_ms', 'sql_ms', 'template_ms', 'queries'):
+            row[key] /= row['count']
+    return rows
+
+def init_app(app):
+    # الخطافات تُسجَّل دائماً لأن app.run(debug=True) يفعّل debug بعد create_app()
+    app.extensions['request_profiles'] = deque(maxlen=app.config['PROFILER_HISTORY'])
+    with app.app_context():
+        engines = db.engines
+    for engine in engines.values():
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    before_render_template.connect(_before_render_template, app)
+    template_rendered.connect(_template_rendered, app)
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
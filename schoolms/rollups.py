@@ -0,0 +1,350 @@
+from datetime import date
+
+from flask import current_app
+from sqlalchemy import case, func, insert, select, tuple_
+
+from .archive import attendance_source, ensure_not_archived, school_year_bounds, school_year_of
+from .database import lock_for_write
+from .exports import EXPORT_BATCH_SIZE
+from .extensions import db
+from .models import (
+    ALL_PERIODS, BITMAP_PERIODS_PER_DAY, Attendance, AttendanceBitmap, AttendanceCube, ClassDailyAttendance,
+    Student, StudentAttendanceCounter, StudentDailyAttendance,
+)
+
+###############################################
+# تحديث جداول التجميع اليومية ضمن نفس المعاملة
+###############################################
+def upsert(table, index_elements, set_=None):
+    # INSERT ... ON CONFLICT (SQLite و PostgreSQL) أو ON DUPLICATE KEY UPDATE (MySQL) حسب نوع قاعدة البيانات.
+    # set_ دالة تأخذ قيم الصف المُدرج (excluded أو VALUES()) وتعيد الأعمدة المحدَّثة؛ بدونها يُتجاهل الصف المتعارض
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        # MySQL يطبّق التحديث عند التعارض مع أي مفتاح فريد، ولا يقبل تحديد index_elements
+        stmt = mysql_insert(table)
+        if set_ is None:
+            return stmt.on_duplicate_key_update({index_elements[0]: table.c[index_elements[0]]})
+        return stmt.on_duplicate_key_update(set_(stmt.inserted))
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise NotImplementedError(f"قاعدة البيانات {dialect} غير مدعومة: يلزم SQLite أو PostgreSQL أو MySQL")
+    stmt = dialect_insert(table)
+    if set_ is None:
+        return stmt.on_conflict_do_nothing(index_elements=index_elements)
+    return stmt.on_conflict_do_update(index_elements=index_elements, set_=set_(stmt.excluded))
+
+def _increment_counts(model, key_columns, rows):
+    if not rows:
+        return
+    table = model.__table__
+    stmt = upsert(table, key_columns, lambda excluded: {
+        'present': table.c.present + excluded.present,
+        'absent': table.c.absent + excluded.absent,
+    })
+    db.session.execute(stmt, rows)
+
+def cube_time_columns(day):
+    iso_year, iso_week, _ = day.isocalendar()
+    return {'weekday': day.weekday(), 'week': f"{iso_year}-W{iso_week:02d}", 'month': day.strftime('%Y-%m')}
+
+def apply_attendance_changes(changes):
+    # changes: قائمة من القواميس {student_id, date, period, old_status, new_status}
+    # يجب استدعاؤها قبل db.session.commit() حتى تُكتب التجميعات في نفس المعاملة، و old_status مقروءة بعد
+    # lock_for_write وإلا حُسب التغيير مرتين عند تزامن كتابتين لنفس السجل
+    changes = [c for c in changes if c.get('student_id')]
+    if not changes:
+        return
+    update_attendance_bitmaps(changes)
+    student_ids = {c['student_id'] for c in changes}
+    classes = dict(
+        (sid, (stage, section))
+        for sid, stage, section in db.session.query(Student.id, Student.stage, Student.section)
+        .filter(Student.id.in_(student_ids))
+    )
+    per_student = {}
+    per_class = {}
+    per_cube = {}
+    totals = {}
+    for change in changes:
+        present = (change['new_status'] == 'present') - (change.get('old_status') == 'present')
+        absent = (change['new_status'] == 'absent') - (change.get('old_status') == 'absent')
+        if not present and not absent:
+            continue
+        key = (change['student_id'], change['date'])
+        counts = per_student.setdefault(key, [0, 0])
+        counts[0] += present
+        counts[1] += absent
+        counts = totals.setdefault(change['student_id'], [0, 0])
+        counts[0] += present
+        counts[1] += absent
+        if change['student_id'] in classes:
+            key = classes[change['student_id']] + (change['date'],)
+            counts = per_class.setdefault(key, [0, 0])
+            counts[0] += present
+            counts[1] += absent
+            for period in (change.get('period') or '', ALL_PERIODS):
+                counts = per_cube.setdefault(key + (period,), [0, 0])
+                counts[0] += present
+                counts[1] += absent
+    _increment_counts(StudentDailyAttendance, ['student_id', 'date'], [
+        {'student_id': sid, 'date': day, 'present': p, 'absent': a}
+        for (sid, day), (p, a) in per_student.items()
+    ])
+    _increment_counts(ClassDailyAttendance, ['stage', 'section', 'date'], [
+        {'stage': stage, 'section': section, 'date': day, 'present': p, 'absent': a}
+        for (stage, section, day), (p, a) in per_class.items()
+    ])
+    _increment_counts(AttendanceCube, ['date', 'stage', 'section', 'period'], [
+        dict({'stage': stage, 'section': section, 'date': day, 'period': period, 'present': p, 'absent': a},
+             **cube_time_columns(day))
+        for (stage, section, day, period), (p, a) in per_cube.items()
+    ])
+    _increment_counts(StudentAttendanceCounter, ['student_id'], [
+        {'student_id': sid, 'present': p, 'absent': a}
+        for sid, (p, a) in totals.items()
+    ])
+
+def term_of(day):
+    year = school_year_of(day)
+    second_term = date(year + 1, current_app.config['SECOND_TERM_START_MONTH'], 1)
+    if day >= second_term:
+        return f"{year}-2", second_term
+    return f"{year}-1", school_year_bounds(year)[0]
+
+# الحصص "1".."8" فقط لها بت: كل بت يقابل قيمة period واحدة فلا يكتب سجلان فوق البت نفسه
+BITMAP_SLOTS = {str(number): number - 1 for number in range(1, BITMAP_PERIODS_PER_DAY + 1)}
+
+def bitmap_position(day, period):
+    # الحصص النصية (مثل "أسبوعي" ومسح الدخول) خارج الخريطة وتبقى محسوبة في العدادات وجداول التجميع
+    if period not in BITMAP_SLOTS:
+        return None
+    term, term_start = term_of(day)
+    return term, (day - term_start).days * BITMAP_PERIODS_PER_DAY + BITMAP_SLOTS[period]
+
+def _bits_to_bytes(value):
+    return value.to_bytes((value.bit_length() + 7) // 8, 'little')
+
+def _write_bitmaps(bitmaps):
+    if not bitmaps:
+        return
+    table = AttendanceBitmap.__table__
+    stmt = upsert(table, ['student_id', 'term'], lambda excluded: {
+        'absent_bits': excluded.absent_bits, 'recorded_bits': excluded.recorded_bits,
+    })
+    db.session.execute(stmt, [
+        {'student_id': sid, 'term': term, 'absent_bits': _bits_to_bytes(absent), 'recorded_bits': _bits_to_bytes(recorded)}
+        for (sid, term), (absent, recorded) in bitmaps.items()
+    ])
+
+def update_attendance_bitmaps(changes):
+    # تعديل البتات المتأثرة فقط ثم كتابة الخرائط المعدلة بأمر upsert واحد
+    positions = {}
+    for change in changes:
+        position = bitmap_position(change['date'], change.get('period'))
+        if position is None:
+            continue
+        term, bit = position
+        positions.setdefault((change['student_id'], term), {})[bit] = change['new_status'] == 'absent'
+    if not positions:
+        return
+    bitmaps = {
+        (sid, term): (int.from_bytes(absent_bits, 'little'), int.from_bytes(recorded_bits, 'little'))
+        for sid, term, absent_bits, recorded_bits in db.session.query(
+            AttendanceBitmap.student_id, AttendanceBitmap.term,
+            AttendanceBitmap.absent_bits, AttendanceBitmap.recorded_bits,
+        ).filter(tuple_(AttendanceBitmap.student_id, AttendanceBitmap.term).in_(positions.keys()))
+    }
+    for key, bits in positions.items():
+        absent, recorded = bitmaps.get(key, (0, 0))
+        for bit, is_absent in bits.items():
+            recorded |= 1 << bit
+            if is_absent:
+                absent |= 1 << bit
+            else:
+                absent &= ~(1 << bit)
+        bitmaps[key] = (absent, recorded)
+    _write_bitmaps(bitmaps)
+
+def bitmap_stats(absent_bits, recorded_bits):
+    # popcount للحصص، وبايت غير صفري = يوم فيه غياب؛ أطول سلسلة تُحسب على الأيام المسجلة فقط
+    streak = longest = 0
+    for i, recorded_day in enumerate(recorded_bits):
+        if not recorded_day:
+            continue
+        if i < len(absent_bits) and absent_bits[i]:
+            streak += 1
+            longest = max(longest, streak)
+        else:
+            streak = 0
+    return {
+        'absent_periods': int.from_bytes(absent_bits, 'little').bit_count(),
+        'recorded_periods': int.from_bytes(recorded_bits, 'little').bit_count(),
+        'absent_days': sum(1 for day in absent_bits if day),
+        'recorded_days': sum(1 for day in recorded_bits if day),
+        'longest_streak': longest,
+    }
+
+def student_term_stats(student_id, term=None):
+    term = term or term_of(date.today())[0]
+    bitmap = db.session.get(AttendanceBitmap, (student_id, term))
+    if not bitmap:
+        return dict(bitmap_stats(b'', b''), term=term)
+    return dict(bitmap_stats(bitmap.absent_bits, bitmap.recorded_bits), term=term)
+
+def class_term_stats(stage, section, term=None):
+    # OR على مستوى الشعبة: الأيام التي غاب فيها طالب واحد على الأقل
+    term = term or term_of(date.today())[0]
+    class_absent = class_recorded = 0
+    absent_periods = students = 0
+    for absent_bits, recorded_bits in db.session.query(AttendanceBitmap.absent_bits, AttendanceBitmap.recorded_bits).join(
+        Student, AttendanceBitmap.student_id == Student.id
+    ).filter(AttendanceBitmap.term == term, Student.stage == stage, Student.section == section):
+        absent = int.from_bytes(absent_bits, 'little')
+        class_absent |= absent
+        class_recorded |= int.from_bytes(recorded_bits, 'little')
+        absent_periods += absent.bit_count()
+        students += 1
+    stats = bitmap_stats(_bits_to_bytes(class_absent), _bits_to_bytes(class_recorded))
+    return {
+        'term': term,
+        'students': students,
+        'absent_periods': absent_periods,
+        'days_with_absence': stats['absent_days'],
+        'recorded_days': stats['recorded_days'],
+        'longest_absence_run': stats['longest_streak'],
+    }
+
+def save_attendance_batch(records):
+    # records: قائمة من القواميس {student_id, date, period, status, reason}
+    # كتابة الدفعة كاملة بأمر INSERT ... ON CONFLICT واحد (executemany)
+    # الحالات السابقة تُقرأ بعد أخذ قفل الكتابة حتى يُحسب كل تغيير في التجميعات مرة واحدة مهما تزامنت الطلبات
+    if not records:
+        return
+    student_ids = {r['student_id'] for r in records}
+    dates = {r['date'] for r in records}
+    periods = {r['period'] for r in records}
+    ensure_not_archived(dates)
+    lock_for_write(Student, student_ids)
+    existing = dict(
+        ((sid, day, period), status)
+        for sid, day, period, status in db.session.query(
+            Attendance.student_id, Attendance.date, Attendance.period, Attendance.status
+        ).filter(
+            Attendance.student_id.in_(student_ids),
+            Attendance.date.in_(dates),
+            Attendance.period.in_(periods),
+        ).with_for_update()
+    )
+    stmt = upsert(Attendance.__table__, ['date', 'period', 'student_id'], lambda excluded: {
+        'status': excluded.status, 'reason': excluded.reason,
+    })
+    db.session.execute(stmt, records)
+    apply_attendance_changes([
+        {'student_id': r['student_id'], 'date': r['date'], 'period': r['period'],
+         'old_status': existing.get((r['student_id'], r['date'], r['period'])), 'new_status': r['status']}
+        for r in records
+    ])
+
+def save_attendance_scans(scans):
+    # دفعة مسح فردية يجمعها WriteCoalescer من طلبات متزامنة؛ لا تنفّذ commit
+    # مسحان لنفس الطالب والحصة في الدفعة: يُكتب الأخير فقط لأن التجميعات تحسب التغيير مرة واحدة لكل مفتاح
+    latest = {}
+    for scan in scans:
+        latest[(scan['student_id'], scan['date'], scan['period'])] = scan
+    known = {sid for (sid,) in db.session.query(Student.id).filter(Student.id.in_({key[0] for key in latest}))}
+    save_attendance_batch([scan for key, scan in latest.items() if key[0] in known])
+    results = []
+    for scan in scans:
+        if scan['student_id'] not in known:
+            results.append(LookupError(f"الطالب {scan['student_id']} غير موجود"))
+            continue
+        saved = latest[(scan['student_id'], scan['date'], scan['period'])]
+        results.append({'student_id': saved['student_id'], 'date': saved['date'].isoformat(),
+                        'period': saved['period'], 'status': saved['status']})
+    return results
+
+def record_roll_call(stage, section, day, period, absent_ids, reasons=None):
+    # تسجيل حضور/غياب الشعبة كاملة: كل طالب غير محدد كغائب يُسجَّل حاضراً
+    reasons = reasons or {}
+    absent_ids = {int(sid) for sid in absent_ids}
+    student_ids = [sid for (sid,) in db.session.query(Student.id).filter_by(stage=stage, section=section)]
+    records = [{
+        'date': day,
+        'period': period,
+        'student_id': sid,
+        'status': 'absent' if sid in absent_ids else 'present',
+        'reason': reasons.get(sid, '') if sid in absent_ids else '',
+    } for sid in student_ids]
+    save_attendance_batch(records)
+    db.session.commit()
+    absent = sum(1 for r in records if r['status'] == 'absent')
+    return {'students': len(records), 'absent': absent, 'present': len(records) - absent}
+
+def rebuild_attendance_rollups():
+    # إعادة بناء التجميعات بالكامل من جدول الحضور مع كل السنوات المؤرشفة (INSERT ... SELECT)
+    source = attendance_source(start_date=date.min)
+    absent = func.sum(case((source.c.status == 'absent', 1), else_=0))
+    present = func.sum(case((source.c.status == 'present', 1), else_=0))
+    db.session.execute(StudentDailyAttendance.__table__.delete())
+    db.session.execute(ClassDailyAttendance.__table__.delete())
+    db.session.execute(StudentAttendanceCounter.__table__.delete())
+    db.session.execute(AttendanceCube.__table__.delete())
+    db.session.execute(insert(StudentDailyAttendance).from_select(
+        ['student_id', 'date', 'present', 'absent'],
+        select(source.c.student_id, source.c.date, present, absent)
+        .where(source.c.student_id.isnot(None))
+        .group_by(source.c.student_id, source.c.date),
+    ))
+    db.session.execute(insert(ClassDailyAttendance).from_select(
+        ['stage', 'section', 'date', 'present', 'absent'],
+        select(Student.stage, Student.section, source.c.date, present, absent)
+        .join(Student, source.c.student_id == Student.id)
+        .group_by(Student.stage, Student.section, source.c.date),
+    ))
+    db.session.execute(insert(StudentAttendanceCounter).from_select(
+        ['student_id', 'present', 'absent'],
+        select(source.c.student_id, present, absent)
+        .where(source.c.student_id.isnot(None))
+        .group_by(source.c.student_id),
+    ))
+    # الأعمدة الزمنية المشتقة تُحسب في بايثون لكل مجموعة (وليس لكل سجل حضور)
+    period = func.coalesce(source.c.period, '')
+    cube_rows = []
+    all_periods = {}
+    for day, stage, section, p, pr, ab in db.session.execute(
+        select(source.c.date, Student.stage, Student.section, period, present, absent)
+        .join(Student, source.c.student_id == Student.id)
+        .group_by(source.c.date, Student.stage, Student.section, period)
+    ):
+        cube_rows.append(dict({'date': day, 'stage': stage, 'section': section, 'period': p,
+                               'present': pr, 'absent': ab}, **cube_time_columns(day)))
+        counts = all_periods.setdefault((day, stage, section), [0, 0])
+        counts[0] += pr
+        counts[1] += ab
+    cube_rows.extend(
+        dict({'date': day, 'stage': stage, 'section': section, 'period': ALL_PERIODS,
+              'present': pr, 'absent': ab}, **cube_time_columns(day))
+        for (day, stage, section), (pr, ab) in all_periods.items()
+    )
+    if cube_rows:
+        db.session.execute(insert(AttendanceCube), cube_rows)
+    db.session.execute(AttendanceBitmap.__table__.delete())
+    bitmaps = {}
+    for sid, day, period, status in db.session.execute(
+        select(source.c.student_id, source.c.date, source.c.period, source.c.status)
+        .where(source.c.student_id.isnot(None)).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    ):
+        position = bitmap_position(day, period)
+        if position is None:
+            continue
+        term, bit = position
+        absent, recorded = bitmaps.get((sid, term), (0, 0))
+        recorded |= 1 << bit
+        absent = absent | (1 << bit) if status == 'absent' else absent & ~(1 << bit)
+        bitmaps[(sid, term)] = (absent, recorded)
+    _write_bitmaps(bitmaps)
+    db.session.commit()
@@ -0,0 +1,93 @@
+import os
+
+from jinja2 import DictLoader, FileSystemBytecodeCache
+
+###############################################
+# إعداد قالب الأساس باستخدام DictLoader
+###############################################
+base_template = """
+<!doctype html>
+<html lang="ar" dir="rtl">
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1, shrink-to-fit=no">
+  <title>نظام إدارة المدرسة</title>
+  <link rel="stylesheet" href="{{ asset_url('base.css') }}">
+  <link rel="preload" href="{{ asset_url('base.js') }}" as="script">
+  <style>
+    body { padding-top: 70px; }
+    /* العلامة المائية */
+    body::after {
+      content: "";
+      background: url("{{ image_url('watermark.png', 800) }}") no-repeat center center;
+      opacity: 0.1;
+      position: fixed;
+      top: 0;
+      left: 0;
+      width: 100%;
+      height: 100%;
+      z-index: -1;
+    }
+    /* الشاشات الكبيرة فقط تحمّل النسخة العريضة */
+    @media (min-width: 992px) {
+      body::after { background-image: url("{{ image_url('watermark.png', 1600) }}"); }
+    }
+    {% if session.get('theme', 'light') == 'dark' %}
+    body { background-color: #343a40; color: white; }
+    .card { background-color: #495057; }
+    {% endif %}
+  </style>
+</head>
+<body>
+  <nav class="navbar navbar-expand-lg navbar-dark bg-dark fixed-top">
+    <a class="navbar-brand" href="{{ url_for('main.index') }}">SchoolMS</a>
+    <button class="navbar-toggler" type="button" data-toggle="collapse" data-target="#navbarNav">
+      <span class="navbar-toggler-icon"></span>
+    </button>
+    <div class="collapse navbar-collapse" id="navbarNav">
+      <ul class="navbar-nav">
+        {% if current_user.is_authenticated %}
+          {% if current_user.role in ['admin', 'responsible'] %}
+            <li class="nav-item"><a class="nav-link" href="{{ url_for('main.admin_dashboard') }}">لوحة التحكم</a></li>
+          {% elif current_user.role == 'teacher' %}
+            <li class="nav-item"><a class="nav-link" href="{{ url_for('teacher.teacher_dashboard') }}">لوحة التحكم</a></li>
+          {% elif current_user.role == 'student' %}
+            <li class="nav-item"><a class="nav-link" href="{{ url_for('student.student_dashboard') }}">الإحصائيات</a></li>
+          {% endif %}
+          <li class="nav-item"><a class="nav-link" href="{{ url_for('attendance.weekly_attendance') }}">الغيابات الأسبوعية</a></li>
+          <li class="nav-item"><a class="nav-link" href="{{ url_for('attendance.list') }}">سجلات الحضور</a></li>
+          <li class="nav-item"><a class="nav-link" href="{{ url_for('attendance.charts') }}">مخططات الغياب</a></li>
+          <li class="nav-item"><a class="nav-link" href="{{ url_for('report.write_report') }}">كتابة تقرير</a></li>
+          <li class="nav-item"><a class="nav-link" href="{{ url_for('main.toggle_theme') }}">تبديل الوضع</a></li>
+          <li class="nav-item"><a class="nav-link" href="{{ url_for('main.logout') }}">تسجيل الخروج</a></li>
+        {% else %}
+          <li class="nav-item"><a class="nav-link" href="{{ url_for('main.login') }}">تسجيل الدخول</a></li>
+          <li class="nav-item"><a class="nav-link" href="{{ url_for('main.register') }}">إنشاء حساب</a></li>
+        {% endif %}
+      </ul>
+    </div>
+  </nav>
+  <div class="container">
+    {% with messages = get_flashed_messages(with_categories=true) %}
+      {% if messages %}
+        {% for category, message in messages %}
+          <div class="alert alert-{{ category }}">{{ message }}</div>
+        {% endfor %}
+      {% endif %}
+    {% endwith %}
+    {% block content %}{% endblock %}
+  </div>
+  <script src="{{ asset_url('base.js') }}"></script>
+</body>
+</html>
+"""
+# سجل القوالب: كل قالب يُسجَّل هنا مرة واحدة عند تحميل الوحدة ويُترجم مرة واحدة لكل عامل،
+# بدلاً من render_template_string الذي يعيد تحليل القالب وترجمته في كل طلب
+templates = {"base.html": base_template}
+
+def init_app(app):
+    app.jinja_loader = DictLoader(templates)
+    # ذاكرة bytecode دائمة حتى تبدأ عمال gunicorn الجديدة دون إعادة ترجمة القوالب
+    jinja_cache_dir = os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(jinja_cache_dir, exist_ok=True)
+    app.jinja_options = dict(app.jinja_options, bytecode_cache=FileSystemBytecodeCache(jinja_cache_dir))
@@ -0,0 +1,201 @@
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime
+
+from flask import Blueprint, Request, current_app, send_from_directory, url_for
+from flask_login import current_user, login_required
+
+from .extensions import db
+from .models import Attachment, Upload
+from .passwords import worker_pool
+from .rollups import upsert
+
+logger = logging.getLogger(__name__)
+
+###############################################
+# رفع الملفات: تخزين بعنوان المحتوى (SHA-256) وصور مصغّرة في الخلفية
+###############################################
+# الأنواع المسموحة لكل حقل (تُحدد من محتوى الملف لا من اسمه)
+uploads_bp = Blueprint('uploads', __name__)
+
+UPLOAD_KINDS = {
+    'student_photo': ('png', 'jpg', 'webp', 'gif'),
+    'medical_report': ('png', 'jpg', 'webp', 'pdf'),
+    'book_cover': ('png', 'jpg', 'webp'),
+}
+UPLOAD_IMAGE_FORMATS = {'PNG': 'png', 'JPEG': 'jpg', 'WEBP': 'webp', 'GIF': 'gif'}
+UPLOAD_CONTENT_TYPES = {'png': 'image/png', 'jpg': 'image/jpeg', 'webp': 'image/webp', 'gif': 'image/gif',
+                        'pdf': 'application/pdf'}
+
+class UploadPart(io.FileIO):
+    # ملف مؤقت داخل مجلد الرفع يُحسب SHA-256 له أثناء وصول الأجزاء، فلا يُحمَّل الملف كاملاً في الذاكرة
+    def __init__(self, directory):
+        fd, self.path = tempfile.mkstemp(dir=directory, suffix='.part')
+        super().__init__(fd, 'r+')
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.digest.update(data)
+        self.size += len(data)
+        return super().write(data)
+
+class UploadRequest(Request):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_parts = []
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        directory = os.path.join(current_app.config['UPLOAD_FOLDER'], 'tmp')
+        os.makedirs(directory, exist_ok=True)
+        part = UploadPart(directory)
+        self.upload_parts.append(part)
+        return part
+
+    def close(self):
+        super().close()
+        # الأجزاء التي لم تُنقل إلى المخزن (طلب فاشل أو حقل غير مستخدم) تُحذف بنهاية الطلب
+        for part in self.upload_parts:
+            if os.path.exists(part.path):
+                os.remove(part.path)
+
+def upload_path(digest, extension):
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], digest[:2], f"{digest}.{extension}")
+
+def thumbnail_path(digest, size):
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], 'thumbs', digest[:2], f"{digest}.{size}.webp")
+
+def inspect_upload(path):
+    with open(path, 'rb') as handle:
+        if handle.read(5) == b'%PDF-':
+            return 'pdf', None, None
+    from PIL import Image
+    try:
+        with Image.open(path) as image:
+            image_format, (width, height) = image.format, image.size
+            image.verify()
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        raise ValueError("نوع الملف غير مدعوم")
+    if image_format not in UPLOAD_IMAGE_FORMATS:
+        raise ValueError("نوع الملف غير مدعوم")
+    return UPLOAD_IMAGE_FORMATS[image_format], width, height
+
+def make_thumbnails(app, digest, extension):
+    # تعمل في خيط المجمع خارج سياق الطلب
+    from PIL import Image, ImageOps
+    with app.app_context(), Image.open(upload_path(digest, extension)) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if image.mode in ('P', 'LA', 'RGBA') else 'RGB')
+        for size in current_app.config['UPLOAD_THUMBNAIL_SIZES']:
+            target = thumbnail_path(digest, size)
+            if os.path.exists(target):
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            thumbnail = image.copy()
+            thumbnail.thumbnail((size, size), Image.LANCZOS)
+            # الكتابة إلى ملف مؤقت ثم إعادة التسمية حتى لا يُخدم ملف ناقص
+            temporary = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+            thumbnail.save(temporary, 'WEBP', quality=80, method=4)
+            os.replace(temporary, target)
+
+def _log_thumbnail_failure(future):
+    if future.exception():
+        logger.error("خطأ في إنشاء الصور المصغرة: " + str(future.exception()))
+
+def store_upload(file, kind, owner_id):
+    # يُنشئ Attachment جديداً؛ المحتوى المكرر يُشير إلى نفس الملف المخزن. الـ commit على المستدعي
+    part = file.stream
+    extension, width, height = inspect_upload(part.path)
+    if extension not in UPLOAD_KINDS[kind]:
+        raise ValueError("نوع الملف غير مسموح لهذا الحقل")
+    digest = part.digest.hexdigest()
+    path = upload_path(digest, extension)
+    if os.path.exists(path):
+        os.remove(part.path)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(part.path, path)
+    db.session.execute(upsert(Upload.__table__, ['sha256']), [{
+        'sha256': digest, 'extension': extension, 'content_type': UPLOAD_CONTENT_TYPES[extension],
+        'size': part.size, 'width': width, 'height': height, 'created_at': datetime.utcnow(),
+    }])
+    if extension != 'pdf':
+        pool = worker_pool('thumbnails', current_app.config['UPLOAD_THUMBNAIL_WORKERS'])
+        pool.submit(make_thumbnails, current_app._get_current_object(), digest, extension).add_done_callback(_log_thumbnail_failure)
+    attachment = Attachment(upload_sha256=digest, kind=kind, owner_id=owner_id,
+                            filename=os.path.basename(file.filename or '')[:255], uploaded_by=current_user.id)
+    db.session.add(attachment)
+    return attachment
+
+def store_uploads(files, kind, owner_id):
+    return [store_upload(file, kind, owner_id) for file in files if file and file.filename]
+
+def attachments_by_owner(kind, owner_ids):
+    # استعلام واحد لكل صفحة بدلاً من استعلام لكل صف
+    result = {}
+    if not owner_ids:
+        return result
+    rows = db.session.query(Attachment, Upload).join(Upload).filter(
+        Attachment.kind == kind, Attachment.owner_id.in_(owner_ids)
+    ).order_by(Attachment.id)
+    for attachment, upload in rows:
+        result.setdefault(attachment.owner_id, []).append((attachment, upload))
+    return result
+
+# التقارير الطبية للإدارة وللطالب صاحب السجل فقط؛ صور الطلاب وأغلفة الكتب لكل مستخدم مسجل
+def can_view_attachment(kind, owner_id):
+    if kind == 'medical_report':
+        return current_user.role in ['admin', 'responsible'] or current_user.student_id == owner_id
+    return True
+
+def find_visible_upload(digest):
+    # نفس المحتوى قد يكون مرفقاً لأكثر من سجل: يكفي أن يكون أحدها مسموحاً للمستخدم
+    upload = db.session.get(Upload, digest)
+    if upload is None:
+        return None, False
+    owners = db.session.query(Attachment.kind, Attachment.owner_id).filter_by(upload_sha256=digest)
+    return upload, any(can_view_attachment(kind, owner_id) for kind, owner_id in owners)
+
+@uploads_bp.app_template_global()
+def upload_url(upload):
+    return url_for('uploads.uploaded_file', digest=upload.sha256, extension=upload.extension)
+
+@uploads_bp.app_template_global()
+def thumbnail_url(upload, size):
+    return url_for('uploads.upload_thumbnail', digest=upload.sha256, size=size)
+
+@uploads_bp.route('/uploads/<string(length=64):digest>.<any(png, jpg, webp, gif, pdf):extension>')
+@login_required
+def uploaded_file(digest, extension):
+    upload, allowed = find_visible_upload(digest)
+    if upload is None or upload.extension != extension:
+        return "غير موجود", 404
+    if not allowed:
+        return "غير مسموح بالدخول", 403
+    # المحتوى لا يتغير لنفس العنوان، لذا التخزين المؤقت غير محدود (خاص بالمستخدم لأن الملفات غير عامة)
+    response = send_from_directory(current_app.config['UPLOAD_FOLDER'], f"{digest[:2]}/{digest}.{extension}",
+                                   max_age=31536000)
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+@uploads_bp.route('/uploads/thumbs/<string(length=64):digest>.<int:size>.webp')
+@login_required
+def upload_thumbnail(digest, size):
+    if size not in current_app.config['UPLOAD_THUMBNAIL_SIZES']:
+        return "حجم غير مدعوم", 404
+    upload, allowed = find_visible_upload(digest)
+    if upload is None or upload.extension == 'pdf':
+        return "غير موجود", 404
+    if not allowed:
+        return "غير مسموح بالدخول", 403
+    if not os.path.exists(thumbnail_path(digest, size)):
+        # الطلب وصل قبل انتهاء مجمع الخلفية: الإنشاء هنا مباشرة
+        make_thumbnails(current_app._get_current_object(), digest, upload.extension)
+    response = send_from_directory(current_app.config['UPLOAD_FOLDER'], f"thumbs/{digest[:2]}/{digest}.{size}.webp",
+                                   max_age=31536000)
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response